@@ -0,0 +1,163 @@
+"""
+P6 Device Circuit Breaker
+=========================
+
+Per-device circuit breaker for the P6 UI execution path. While a Pi5 is
+unreachable, tasks aimed at it fail (or are routed to another device)
+immediately instead of each one waiting for an SSH timeout.
+
+- closed: requests flow; outcomes are tracked over a sliding window
+- open: requests are refused until the open period ends; the period
+  doubles each time a half-open probe fails (exponential backoff)
+- half_open: a limited number of probe requests are let through; a
+  success closes the circuit, a failure re-opens it
+
+Author: DexiMind Development Team
+Date: 2025-01-15
+Version: 1.0.0
+"""
+
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, Optional
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(Exception):
+    """Raised when a request is refused by an open circuit"""
+
+    def __init__(self, name: str, retry_after: float):
+        super().__init__(f"Circuit open for {name}, retry in {retry_after:.1f}s")
+        self.name = name
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    """Failure-rate circuit breaker with half-open probes and exponential backoff"""
+
+    def __init__(self, name: str, window_size: int = 20, min_calls: int = 5,
+                 failure_rate_threshold: float = 0.5, consecutive_failures: int = 3,
+                 open_seconds: float = 5.0, max_open_seconds: float = 300.0,
+                 half_open_probes: int = 1,
+                 on_state_change: Optional[Callable[["CircuitBreaker"], None]] = None):
+        self.name = name
+        self.window_size = window_size
+        self.min_calls = min_calls
+        self.failure_rate_threshold = failure_rate_threshold
+        self.consecutive_failures = consecutive_failures
+        self.base_open_seconds = open_seconds
+        self.max_open_seconds = max_open_seconds
+        self.half_open_probes = half_open_probes
+        self.on_state_change = on_state_change
+
+        self.state = CLOSED
+        self._outcomes: Deque[bool] = deque(maxlen=window_size)
+        self._failure_streak = 0
+        self._open_seconds = open_seconds
+        self._open_until = 0.0
+        self._probes_in_flight = 0
+        self.times_opened = 0
+        self.rejected = 0
+
+    @property
+    def retry_after(self) -> float:
+        """Seconds until an open circuit lets a probe through"""
+        return max(0.0, self._open_until - time.monotonic()) if self.state == OPEN else 0.0
+
+    @property
+    def available(self) -> bool:
+        """Whether a request would be let through now (no side effects)"""
+        if self.state == CLOSED:
+            return True
+        if self.state == OPEN:
+            return time.monotonic() >= self._open_until
+        return self._probes_in_flight < self.half_open_probes
+
+    def allow_request(self) -> bool:
+        """Admit a request, moving an expired open circuit to half-open"""
+        if self.state == OPEN and time.monotonic() >= self._open_until:
+            self._transition(HALF_OPEN)
+        if self.state == CLOSED:
+            return True
+        if self.state == HALF_OPEN and self._probes_in_flight < self.half_open_probes:
+            self._probes_in_flight += 1
+            return True
+        self.rejected += 1
+        return False
+
+    def check(self):
+        """allow_request() that raises CircuitOpenError when refused"""
+        if not self.allow_request():
+            raise CircuitOpenError(self.name, self.retry_after)
+
+    def abandon(self):
+        """Release an admitted request that ended without an outcome (e.g. cancelled)"""
+        if self.state == HALF_OPEN:
+            self._probes_in_flight = max(0, self._probes_in_flight - 1)
+
+    def reset(self):
+        """Forget every outcome and close, e.g. once the device answers at a new address"""
+        self._outcomes.clear()
+        self._failure_streak = 0
+        self._open_seconds = self.base_open_seconds
+        self._open_until = 0.0
+        self._probes_in_flight = 0
+        self._transition(CLOSED)
+
+    def record_success(self):
+        self._failure_streak = 0
+        if self.state == HALF_OPEN:
+            self._probes_in_flight = max(0, self._probes_in_flight - 1)
+            self._open_seconds = self.base_open_seconds
+            self._outcomes.clear()
+            self._transition(CLOSED)
+        else:
+            self._outcomes.append(True)
+
+    def record_failure(self):
+        self._failure_streak += 1
+        if self.state == HALF_OPEN:
+            # Probe failed: back off further before the next one
+            self._probes_in_flight = max(0, self._probes_in_flight - 1)
+            self._open_seconds = min(self._open_seconds * 2, self.max_open_seconds)
+            self._open()
+            return
+
+        self._outcomes.append(False)
+        if self.state == CLOSED and self._should_trip():
+            self._open()
+
+    def _should_trip(self) -> bool:
+        if self._failure_streak >= self.consecutive_failures:
+            return True
+        if len(self._outcomes) < self.min_calls:
+            return False
+        failures = sum(1 for outcome in self._outcomes if not outcome)
+        return failures / len(self._outcomes) >= self.failure_rate_threshold
+
+    def _open(self):
+        self._open_until = time.monotonic() + self._open_seconds
+        self.times_opened += 1
+        self._transition(OPEN)
+
+    def _transition(self, state: str):
+        if state == self.state:
+            return
+        self.state = state
+        if self.on_state_change:
+            self.on_state_change(self)
+
+    def to_dict(self) -> Dict[str, Any]:
+        failures = sum(1 for outcome in self._outcomes if not outcome)
+        return {
+            "state": self.state,
+            "failure_rate": round(failures / len(self._outcomes), 3) if self._outcomes else 0.0,
+            "failure_streak": self._failure_streak,
+            "retry_after": round(self.retry_after, 2),
+            "open_seconds": self._open_seconds,
+            "times_opened": self.times_opened,
+            "rejected": self.rejected,
+        }
@@ -0,0 +1,139 @@
+"""
+P6 WebSocket Connection Manager
+===============================
+
+Registry of the live ``/ws`` connections of the P6 UI server:
+
+- global and per-IP connection limits: admitting a client reserves its slot
+  before the handshake, so concurrent handshakes cannot overshoot the caps
+- O(1) add/remove (a dict keyed by socket, iterated in connection order)
+- liveness tracking: every inbound frame refreshes a client's ``last_seen``;
+  the server sends periodic ``heartbeat`` messages that clients answer
+  (any frame will do), and clients silent for longer than the idle timeout
+  are reaped
+- live, peak and lifetime counters for ``/status``
+
+Author: DexiMind Development Team
+Date: 2025-01-15
+Version: 1.0.0
+"""
+
+import time
+from typing import Any, Dict, Iterator, List, Optional
+
+from fastapi import WebSocket
+
+from p6_encoding import WebSocketCodec
+
+
+class ClientConnection:
+    """One admitted WebSocket client"""
+
+    __slots__ = ("websocket", "ip", "codec", "connected_at", "last_seen")
+
+    def __init__(self, websocket: WebSocket, ip: str, codec: WebSocketCodec):
+        self.websocket = websocket
+        self.ip = ip
+        self.codec = codec
+        self.connected_at = time.monotonic()
+        self.last_seen = self.connected_at
+
+
+class ConnectionManager:
+    """Bounded set of live WebSocket clients"""
+
+    def __init__(self, max_connections: int, max_per_ip: int, idle_timeout: float):
+        self.max_connections = max_connections
+        self.max_per_ip = max_per_ip
+        self.idle_timeout = idle_timeout
+        self._clients: Dict[WebSocket, ClientConnection] = {}
+        # Admitted clients still in the handshake; counted in _per_ip as well
+        self._reserved = 0
+        self._per_ip: Dict[str, int] = {}
+
+        self.peak = 0
+        self.accepted = 0
+        self.rejected = 0
+        self.reaped = 0
+
+    def __len__(self) -> int:
+        return len(self._clients)
+
+    def __iter__(self) -> Iterator[WebSocket]:
+        return iter(list(self._clients))
+
+    def admit(self, ip: str) -> Optional[str]:
+        """Reason the client must be refused, or None after reserving its slot
+
+        The reservation is turned into a connection by ``add`` or returned with
+        ``release`` if the handshake fails.
+        """
+        if len(self._clients) + self._reserved >= self.max_connections:
+            self.rejected += 1
+            return "server connection limit reached"
+        if self._per_ip.get(ip, 0) >= self.max_per_ip:
+            self.rejected += 1
+            return "too many connections from this address"
+        self._reserved += 1
+        self._per_ip[ip] = self._per_ip.get(ip, 0) + 1
+        return None
+
+    def release(self, ip: str):
+        """Give back the slot of an admitted client whose handshake failed"""
+        self._reserved -= 1
+        self._release_ip(ip)
+
+    def add(self, websocket: WebSocket, ip: str, codec: WebSocketCodec) -> ClientConnection:
+        """Register an admitted client once its handshake completes"""
+        client = ClientConnection(websocket, ip, codec)
+        self._clients[websocket] = client
+        self._reserved -= 1
+        self.accepted += 1
+        self.peak = max(self.peak, len(self._clients))
+        return client
+
+    def get(self, websocket: WebSocket) -> Optional[ClientConnection]:
+        return self._clients.get(websocket)
+
+    def touch(self, websocket: WebSocket):
+        """Record inbound activity from a client"""
+        client = self._clients.get(websocket)
+        if client is not None:
+            client.last_seen = time.monotonic()
+
+    def remove(self, websocket: WebSocket) -> Optional[ClientConnection]:
+        client = self._clients.pop(websocket, None)
+        if client is not None:
+            self._release_ip(client.ip)
+        return client
+
+    def _release_ip(self, ip: str):
+        remaining = self._per_ip[ip] - 1
+        if remaining:
+            self._per_ip[ip] = remaining
+        else:
+            del self._per_ip[ip]
+
+    def idle(self) -> List[ClientConnection]:
+        """Clients that have not sent anything within the idle timeout"""
+        cutoff = time.monotonic() - self.idle_timeout
+        return [client for client in self._clients.values() if client.last_seen < cutoff]
+
+    def reap(self, websocket: WebSocket) -> Optional[ClientConnection]:
+        client = self.remove(websocket)
+        if client is not None:
+            self.reaped += 1
+        return client
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "live": len(self._clients),
+            "handshaking": self._reserved,
+            "peak": self.peak,
+            "max_connections": self.max_connections,
+            "max_per_ip": self.max_per_ip,
+            "accepted": self.accepted,
+            "rejected": self.rejected,
+            "reaped": self.reaped,
+            "addresses": len(self._per_ip),
+        }
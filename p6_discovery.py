@@ -0,0 +1,276 @@
+"""
+P6 LAN Discovery
+================
+
+Finds Pi5 devices on the local network by asking every address of the
+configured subnets for ``/api/serial`` on the device API port, so a device
+can be located by its hardware serial instead of an IP typed in by hand.
+
+Probes run concurrently through an ``HttpConnectionPool`` (see
+``p6_telemetry``) that bounds how many are in flight, each under a short
+timeout, so a /24 sweep takes a few seconds: addresses with no device time
+out in parallel rather than one after another.
+
+Found devices are cached by serial, with the address they were last seen
+at, and the cache is saved to a JSON file (``P6_DISCOVERY_FILE``, default
+``p6_discovered.json`` next to this file). After the first full sweep,
+incremental sweeps re-check each known device at its cached address (one
+request over a kept-alive connection) plus the next slice of the subnet,
+so new devices still turn up without scanning everything every time. A
+device that misses several checks in a row is marked ``missing``; the
+caller typically answers that with a full sweep to find its new address.
+
+Author: DexiMind Development Team
+Date: 2025-01-15
+Version: 1.0.0
+"""
+
+import asyncio
+import ipaddress
+import json
+import logging
+import os
+import socket
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from p6_telemetry import HttpConnectionPool
+
+logger = logging.getLogger(__name__)
+
+DISCOVERY_FILE = os.environ.get(
+    "P6_DISCOVERY_FILE",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "p6_discovered.json")
+)
+
+SERIAL_PATH = "/api/serial"
+MAX_SCAN_HOSTS = 4096  # a /20; larger subnets are refused
+MISSING_AFTER = 3  # failed checks in a row before a device counts as missing
+SLICE_SIZE = 32  # addresses scanned per incremental sweep
+# Placeholder serials the Pi5 API returns when it cannot read one
+UNKNOWN_SERIALS = ("", "UNKNOWN")
+
+
+def local_subnet() -> Optional[str]:
+    """The /24 of this machine's outbound interface, or None when offline"""
+    try:
+        # Connecting a UDP socket only selects a route; nothing is sent
+        with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as probe:
+            probe.connect(("192.0.2.1", 80))
+            address = probe.getsockname()[0]
+    except OSError:
+        return None
+    if address.startswith("127."):
+        return None
+    return str(ipaddress.ip_network(f"{address}/24", strict=False))
+
+
+def subnet_hosts(subnets: List[str]) -> List[str]:
+    """Host addresses of the subnets, in order; raises ValueError if there are too many"""
+    hosts: List[str] = []
+    for subnet in subnets:
+        network = ipaddress.ip_network(subnet.strip(), strict=False)
+        if network.num_addresses > MAX_SCAN_HOSTS:
+            raise ValueError(f"Subnet {subnet} is too large to scan (max {MAX_SCAN_HOSTS} addresses)")
+        hosts.extend(str(host) for host in network.hosts())
+    if len(hosts) > MAX_SCAN_HOSTS:
+        raise ValueError(f"Subnets have {len(hosts)} addresses, more than {MAX_SCAN_HOSTS}")
+    return list(dict.fromkeys(hosts))
+
+
+def _iso(timestamp: Optional[float]) -> Optional[str]:
+    return datetime.fromtimestamp(timestamp).isoformat() if timestamp is not None else None
+
+
+class DiscoveredDevice:
+    """A Pi5 found on the network, keyed by its hardware serial"""
+
+    RECORD_FIELDS = ("serial", "host", "port", "first_seen", "last_seen", "misses", "previous_host")
+
+    def __init__(self, serial: str, host: str, port: int, first_seen: Optional[float] = None,
+                 last_seen: Optional[float] = None, misses: int = 0,
+                 previous_host: Optional[str] = None):
+        self.serial = serial
+        self.host = host
+        self.port = port
+        self.first_seen = first_seen if first_seen is not None else time.time()
+        self.last_seen = last_seen if last_seen is not None else self.first_seen
+        self.misses = misses
+        self.previous_host = previous_host
+
+    @property
+    def state(self) -> str:
+        if self.misses == 0:
+            return "online"
+        return "missing" if self.misses >= MISSING_AFTER else "unconfirmed"
+
+    def to_record(self) -> Dict[str, Any]:
+        return {field: getattr(self, field) for field in self.RECORD_FIELDS}
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = self.to_record()
+        data["first_seen"] = _iso(self.first_seen)
+        data["last_seen"] = _iso(self.last_seen)
+        data["state"] = self.state
+        return data
+
+
+class LanDiscovery:
+    """Subnet sweeps for the Pi5 serial endpoint and the serial-keyed device cache"""
+
+    def __init__(self, subnets: List[str], port: int, pool: HttpConnectionPool,
+                 timeout: float = 0.75, path: str = DISCOVERY_FILE):
+        self.subnets = subnets
+        self.port = port
+        self.pool = pool
+        self.timeout = timeout
+        self.path = path
+        self.hosts = subnet_hosts(subnets)
+        self.devices: Dict[str, DiscoveredDevice] = {}
+        self._cursor = 0
+        self._lock: Optional[asyncio.Lock] = None
+        self.dirty = False
+        self.full_sweeps = 0
+        self.incremental_sweeps = 0
+        self.last_sweep: Optional[Dict[str, Any]] = None
+
+    @property
+    def sweeping(self) -> bool:
+        return self._lock is not None and self._lock.locked()
+
+    def _sweep_lock(self) -> asyncio.Lock:
+        # Created on first use, inside the server's event loop
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        return self._lock
+
+    @property
+    def swept(self) -> bool:
+        """Whether a full sweep has completed since startup"""
+        return self.full_sweeps > 0
+
+    # -- persistence --
+
+    def load(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path) as f:
+                records = json.load(f)["devices"]
+            devices = [DiscoveredDevice(**record) for record in records]
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            logger.error(f"❌ Could not load discovered devices from {self.path}: {e}")
+            return
+        self.devices = {device.serial: device for device in devices}
+        logger.info(f"🔎 Loaded {len(devices)} discovered Pi5 devices")
+
+    def pending_save(self) -> Optional[List[Dict[str, Any]]]:
+        if not self.dirty:
+            return None
+        self.dirty = False
+        return [device.to_record() for device in self.devices.values()]
+
+    def write(self, records: List[Dict[str, Any]]):
+        temp_path = f"{self.path}.tmp"
+        with open(temp_path, "w") as f:
+            json.dump({"devices": records}, f, indent=2)
+        os.replace(temp_path, self.path)
+
+    # -- sweeps --
+
+    async def full_sweep(self) -> Dict[str, Any]:
+        """Probe every address of the subnets"""
+        async with self._sweep_lock():
+            result = await self._sweep("full", self.hosts)
+            self.full_sweeps += 1
+            self._cursor = 0
+            return result
+
+    async def incremental_sweep(self) -> Dict[str, Any]:
+        """Re-check known devices at their cached address, plus the next slice of the subnet"""
+        async with self._sweep_lock():
+            hosts = [device.host for device in self.devices.values()]
+            if self.hosts:
+                start = self._cursor % len(self.hosts)
+                self._cursor = start + SLICE_SIZE
+                hosts.extend(self.hosts[start:start + SLICE_SIZE])
+            result = await self._sweep("incremental", list(dict.fromkeys(hosts)))
+            self.incremental_sweeps += 1
+            return result
+
+    async def _probe(self, host: str) -> Optional[str]:
+        """Serial of the Pi5 answering at host, or None"""
+        try:
+            reply = await self.pool.get_json(host, self.port, SERIAL_PATH, self.timeout)
+        except Exception:
+            return None
+        serial = reply.get("serialNumber") if isinstance(reply, dict) else None
+        if not isinstance(serial, str) or serial.strip() in UNKNOWN_SERIALS:
+            return None
+        return serial.strip()
+
+    async def _sweep(self, kind: str, hosts: List[str]) -> Dict[str, Any]:
+        started = time.perf_counter()
+        serials = await asyncio.gather(*(self._probe(host) for host in hosts))
+        answered: Dict[str, str] = {host: serial for host, serial in zip(hosts, serials) if serial}
+        now = time.time()
+        found: List[str] = []
+        moved: List[Tuple[str, str, str]] = []
+
+        # A Pi5 on both Ethernet and Wi-Fi answers at two addresses: keep the known one
+        at: Dict[str, str] = {}
+        for host, serial in answered.items():
+            known = self.devices.get(serial)
+            if serial not in at or (known is not None and host == known.host):
+                at[serial] = host
+
+        for serial, host in at.items():
+            device = self.devices.get(serial)
+            if device is None:
+                self.devices[serial] = DiscoveredDevice(serial, host, self.port, first_seen=now)
+                found.append(serial)
+                logger.info(f"🔎 Found Pi5 {serial} at {host}")
+            elif device.host != host:
+                moved.append((serial, device.host, host))
+                logger.info(f"🔎 Pi5 {serial} moved from {device.host} to {host}")
+                device.previous_host, device.host = device.host, host
+            if device is not None:
+                device.last_seen = now
+                device.misses = 0
+            self.dirty = True
+
+        # Known devices that did not answer at the address they were checked at
+        scanned = set(hosts)
+        missing: List[str] = []
+        for device in self.devices.values():
+            if device.host in scanned and answered.get(device.host) != device.serial:
+                device.misses += 1
+                self.dirty = True
+                if device.misses == MISSING_AFTER:
+                    missing.append(device.serial)
+                    logger.warning(f"🔎 Pi5 {device.serial} no longer answers at {device.host}")
+
+        self.last_sweep = {
+            "kind": kind,
+            "finished_at": _iso(now),
+            "scanned": len(hosts),
+            "answered": len(answered),
+            "found": found,
+            "moved": [{"serial": serial, "from": old, "to": new} for serial, old, new in moved],
+            "missing": missing,
+            "duration_ms": round((time.perf_counter() - started) * 1000, 1),
+        }
+        return self.last_sweep
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "subnets": self.subnets,
+            "port": self.port,
+            "addresses": len(self.hosts),
+            "sweeping": self.sweeping,
+            "full_sweeps": self.full_sweeps,
+            "incremental_sweeps": self.incremental_sweeps,
+            "last_sweep": self.last_sweep,
+            "client": self.pool.get_stats(),
+        }
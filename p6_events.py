@@ -0,0 +1,222 @@
+"""
+P6 Task Event Stream
+====================
+
+Replayable feed of task events for the P6 UI server. Every task update
+that goes out over the WebSocket broadcast is also published here, so
+Server-Sent Events clients see exactly the same updates and can resume
+after a reconnect with the standard ``Last-Event-ID`` header. A batch of
+updates published together reaches the all-tasks stream as one event,
+while each single-task stream still gets an ordinary update for its task.
+
+Author: DexiMind Development Team
+Date: 2025-01-15
+Version: 1.0.0
+"""
+
+import asyncio
+import json
+import time
+from collections import deque
+from typing import AsyncIterator, Callable, Deque, Dict, List, Optional, Set, Any
+
+# SSE reconnect delay suggested to clients (milliseconds)
+SSE_RETRY_MS = 3000
+
+# Seconds between keep-alive comments on an idle stream
+SSE_KEEPALIVE_SECONDS = 15.0
+
+
+class TaskEvent:
+    """A single published event, serialized once at publish time"""
+
+    __slots__ = ("event_id", "event_type", "task_id", "task_only", "status", "payload", "timestamp")
+
+    def __init__(self, event_id: int, event_type: str, task_id: Optional[str], payload: str,
+                 task_only: bool = False, status: Optional[str] = None):
+        self.event_id = event_id
+        self.event_type = event_type
+        self.task_id = task_id
+        # Part of a batch: the all-tasks stream gets the batch event instead
+        self.task_only = task_only
+        # Status of the task a single-task event describes, as of publishing
+        self.status = status
+        self.payload = payload
+        self.timestamp = time.time()
+
+    def visible_to(self, task_id: Optional[str]) -> bool:
+        """Whether a stream for task_id (None: all tasks) should see this event"""
+        if task_id is None:
+            return not self.task_only
+        return self.task_id == task_id
+
+    def to_sse(self) -> str:
+        """Format the event as an SSE frame"""
+        return f"id: {self.event_id}\nevent: {self.event_type}\ndata: {self.payload}\n\n"
+
+
+class _Subscriber:
+    """Bounded per-client queue; marked lagged instead of growing without limit"""
+
+    def __init__(self, task_id: Optional[str], max_queue: int):
+        self.task_id = task_id
+        self.queue: "asyncio.Queue[TaskEvent]" = asyncio.Queue(maxsize=max_queue)
+        self.lagged = False
+
+
+class TaskEventHub:
+    """Ring buffer of recent task events plus live fan-out to subscribers"""
+
+    def __init__(self, max_events: int = 1000, max_queue: int = 256):
+        self._events: Deque[TaskEvent] = deque(maxlen=max_events)
+        self._subscribers: Set[_Subscriber] = set()
+        self._max_queue = max_queue
+        self._closed = False
+        # Seed ids from the wall clock so they keep increasing across restarts
+        self._next_id = int(time.time() * 1000)
+
+    @property
+    def last_event_id(self) -> int:
+        """Id of the most recently published event"""
+        return self._next_id - 1
+
+    def publish(self, event_type: str, data: Dict[str, Any], task_id: Optional[str] = None) -> int:
+        """Publish an event to the buffer and all live subscribers"""
+        return self._append(TaskEvent(self._next_id, event_type, task_id, json.dumps(data),
+                                      status=data.get("status") if task_id is not None else None))
+
+    def publish_batch(self, event_type: str, tasks: List[Dict[str, Any]]) -> int:
+        """Publish many task updates: one ``event_type`` event with all of them for
+        the all-tasks stream, one ``task_update`` per task for single-task streams.
+        Returns the id of the batch event."""
+        for task in tasks:
+            self._append(TaskEvent(self._next_id, "task_update", task["task_id"], json.dumps(task),
+                                   task_only=True, status=task.get("status")))
+        return self._append(TaskEvent(self._next_id, event_type, None, json.dumps({"tasks": tasks})))
+
+    def _append(self, event: TaskEvent) -> int:
+        self._next_id += 1
+        self._events.append(event)
+
+        for subscriber in self._subscribers:
+            if subscriber.lagged:
+                continue
+            if not event.visible_to(subscriber.task_id):
+                continue
+            try:
+                subscriber.queue.put_nowait(event)
+            except asyncio.QueueFull:
+                # Slow consumer: it will catch up from the ring buffer
+                subscriber.lagged = True
+
+        return event.event_id
+
+    def close(self):
+        """End every open stream, e.g. before a restart; clients resume elsewhere"""
+        self._closed = True
+        for subscriber in self._subscribers:
+            try:
+                subscriber.queue.put_nowait(None)
+            except asyncio.QueueFull:
+                pass
+
+    def snapshot_event(self, event_type: str, data: Dict[str, Any], task_id: Optional[str] = None) -> TaskEvent:
+        """Build an unpublished event describing current state at the latest id"""
+        return TaskEvent(self.last_event_id, event_type, task_id, json.dumps(data),
+                         status=data.get("status") if task_id is not None else None)
+
+    def can_resume(self, last_event_id: int) -> bool:
+        """Whether every event after last_event_id is still buffered"""
+        if last_event_id >= self.last_event_id:
+            return True
+        if not self._events:
+            return False
+        return self._events[0].event_id <= last_event_id + 1
+
+    def replay(self, last_event_id: int, task_id: Optional[str] = None) -> List[TaskEvent]:
+        """Buffered events newer than last_event_id, optionally for one task"""
+        return [
+            event for event in self._events
+            if event.event_id > last_event_id and event.visible_to(task_id)
+        ]
+
+    def discard_before(self, cutoff: float) -> int:
+        """Drop buffered events published before cutoff (epoch seconds)"""
+        dropped = 0
+        while self._events and self._events[0].timestamp < cutoff:
+            self._events.popleft()
+            dropped += 1
+        return dropped
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Buffer and subscriber counters"""
+        return {
+            "buffered_events": len(self._events),
+            "subscribers": len(self._subscribers),
+            "last_event_id": self.last_event_id,
+        }
+
+    async def stream(
+        self,
+        last_event_id: Optional[int],
+        snapshot: Callable[[], List[TaskEvent]],
+        task_id: Optional[str] = None,
+        is_finished: Optional[Callable[[TaskEvent], bool]] = None,
+        keepalive: float = SSE_KEEPALIVE_SECONDS,
+    ) -> AsyncIterator[str]:
+        """Yield SSE frames: resume or snapshot first, then live events.
+
+        ``snapshot`` builds synthetic events describing current state; it is
+        used for new clients and for clients whose ``Last-Event-ID`` has
+        already fallen out of the buffer. ``is_finished`` lets a stream end
+        itself, e.g. once a single task reaches a terminal state.
+        """
+        subscriber = _Subscriber(task_id, self._max_queue)
+        self._subscribers.add(subscriber)
+        try:
+            yield f"retry: {SSE_RETRY_MS}\n\n"
+
+            resumable = (
+                last_event_id is not None
+                and last_event_id <= self.last_event_id
+                and self.can_resume(last_event_id)
+            )
+            if resumable:
+                sent_id = last_event_id
+                pending, from_snapshot = self.replay(last_event_id, task_id), False
+            else:
+                sent_id = self.last_event_id
+                pending, from_snapshot = snapshot(), True
+
+            while True:
+                if self._closed:
+                    return
+                for event in pending:
+                    # Snapshot events carry the current id and are always sent
+                    if event.event_id <= sent_id and not from_snapshot:
+                        continue
+                    yield event.to_sse()
+                    sent_id = event.event_id
+                    if is_finished and is_finished(event):
+                        return
+
+                if subscriber.lagged:
+                    # Drop the queue and catch up from the ring buffer
+                    subscriber.queue = asyncio.Queue(maxsize=self._max_queue)
+                    subscriber.lagged = False
+                    if self.can_resume(sent_id):
+                        pending, from_snapshot = self.replay(sent_id, task_id), False
+                    else:
+                        sent_id = self.last_event_id
+                        pending, from_snapshot = snapshot(), True
+                    continue
+
+                try:
+                    event = await asyncio.wait_for(subscriber.queue.get(), timeout=keepalive)
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    pending = []
+                    continue
+                pending, from_snapshot = ([event] if event else []), False
+        finally:
+            self._subscribers.discard(subscriber)
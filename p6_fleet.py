@@ -0,0 +1,245 @@
+"""
+P6 Pi5 Fleet Registry
+=====================
+
+Registry of the Pi5 devices the P6 UI server can execute tasks on, plus
+the runtime health and load of each one. Devices come from a JSON config
+file (``P6_DEVICES_FILE``, default ``p6_devices.json`` next to this file):
+
+    {
+        "devices": [
+            {"id": "pi5-desk", "ssh_target": "hp@192.168.1.7", "pools": ["office"]},
+            {"id": "pi5-lab", "ssh_target": "hp@192.168.1.8", "pools": ["office", "lab"],
+             "serial": "10000000a1b2c3d4"}
+        ]
+    }
+
+Without a config file the registry holds the single original device. A
+device with a ``serial`` follows LAN discovery (see ``p6_discovery``): when
+that serial is found at another address, its SSH target moves there.
+Tasks can name a device or a pool; otherwise any healthy device is used.
+The router picks the healthy candidate with the lowest expected wait,
+estimated from its queue depth and observed command latency, and stretched
+while the device runs hot or loaded (see ``p6_throttle``). Devices whose
+circuit breaker is open are not candidates, and devices paused by their
+throttle are used only when nothing else is available. Each device runs its
+tasks one at a time through its execution lane (see ``p6_lanes``).
+
+Author: DexiMind Development Team
+Date: 2025-01-15
+Version: 1.0.0
+"""
+
+import json
+import logging
+import os
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from p6_circuit import CircuitBreaker
+from p6_lanes import ExecutionLane
+from p6_throttle import DispatchThrottle, parse_device_status
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SSH_TARGET = "hp@192.168.1.7"
+DEFAULT_SSH_KEY = "C:/Users/hp/.ssh/id_rsa"
+DEFAULT_API_PORT = 8080
+DEFAULT_POOL = "default"
+
+DEVICES_FILE = os.environ.get(
+    "P6_DEVICES_FILE",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "p6_devices.json")
+)
+
+# Latency assumed for a device before any command has completed on it
+INITIAL_LATENCY_MS = 1000.0
+# Weight of the newest sample in the latency moving average
+LATENCY_EWMA_ALPHA = 0.2
+
+
+class NoDeviceAvailable(Exception):
+    """No healthy device matches the requested device or pool"""
+
+
+class Pi5Device:
+    """A Pi5 device: static config plus runtime health and load"""
+
+    def __init__(self, device_id: str, ssh_target: str, ssh_key: str = DEFAULT_SSH_KEY,
+                 api_port: int = DEFAULT_API_PORT, pools: Optional[List[str]] = None,
+                 serial: Optional[str] = None):
+        self.device_id = device_id
+        self.ssh_target = ssh_target
+        self.serial = serial
+        self.ssh_key = ssh_key
+        self.api_port = api_port
+        self.pools = pools or [DEFAULT_POOL]
+        self.breaker = CircuitBreaker(f"pi5:{device_id}")
+        self.lane = ExecutionLane(device_id)
+        self.throttle = DispatchThrottle(f"pi5:{device_id}")
+        # Bumped on every move; sessions and outcomes from an older address are stale
+        self.generation = 0
+
+        self.status = "unknown"
+        self.inflight = 0
+        self.latency_ms = INITIAL_LATENCY_MS
+        self.completed = 0
+        self.failed = 0
+        self.last_seen: Optional[float] = None
+
+    @property
+    def host(self) -> str:
+        return self.ssh_target.split("@")[-1]
+
+    def move_to(self, host: str):
+        """Point the device at a new address, keeping the SSH user.
+
+        Breaker and throttle state describe the old address and start over.
+        """
+        user, at, _ = self.ssh_target.rpartition("@")
+        self.ssh_target = f"{user}{at}{host}"
+        self.generation += 1
+        self.breaker.reset()
+        self.throttle.reset()
+
+    def record_outcome(self, generation: int, success: bool):
+        """Count a command result in the breaker, unless it came from an address since left"""
+        if generation != self.generation:
+            return
+        if success:
+            self.breaker.record_success()
+        else:
+            self.breaker.record_failure()
+
+    @property
+    def queued(self) -> int:
+        """Tasks waiting in this device's lane"""
+        return self.lane.queued
+
+    @property
+    def healthy(self) -> bool:
+        return self.status != "unreachable" and self.breaker.available
+
+    def expected_wait_ms(self) -> float:
+        """Time a new task would wait: work ahead of it times average latency"""
+        return (self.inflight + self.queued + 1) * self.latency_ms * self.throttle.penalty
+
+    def record_start(self):
+        self.inflight += 1
+
+    def record_finish(self, duration_ms: float, success: bool):
+        """Update load and the latency average after a command"""
+        self.inflight = max(0, self.inflight - 1)
+        self.throttle.mark_finished()
+        if success:
+            self.completed += 1
+            self.latency_ms += LATENCY_EWMA_ALPHA * (duration_ms - self.latency_ms)
+        else:
+            self.failed += 1
+
+    def update_telemetry(self, data: Dict[str, Any]) -> bool:
+        """Apply a /api/status reading; returns True if the throttle level changed"""
+        return self.throttle.update(*parse_device_status(data))
+
+    def mark_status(self, status: str):
+        self.status = status
+        if status == "active":
+            self.last_seen = time.time()
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "id": self.device_id,
+            "ssh_target": self.ssh_target,
+            "serial": self.serial,
+            "api_port": self.api_port,
+            "pools": self.pools,
+            "status": self.status,
+            "inflight": self.inflight,
+            "queued": self.queued,
+            "latency_ms": round(self.latency_ms, 1),
+            "completed": self.completed,
+            "failed": self.failed,
+            "last_seen": self.last_seen,
+            "circuit": self.breaker.to_dict(),
+            "lane": self.lane.get_stats(),
+            "throttle": self.throttle.to_dict(),
+        }
+
+
+class DeviceRegistry:
+    """All known devices, keyed by id, with load-aware selection"""
+
+    def __init__(self, devices: Optional[List[Pi5Device]] = None):
+        self.devices: Dict[str, Pi5Device] = {}
+        self._circuit_listener: Optional[Callable[[Pi5Device], None]] = None
+        for device in devices or []:
+            self.add(device)
+
+    @classmethod
+    def load(cls, path: str = DEVICES_FILE) -> "DeviceRegistry":
+        """Load devices from the config file, or fall back to the default device"""
+        if not os.path.exists(path):
+            return cls([Pi5Device("pi5", DEFAULT_SSH_TARGET)])
+
+        with open(path) as f:
+            config = json.load(f)
+        devices = [
+            Pi5Device(
+                device_id=entry["id"],
+                ssh_target=entry["ssh_target"],
+                ssh_key=entry.get("ssh_key", DEFAULT_SSH_KEY),
+                api_port=entry.get("api_port", DEFAULT_API_PORT),
+                pools=entry.get("pools"),
+                serial=entry.get("serial"),
+            )
+            for entry in config.get("devices", [])
+        ]
+        logger.info(f"Loaded {len(devices)} Pi5 devices from {path}")
+        return cls(devices)
+
+    def add(self, device: Pi5Device):
+        self.devices[device.device_id] = device
+        self._attach_listener(device)
+
+    def set_circuit_listener(self, listener: Callable[[Pi5Device], None]):
+        """Call listener(device) whenever a device's circuit changes state"""
+        self._circuit_listener = listener
+        for device in self.devices.values():
+            self._attach_listener(device)
+
+    def _attach_listener(self, device: Pi5Device):
+        if self._circuit_listener is not None:
+            listener = self._circuit_listener
+            device.breaker.on_state_change = lambda breaker: listener(device)
+
+    def get(self, device_id: str) -> Optional[Pi5Device]:
+        return self.devices.get(device_id)
+
+    def by_serial(self, serial: str) -> Optional[Pi5Device]:
+        for device in self.devices.values():
+            if device.serial == serial:
+                return device
+        return None
+
+    def has_pool(self, pool: str) -> bool:
+        return any(pool in device.pools for device in self.devices.values())
+
+    def candidates(self, device_id: Optional[str] = None, pool: Optional[str] = None) -> List[Pi5Device]:
+        """Devices a task may run on, healthy or not"""
+        if device_id:
+            device = self.devices.get(device_id)
+            return [device] if device else []
+        return [device for device in self.devices.values() if pool is None or pool in device.pools]
+
+    def select(self, device_id: Optional[str] = None, pool: Optional[str] = None) -> Pi5Device:
+        """Least-loaded healthy device for a task's device or pool"""
+        healthy = [device for device in self.candidates(device_id, pool) if device.healthy]
+        if not healthy:
+            target = device_id or (f"pool {pool}" if pool else "any device")
+            raise NoDeviceAvailable(f"No healthy device available for {target}")
+        # A paused device only gets work when it is the sole candidate; the task waits there
+        healthy = [device for device in healthy if not device.throttle.paused] or healthy
+        return min(healthy, key=lambda device: (device.expected_wait_ms(), device.inflight, device.device_id))
+
+    def get_status(self) -> Dict[str, Dict[str, Any]]:
+        return {device_id: device.to_dict() for device_id, device in self.devices.items()}
@@ -0,0 +1,534 @@
+"""
+P6 Task History Log
+===================
+
+Append-only on-disk log of task lifecycle events, kept after tasks are
+evicted from memory, plus the aggregate queries behind ``GET /analytics``.
+
+The log is split into hourly segments (``events-YYYYMMDDHH.jsonl``, UTC),
+one compact JSON object per line. When an hour is over its segment is
+sealed: a rollup sidecar (``.rollup.json``) stores per-group counts and a
+mergeable latency histogram, and an index sidecar (``.idx.json``) maps
+each task id to its line offsets. Once every hour of a UTC day is sealed,
+the hour rollups are merged into a day rollup. A query over a time window
+uses day rollups for the days it covers completely, hour rollups for the
+rest, and scans raw lines only for the partial hours at either end, so a
+month of history is about thirty small rollups.
+
+Event fields: ``t`` time (epoch seconds), ``e`` event (created, started,
+completed, failed, cancelled), ``id`` task id, ``type`` command type,
+``u`` user, ``d`` device, ``p`` priority, and on finish ``run_ms`` and
+``wait_ms``.
+
+Author: DexiMind Development Team
+Date: 2025-01-15
+Version: 1.0.0
+"""
+
+import calendar
+import json
+import logging
+import math
+import os
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+HISTORY_DIR = os.environ.get(
+    "P6_HISTORY_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "p6_history")
+)
+
+SEGMENT_SECONDS = 3600
+DAY_SECONDS = 86400
+DAY_PREFIX = "day-"
+SEGMENT_PREFIX = "events-"
+SEGMENT_SUFFIX = ".jsonl"
+ROLLUP_SUFFIX = ".rollup.json"
+INDEX_SUFFIX = ".idx.json"
+
+FINISH_EVENTS = ("completed", "failed", "cancelled")
+GROUP_FIELDS = {"type": "type", "user": "u", "device": "d"}
+
+# Columns of GET /tasks/export rows, in CSV order
+EXPORT_FIELDS = (
+    "task_id", "status", "type", "command", "user_id", "device", "priority",
+    "created_at", "started_at", "finished_at", "run_ms", "wait_ms", "error", "source",
+)
+
+# Latency histogram buckets grow by 5%, so percentiles are within ~2.5%
+HISTOGRAM_BASE = 1.05
+
+
+def _bucket(ms: float) -> int:
+    return int(round(math.log(max(ms, 1.0)) / math.log(HISTOGRAM_BASE)))
+
+
+def _bucket_value(bucket: int) -> float:
+    return HISTOGRAM_BASE ** bucket
+
+
+def _epoch(value: Optional[str]) -> Optional[float]:
+    """ISO timestamp string to epoch seconds"""
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value).timestamp()
+    except ValueError:
+        return None
+
+
+def task_event(event: str, task: Dict[str, Any], now: Optional[float] = None) -> Dict[str, Any]:
+    """Compact log row for a task lifecycle event"""
+    now = time.time() if now is None else now
+    row = {
+        "t": round(now, 3),
+        "e": event,
+        "id": task["task_id"],
+        "type": (task.get("parsed_command") or {}).get("type", "unknown"),
+        "u": task.get("user_id"),
+        "d": task.get("device"),
+        "p": task.get("priority"),
+    }
+    if event in FINISH_EVENTS:
+        created = _epoch(task.get("created_at"))
+        started = _epoch(task.get("started_at"))
+        if started is not None:
+            row["run_ms"] = round((now - started) * 1000, 1)
+            if created is not None:
+                row["wait_ms"] = round((started - created) * 1000, 1)
+    return row
+
+
+def _iso(epoch: Optional[float]) -> Optional[str]:
+    return datetime.fromtimestamp(epoch).isoformat() if epoch is not None else None
+
+
+def finished_at(task: Dict[str, Any]) -> Optional[str]:
+    """When an in-memory task reached its final state, if it has"""
+    return task.get("completed_at") or task.get("failed_at") or task.get("cancelled_at")
+
+
+def export_record(task: Dict[str, Any]) -> Dict[str, Any]:
+    """Export row for a task held in memory"""
+    created = _epoch(task.get("created_at"))
+    started = _epoch(task.get("started_at"))
+    finished = _epoch(finished_at(task))
+    return {
+        "task_id": task["task_id"],
+        "status": task["status"],
+        "type": (task.get("parsed_command") or {}).get("type", "unknown"),
+        "command": task.get("command"),
+        "user_id": task.get("user_id"),
+        "device": task.get("device"),
+        "priority": task.get("priority"),
+        "created_at": task.get("created_at"),
+        "started_at": task.get("started_at"),
+        "finished_at": finished_at(task),
+        "run_ms": round((finished - started) * 1000, 1) if finished and started else None,
+        "wait_ms": round((started - created) * 1000, 1) if started and created else None,
+        "error": task.get("error"),
+        "source": "memory",
+    }
+
+
+def archived_record(row: Dict[str, Any]) -> Dict[str, Any]:
+    """Export row rebuilt from a task's logged finish event"""
+    run_ms = row.get("run_ms")
+    wait_ms = row.get("wait_ms")
+    started = row["t"] - run_ms / 1000 if run_ms is not None else None
+    created = started - wait_ms / 1000 if started is not None and wait_ms is not None else None
+    return {
+        "task_id": row["id"],
+        "status": row["e"],
+        "type": row.get("type"),
+        "command": None,
+        "user_id": row.get("u"),
+        "device": row.get("d"),
+        "priority": row.get("p"),
+        "created_at": _iso(created),
+        "started_at": _iso(started),
+        "finished_at": _iso(row["t"]),
+        "run_ms": run_ms,
+        "wait_ms": wait_ms,
+        "error": None,
+        "source": "archive",
+    }
+
+
+class _Aggregate:
+    """Counts and latency histogram for one group"""
+
+    __slots__ = ("count", "statuses", "histogram", "run_ms_total", "timed")
+
+    def __init__(self):
+        self.count = 0
+        self.statuses: Dict[str, int] = {}
+        self.histogram: Dict[int, int] = {}
+        self.run_ms_total = 0.0
+        self.timed = 0
+
+    def add_event(self, row: Dict[str, Any]):
+        self.count += 1
+        self.statuses[row["e"]] = self.statuses.get(row["e"], 0) + 1
+        run_ms = row.get("run_ms")
+        if run_ms is not None:
+            bucket = _bucket(run_ms)
+            self.histogram[bucket] = self.histogram.get(bucket, 0) + 1
+            self.run_ms_total += run_ms
+            self.timed += 1
+
+    def merge(self, data: Dict[str, Any]):
+        """Add a rollup group (histogram keys already converted to int)"""
+        self.count += data["count"]
+        for status, count in data["statuses"].items():
+            self.statuses[status] = self.statuses.get(status, 0) + count
+        for bucket, count in data["histogram"].items():
+            self.histogram[bucket] = self.histogram.get(bucket, 0) + count
+        self.run_ms_total += data["run_ms_total"]
+        self.timed += data["timed"]
+
+    def combine(self, other: "_Aggregate"):
+        self.merge({
+            "count": other.count, "statuses": other.statuses, "histogram": other.histogram,
+            "run_ms_total": other.run_ms_total, "timed": other.timed,
+        })
+
+    def percentile(self, fraction: float) -> Optional[float]:
+        if not self.timed:
+            return None
+        rank = fraction * self.timed
+        seen = 0
+        for bucket in sorted(self.histogram):
+            seen += self.histogram[bucket]
+            if seen >= rank:
+                return round(_bucket_value(bucket), 1)
+        return None
+
+    def to_rollup(self) -> Dict[str, Any]:
+        return {
+            "count": self.count,
+            "statuses": self.statuses,
+            "histogram": dict(self.histogram),
+            "run_ms_total": round(self.run_ms_total, 1),
+            "timed": self.timed,
+        }
+
+    def to_dict(self) -> Dict[str, Any]:
+        failed = self.statuses.get("failed", 0)
+        return {
+            "count": self.count,
+            "completed": self.statuses.get("completed", 0),
+            "failed": failed,
+            "cancelled": self.statuses.get("cancelled", 0),
+            "failure_rate": round(failed / self.count, 4) if self.count else 0.0,
+            "latency_ms": {
+                "avg": round(self.run_ms_total / self.timed, 1) if self.timed else None,
+                "p50": self.percentile(0.5),
+                "p90": self.percentile(0.9),
+                "p99": self.percentile(0.99),
+            },
+        }
+
+
+class TaskHistory:
+    """Segmented append-only task event log with rollup-backed queries"""
+
+    def __init__(self, directory: str = HISTORY_DIR):
+        self.directory = directory
+        self._buffer: List[Dict[str, Any]] = []
+        self._rollups: Dict[int, Dict[str, Any]] = {}
+        self._day_rollups: Dict[int, Dict[str, Any]] = {}
+        self._sealed = set()
+        self.events_written = 0
+        # flush() runs on threadpool workers (periodic job, export, shutdown) and
+        # queries build day rollups; only one thread may append, seal or write at a time
+        self._lock = threading.RLock()
+
+    # Writing
+
+    def record(self, event: str, task: Dict[str, Any]):
+        """Queue an event; it reaches disk on the next flush()"""
+        self._buffer.append(task_event(event, task))
+
+    def flush(self):
+        """Append buffered events to their segments and seal finished hours"""
+        with self._lock:
+            self._flush()
+
+    def _flush(self):
+        rows, self._buffer = self._buffer, []
+        if rows:
+            os.makedirs(self.directory, exist_ok=True)
+            by_segment: Dict[int, List[str]] = {}
+            for row in rows:
+                by_segment.setdefault(int(row["t"] // SEGMENT_SECONDS), []).append(
+                    json.dumps(row, separators=(",", ":"))
+                )
+            for hour, lines in by_segment.items():
+                with open(self._path(hour, SEGMENT_SUFFIX), "a", encoding="utf-8") as f:
+                    f.write("\n".join(lines) + "\n")
+                if os.path.exists(self._path(hour, ROLLUP_SUFFIX)):
+                    # Late events for a sealed hour (e.g. flushed during a reload): reseal
+                    os.remove(self._path(hour, ROLLUP_SUFFIX))
+                    self._rollups.pop(hour, None)
+                    self._sealed.discard(hour)
+                    self._drop_day_rollup(hour * SEGMENT_SECONDS // DAY_SECONDS)
+            self.events_written += len(rows)
+        self.seal_finished()
+
+    def seal_finished(self):
+        """Seal segments whose hour is over and roll up finished days"""
+        with self._lock:
+            self._seal_finished()
+
+    def _seal_finished(self):
+        current = int(time.time() // SEGMENT_SECONDS)
+        days: Dict[int, List[int]] = {}
+        for hour in self._segment_hours():
+            days.setdefault(hour * SEGMENT_SECONDS // DAY_SECONDS, []).append(hour)
+            if hour >= current or hour in self._sealed:
+                continue
+            if not os.path.exists(self._path(hour, ROLLUP_SUFFIX)):
+                self._seal(hour)
+            self._sealed.add(hour)
+
+        # Build day rollups ahead of the first query that needs them
+        today = int(time.time() // DAY_SECONDS)
+        for day, hours in days.items():
+            if day < today:
+                self._day_rollup(day, hours)
+
+    def _seal(self, hour: int):
+        groups: Dict[Tuple[Any, ...], _Aggregate] = {}
+        index: Dict[str, List[int]] = {}
+        for offset, row in self._read_segment(hour):
+            index.setdefault(row["id"], []).append(offset)
+            if row["e"] in FINISH_EVENTS:
+                key = (row.get("type"), row.get("u"), row.get("d"))
+                groups.setdefault(key, _Aggregate()).add_event(row)
+
+        rollup = self._make_rollup(hour * SEGMENT_SECONDS, (hour + 1) * SEGMENT_SECONDS, groups)
+        self._write_json(self._path(hour, INDEX_SUFFIX), index)
+        # Rollup last: its presence marks the segment as sealed
+        self._write_json(self._path(hour, ROLLUP_SUFFIX), rollup)
+        self._rollups[hour] = rollup
+        logger.info(f"Sealed history segment {self._name(hour)}: {len(index)} tasks")
+
+    def _make_rollup(self, start: int, end: int,
+                     groups: Dict[Tuple[Any, ...], _Aggregate]) -> Dict[str, Any]:
+        return {
+            "start": start,
+            "end": end,
+            "groups": [
+                dict(zip(("type", "u", "d"), key), **aggregate.to_rollup())
+                for key, aggregate in groups.items()
+            ],
+        }
+
+    def _day_rollup(self, day: int, hours: List[int]) -> Optional[Dict[str, Any]]:
+        """Rollup of a whole day, built from its hour rollups on first use"""
+        with self._lock:
+            return self._build_day_rollup(day, hours)
+
+    def _build_day_rollup(self, day: int, hours: List[int]) -> Optional[Dict[str, Any]]:
+        if day in self._day_rollups:
+            return self._day_rollups[day]
+        path = self._day_path(day)
+        if os.path.exists(path):
+            self._day_rollups[day] = self._load_rollup(path)
+            return self._day_rollups[day]
+
+        groups: Dict[Tuple[Any, ...], _Aggregate] = {}
+        for hour in hours:
+            rollup = self._rollup(hour)
+            if rollup is None:
+                return None  # An hour is not sealed yet
+            for group in rollup["groups"]:
+                key = (group["type"], group["u"], group["d"])
+                groups.setdefault(key, _Aggregate()).merge(group)
+        rollup = self._make_rollup(day * DAY_SECONDS, (day + 1) * DAY_SECONDS, groups)
+        self._write_json(path, rollup)
+        self._day_rollups[day] = rollup
+        return rollup
+
+    def _drop_day_rollup(self, day: int):
+        self._day_rollups.pop(day, None)
+        if os.path.exists(self._day_path(day)):
+            os.remove(self._day_path(day))
+
+    # Reading
+
+    def events(self, since: float, until: float) -> Iterator[Dict[str, Any]]:
+        """Raw events in [since, until), oldest first"""
+        for hour in self._segment_hours():
+            if (hour + 1) * SEGMENT_SECONDS <= since or hour * SEGMENT_SECONDS >= until:
+                continue
+            for _, row in self._read_segment(hour):
+                if since <= row["t"] < until:
+                    yield row
+
+    def finished_tasks(self, since: float, until: float) -> Iterator[Dict[str, Any]]:
+        """Finish events of tasks that ended in [since, until), oldest first"""
+        for row in self.events(since, until):
+            if row["e"] in FINISH_EVENTS:
+                yield row
+
+    def task_events(self, task_id: str) -> List[Dict[str, Any]]:
+        """All logged events of one task, via the segment indexes"""
+        found: List[Dict[str, Any]] = []
+        current = int(time.time() // SEGMENT_SECONDS)
+        for hour in self._segment_hours():
+            index_path = self._path(hour, INDEX_SUFFIX)
+            if hour < current and os.path.exists(index_path):
+                with open(index_path, encoding="utf-8") as f:
+                    offsets = json.load(f).get(task_id)
+                if offsets:
+                    found.extend(self._read_at(hour, offsets))
+            else:
+                # Open segment: no index yet
+                found.extend(row for _, row in self._read_segment(hour) if row["id"] == task_id)
+        return found
+
+    def query(self, since: float, until: float, group_by: List[str]) -> Dict[str, Any]:
+        """Counts, failure rates and latency percentiles of finished tasks"""
+        started = time.perf_counter()
+        fields = [field for field in group_by if field in GROUP_FIELDS]
+        keys = [GROUP_FIELDS[field] for field in fields]
+        groups: Dict[Tuple[Any, ...], _Aggregate] = {}
+        rollups_used = 0
+        segments_scanned = 0
+
+        def merge_rollup(rollup: Dict[str, Any]):
+            for group in rollup["groups"]:
+                key = tuple(group[name] for name in keys)
+                groups.setdefault(key, _Aggregate()).merge(group)
+
+        days: Dict[int, List[int]] = {}
+        for hour in self._segment_hours():
+            if (hour + 1) * SEGMENT_SECONDS > since and hour * SEGMENT_SECONDS < until:
+                days.setdefault(hour * SEGMENT_SECONDS // DAY_SECONDS, []).append(hour)
+        today = int(time.time() // DAY_SECONDS)
+
+        for day, hours in days.items():
+            if day < today and since <= day * DAY_SECONDS and (day + 1) * DAY_SECONDS <= until:
+                rollup = self._day_rollup(day, hours)
+                if rollup is not None:
+                    rollups_used += 1
+                    merge_rollup(rollup)
+                    continue
+
+            for hour in hours:
+                start, end = hour * SEGMENT_SECONDS, (hour + 1) * SEGMENT_SECONDS
+                rollup = self._rollup(hour) if since <= start and end <= until else None
+                if rollup is not None:
+                    rollups_used += 1
+                    merge_rollup(rollup)
+                    continue
+
+                segments_scanned += 1
+                for _, row in self._read_segment(hour):
+                    if row["e"] in FINISH_EVENTS and since <= row["t"] < until:
+                        key = tuple(row.get(name) for name in keys)
+                        groups.setdefault(key, _Aggregate()).add_event(row)
+
+        total = _Aggregate()
+        for aggregate in groups.values():
+            total.combine(aggregate)
+        rows = [
+            dict(zip(fields, key), **aggregate.to_dict())
+            for key, aggregate in sorted(groups.items(), key=lambda item: -item[1].count)
+        ]
+        return {
+            "since": since,
+            "until": until,
+            "group_by": fields,
+            "total": total.to_dict(),
+            "groups": rows if fields else [],
+            "rollups_used": rollups_used,
+            "segments_scanned": segments_scanned,
+            "query_ms": round((time.perf_counter() - started) * 1000, 2),
+        }
+
+    def get_stats(self) -> Dict[str, Any]:
+        hours = self._segment_hours()
+        return {
+            "directory": self.directory,
+            "segments": len(hours),
+            "oldest": hours[0] * SEGMENT_SECONDS if hours else None,
+            "buffered": len(self._buffer),
+            "events_written": self.events_written,
+        }
+
+    # Files
+
+    def _name(self, hour: int) -> str:
+        return SEGMENT_PREFIX + time.strftime("%Y%m%d%H", time.gmtime(hour * SEGMENT_SECONDS))
+
+    def _path(self, hour: int, suffix: str) -> str:
+        return os.path.join(self.directory, self._name(hour) + suffix)
+
+    def _day_path(self, day: int) -> str:
+        name = DAY_PREFIX + time.strftime("%Y%m%d", time.gmtime(day * DAY_SECONDS))
+        return os.path.join(self.directory, name + ROLLUP_SUFFIX)
+
+    def _segment_hours(self) -> List[int]:
+        if not os.path.isdir(self.directory):
+            return []
+        hours = []
+        for name in os.listdir(self.directory):
+            if name.startswith(SEGMENT_PREFIX) and name.endswith(SEGMENT_SUFFIX):
+                stamp = name[len(SEGMENT_PREFIX):-len(SEGMENT_SUFFIX)]
+                try:
+                    hours.append(calendar.timegm(time.strptime(stamp, "%Y%m%d%H")) // SEGMENT_SECONDS)
+                except ValueError:
+                    continue
+        return sorted(hours)
+
+    def _rollup(self, hour: int) -> Optional[Dict[str, Any]]:
+        """Hour rollup; cached for today and yesterday, older days use day rollups"""
+        if hour in self._rollups:
+            return self._rollups[hour]
+        path = self._path(hour, ROLLUP_SUFFIX)
+        if not os.path.exists(path):
+            return None
+        rollup = self._load_rollup(path)
+        if hour * SEGMENT_SECONDS // DAY_SECONDS >= int(time.time() // DAY_SECONDS) - 1:
+            self._rollups[hour] = rollup
+        return rollup
+
+    def _load_rollup(self, path: str) -> Dict[str, Any]:
+        with open(path, encoding="utf-8") as f:
+            rollup = json.load(f)
+        for group in rollup["groups"]:
+            # JSON object keys are strings
+            group["histogram"] = {int(bucket): count for bucket, count in group["histogram"].items()}
+        return rollup
+
+    def _read_segment(self, hour: int) -> Iterator[Tuple[int, Dict[str, Any]]]:
+        """(offset, event) pairs; a torn last line from a crash is skipped"""
+        with open(self._path(hour, SEGMENT_SUFFIX), "rb") as f:
+            offset = 0
+            for line in f:
+                try:
+                    yield offset, json.loads(line)
+                except ValueError:
+                    pass
+                offset += len(line)
+
+    def _read_at(self, hour: int, offsets: List[int]) -> List[Dict[str, Any]]:
+        rows = []
+        with open(self._path(hour, SEGMENT_SUFFIX), "rb") as f:
+            for offset in offsets:
+                f.seek(offset)
+                rows.append(json.loads(f.readline()))
+        return rows
+
+    def _write_json(self, path: str, data: Any):
+        tmp = path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(data, f, separators=(",", ":"))
+        os.replace(tmp, path)
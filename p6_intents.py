@@ -0,0 +1,180 @@
+"""
+P6 Fuzzy Intent Matching
+========================
+
+Typo-tolerant lookup of command words for the P6 command parser. The intent
+keywords and common UI target names are indexed once by their deletion
+variants (the "symmetric delete" scheme), so correcting a word takes a few
+dict lookups plus an edit-distance check of the handful of candidates they
+return, instead of comparing against the whole vocabulary.
+
+``IntentMatcher.correct`` rewrites a command that the keyword parser did not
+recognize ("clik the submti button", "scrol down") into its nearest
+vocabulary words, with a confidence derived from how far each corrected word
+was from the original. Quoted text and the text after a ``type`` verb are
+left alone, since they are meant to be typed verbatim.
+
+Author: DexiMind Development Team
+Date: 2025-01-15
+Version: 1.0.0
+"""
+
+import re
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+# Keywords of each intent, in the order the parser checks them
+INTENT_KEYWORDS: Dict[str, Tuple[str, ...]] = {
+    "click": ("click", "press", "tap"),
+    "type": ("type", "enter", "write", "input"),
+    "navigate": ("navigate", "go", "open", "visit"),
+    "scroll": ("scroll", "move"),
+    "search": ("search", "find", "look"),
+}
+
+DIRECTIONS = ("up", "down", "left", "right")
+
+# Element names and labels commands commonly refer to
+UI_TARGETS = (
+    "button", "field", "menu", "link", "tab", "icon", "checkbox", "dropdown",
+    "submit", "login", "logout", "sign", "save", "cancel", "close", "next",
+    "back", "continue", "confirm", "delete", "settings", "search", "home",
+    "username", "password", "email", "page", "window", "dialog", "ok",
+)
+
+_TOKEN = re.compile(r'"[^"]*"|\S+')
+
+
+def edit_distance(a: str, b: str, limit: int) -> int:
+    """Optimal string alignment distance (adjacent swaps cost 1), capped at limit + 1"""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    previous2: List[int] = []
+    previous = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [i] + [0] * len(b)
+        row_min = i
+        for j in range(1, len(b) + 1):
+            cost = 0 if a[i - 1] == b[j - 1] else 1
+            value = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                value = min(value, previous2[j - 2] + 1)
+            current[j] = value
+            row_min = min(row_min, value)
+        if row_min > limit:
+            return limit + 1
+        previous2, previous = previous, current
+    return previous[-1]
+
+
+def deletions(word: str, max_edits: int) -> Set[str]:
+    """The word and every string left after deleting up to max_edits characters"""
+    variants = {word}
+    frontier = {word}
+    for _ in range(max_edits):
+        frontier = {w[:i] + w[i + 1:] for w in frontier for i in range(len(w))}
+        variants |= frontier
+    return variants
+
+
+class DeletionIndex:
+    """Symmetric-delete index: two words within n edits share a string
+    reachable from each by at most n deletions, so candidates come from a
+    few dict lookups and only those are checked with the full distance.
+    """
+
+    def __init__(self, words: Iterable[str], max_edits: int = 2):
+        self.max_edits = max_edits
+        self._index: Dict[str, Set[str]] = {}
+        for word in words:
+            for variant in deletions(word, max_edits):
+                self._index.setdefault(variant, set()).add(word)
+
+    def search(self, word: str, max_distance: int) -> List[Tuple[int, str]]:
+        """Words within max_distance, nearest first"""
+        max_distance = min(max_distance, self.max_edits)
+        candidates: Set[str] = set()
+        for variant in deletions(word, max_distance):
+            candidates.update(self._index.get(variant, ()))
+        found = []
+        for candidate in candidates:
+            distance = edit_distance(word, candidate, max_distance)
+            if distance <= max_distance:
+                found.append((distance, candidate))
+        found.sort()
+        return found
+
+
+def max_typos(word: str) -> int:
+    """Edits tolerated for a word of this length"""
+    if len(word) <= 3:
+        return 0
+    if len(word) <= 6:
+        return 1
+    return 2
+
+
+class IntentMatcher:
+    """Corrects misspelled intent keywords and UI target names"""
+
+    def __init__(self):
+        self.intent_of = {word: intent for intent, words in INTENT_KEYWORDS.items() for word in words}
+        self.vocabulary = set(self.intent_of) | set(DIRECTIONS) | set(UI_TARGETS)
+        self._intents = DeletionIndex(self.intent_of)
+        self._words = DeletionIndex(self.vocabulary)
+        self._cache: Dict[Tuple[str, bool], Optional[Tuple[str, int]]] = {}
+
+    def _nearest(self, word: str, intents_only: bool) -> Optional[Tuple[str, int]]:
+        key = (word, intents_only)
+        if key in self._cache:
+            return self._cache[key]
+        match = None
+        limit = max_typos(word)
+        if limit:
+            index = self._intents if intents_only else self._words
+            found = index.search(word, limit)
+            # A tie between different words is ambiguous: leave the word alone
+            if found and (len(found) == 1 or found[0][0] < found[1][0]):
+                match = (found[0][1], found[0][0])
+        if len(self._cache) < 4096:
+            self._cache[key] = match
+        return match
+
+    def correct(self, command: str) -> Optional[Dict[str, Any]]:
+        """The command with its intent keyword (and target words) corrected.
+
+        Returns None when no word is close enough to an intent keyword.
+        """
+        tokens = _TOKEN.findall(command)
+        corrections: List[Dict[str, Any]] = []
+        intent = None
+        confidence = 1.0
+        out = []
+
+        for token in tokens:
+            word = token.lower().strip(".,!?:;")
+            if token.startswith('"') or not word.isalpha() or intent == "type":
+                out.append(token)
+                continue
+            if word in self.vocabulary:
+                intent = intent or self.intent_of.get(word)
+                out.append(token)
+                continue
+            match = self._nearest(word, intents_only=intent is None)
+            if match is None:
+                out.append(token)
+                continue
+            replacement, distance = match
+            if intent is None:
+                intent = self.intent_of[replacement]
+            corrections.append({"from": word, "to": replacement, "distance": distance})
+            confidence = min(confidence, 1 - distance / max(len(word), len(replacement)))
+            out.append(replacement)
+
+        if intent is None or not corrections:
+            return None
+        return {
+            "command": " ".join(out),
+            "intent": intent,
+            "corrections": corrections,
+            "confidence": round(confidence, 3),
+        }
@@ -0,0 +1,111 @@
+"""
+P6 Device Execution Lanes
+=========================
+
+A Pi5 HID gadget can only perform one action at a time, so every device
+gets an execution lane: tasks routed to it run one after another, highest
+priority first and first-come first-served within a priority. Lanes of
+different devices are independent and run in parallel.
+
+The lane also tells the task that will run next when it is "on deck", so
+it can open its SSH session while the current task is still running and
+start the moment the lane frees up.
+
+Author: DexiMind Development Team
+Date: 2025-01-15
+Version: 1.0.0
+"""
+
+import asyncio
+import heapq
+import itertools
+from typing import Any, Dict, List, Optional
+
+WAITING = "waiting"
+RUNNING = "running"
+DONE = "done"
+
+
+class LaneTicket:
+    """A task's place in a lane"""
+
+    __slots__ = ("priority", "seq", "state", "on_deck", "turn")
+
+    def __init__(self, priority: int, seq: int):
+        self.priority = priority
+        self.seq = seq
+        self.state = WAITING
+        self.on_deck = asyncio.Event()
+        self.turn = asyncio.Event()
+
+    def __lt__(self, other: "LaneTicket") -> bool:
+        # Higher priority first, then arrival order
+        return (-self.priority, self.seq) < (-other.priority, other.seq)
+
+
+class ExecutionLane:
+    """Serialized, priority-ordered execution for one device"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self._waiting: List[LaneTicket] = []
+        self._current: Optional[LaneTicket] = None
+        self._seq = itertools.count()
+        self.queued = 0
+        self.dispatched = 0
+        self.pipelined = 0
+
+    @property
+    def busy(self) -> bool:
+        return self._current is not None
+
+    def enqueue(self, priority: int) -> LaneTicket:
+        """Join the lane; wait on ticket.on_deck and ticket.turn"""
+        ticket = LaneTicket(priority, next(self._seq))
+        heapq.heappush(self._waiting, ticket)
+        self.queued += 1
+        self._advance()
+        return ticket
+
+    def release(self, ticket: LaneTicket):
+        """Leave the lane, whether the task ran, failed or was cancelled"""
+        if ticket.state == DONE:
+            return
+        if ticket.state == WAITING:
+            # Removed lazily from the heap
+            self.queued -= 1
+        ticket.state = DONE
+        if self._current is ticket:
+            self._current = None
+        self._advance()
+
+    def mark_pipelined(self):
+        """Count a task that was prepared while the previous one ran"""
+        self.pipelined += 1
+
+    def _advance(self):
+        while self._waiting and self._waiting[0].state == DONE:
+            heapq.heappop(self._waiting)
+
+        if self._current is None and self._waiting:
+            ticket = heapq.heappop(self._waiting)
+            self.queued -= 1
+            ticket.state = RUNNING
+            self._current = ticket
+            self.dispatched += 1
+            ticket.on_deck.set()
+            ticket.turn.set()
+            while self._waiting and self._waiting[0].state == DONE:
+                heapq.heappop(self._waiting)
+
+        if self._waiting:
+            # The next task in line may prepare while the current one runs
+            self._waiting[0].on_deck.set()
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "busy": self.busy,
+            "queued": self.queued,
+            "dispatched": self.dispatched,
+            "pipelined": self.pipelined,
+        }
@@ -0,0 +1,170 @@
+"""
+P6 Sliding-Window Task Metrics
+==============================
+
+Task throughput, success/failure rates and latency percentiles over the
+last minute, five minutes and hour, kept up to date as tasks change state
+instead of being recomputed from the task list.
+
+Each window is a ring of fixed-width buckets (60 per window) plus running
+totals: recording an event adds to the current bucket and the totals, and
+a bucket that falls out of the window is subtracted from the totals before
+it is reused. Latencies go into a fixed set of log-spaced histogram bins,
+so reading a window's percentiles costs the same however many tasks ran.
+
+Author: DexiMind Development Team
+Date: 2025-01-15
+Version: 1.0.0
+"""
+
+import bisect
+import time
+from typing import Any, Dict, List, Optional
+
+OUTCOMES = ("started", "completed", "failed", "cancelled")
+
+# (name, span in seconds, bucket width in seconds)
+WINDOWS = (("1m", 60, 1), ("5m", 300, 5), ("1h", 3600, 60))
+
+# Latency bin upper bounds: 10ms growing 25% per bin, up to about 70s
+LATENCY_BOUNDS_MS = [10.0 * 1.25 ** i for i in range(40)]
+
+PERCENTILES = (("p50", 0.5), ("p80", 0.8), ("p90", 0.9), ("p99", 0.99))
+
+
+class _Counts:
+    """Outcome counts and latency histograms, overall and per command type"""
+
+    __slots__ = ("outcomes", "latency", "types")
+
+    def __init__(self):
+        self.outcomes = dict.fromkeys(OUTCOMES, 0)
+        self.latency = [0] * (len(LATENCY_BOUNDS_MS) + 1)
+        # command type -> [finished, failed, latency histogram]
+        self.types: Dict[str, List[Any]] = {}
+
+    def add(self, outcome: str, command_type: str, latency_bin: Optional[int], sign: int = 1):
+        self.outcomes[outcome] += sign
+        if outcome not in ("completed", "failed"):
+            return
+        stats = self.types.get(command_type)
+        if stats is None:
+            stats = self.types[command_type] = [0, 0, [0] * len(self.latency)]
+        stats[0] += sign
+        if outcome == "failed":
+            stats[1] += sign
+        if latency_bin is not None:
+            self.latency[latency_bin] += sign
+            stats[2][latency_bin] += sign
+
+    def subtract(self, other: "_Counts"):
+        for outcome, count in other.outcomes.items():
+            self.outcomes[outcome] -= count
+        for i, count in enumerate(other.latency):
+            self.latency[i] -= count
+        for command_type, (finished, failed, histogram) in other.types.items():
+            stats = self.types[command_type]
+            stats[0] -= finished
+            stats[1] -= failed
+            for i, count in enumerate(histogram):
+                stats[2][i] -= count
+            if stats[0] == 0:
+                del self.types[command_type]
+
+
+def _percentiles(histogram: List[int]) -> Dict[str, Optional[float]]:
+    total = sum(histogram)
+    result: Dict[str, Optional[float]] = {}
+    for name, fraction in PERCENTILES:
+        if not total:
+            result[name] = None
+            continue
+        rank, seen = fraction * total, 0
+        for i, count in enumerate(histogram):
+            seen += count
+            if seen >= rank:
+                bound = LATENCY_BOUNDS_MS[i] if i < len(LATENCY_BOUNDS_MS) else LATENCY_BOUNDS_MS[-1]
+                result[name] = round(bound, 1)
+                break
+    return result
+
+
+class SlidingWindow:
+    """Ring of time buckets with running totals over the whole window"""
+
+    def __init__(self, span: int, width: int):
+        self.span = span
+        self.width = width
+        self.size = span // width
+        self.buckets = [_Counts() for _ in range(self.size)]
+        self.slots = [-1] * self.size
+        self.totals = _Counts()
+        self.last_slot = int(time.time() // width)
+
+    def advance(self, now: float) -> int:
+        """Expire buckets that have left the window; returns the current slot"""
+        slot = int(now // self.width)
+        if slot > self.last_slot:
+            for expired in range(max(self.last_slot + 1, slot - self.size + 1), slot + 1):
+                index = expired % self.size
+                if self.slots[index] != -1:
+                    self.totals.subtract(self.buckets[index])
+                    self.buckets[index] = _Counts()
+                self.slots[index] = expired
+            self.last_slot = slot
+        return slot
+
+    def add(self, now: float, outcome: str, command_type: str, latency_bin: Optional[int]):
+        slot = self.advance(now)
+        index = slot % self.size
+        self.slots[index] = slot
+        self.buckets[index].add(outcome, command_type, latency_bin)
+        self.totals.add(outcome, command_type, latency_bin)
+
+    def snapshot(self) -> Dict[str, Any]:
+        outcomes = self.totals.outcomes
+        finished = outcomes["completed"] + outcomes["failed"]
+        return {
+            "tasks_per_minute": round(finished * 60 / self.span, 2),
+            **outcomes,
+            "success_rate": round(outcomes["completed"] / finished, 4) if finished else None,
+            "failure_rate": round(outcomes["failed"] / finished, 4) if finished else None,
+            "latency_ms": _percentiles(self.totals.latency),
+            "by_type": {
+                command_type: {
+                    "finished": count,
+                    "failed": failed,
+                    "failure_rate": round(failed / count, 4),
+                    "latency_ms": _percentiles(histogram),
+                }
+                for command_type, (count, failed, histogram) in self.totals.types.items()
+            },
+        }
+
+
+class TaskMetrics:
+    """Sliding-window task counters for the 1 minute, 5 minute and 1 hour windows"""
+
+    def __init__(self):
+        self.windows = {name: SlidingWindow(span, width) for name, span, width in WINDOWS}
+        self._snapshot: Optional[Dict[str, Any]] = None
+        self._snapshot_second = -1
+
+    def record(self, outcome: str, command_type: str, latency_ms: Optional[float] = None):
+        """Count one task transition; latency applies to completed/failed"""
+        now = time.time()
+        latency_bin = bisect.bisect_left(LATENCY_BOUNDS_MS, latency_ms) if latency_ms is not None else None
+        for window in self.windows.values():
+            window.add(now, outcome, command_type, latency_bin)
+        self._snapshot = None
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """All windows; cached until the next event or the next second"""
+        now = time.time()
+        second = int(now)
+        if self._snapshot is None or second != self._snapshot_second:
+            for window in self.windows.values():
+                window.advance(now)
+            self._snapshot = {name: window.snapshot() for name, window in self.windows.items()}
+            self._snapshot_second = second
+        return self._snapshot
@@ -0,0 +1,173 @@
+"""
+P6 Background Job Scheduler
+===========================
+
+Small periodic job runner for the P6 UI server. Jobs are registered with
+their own interval and timeout, started from the FastAPI lifespan and
+stopped cleanly on shutdown. A job whose previous run is still going when
+its next tick comes round is skipped (and counted as an overrun) rather
+than stacked up.
+
+Author: DexiMind Development Team
+Date: 2025-01-15
+Version: 1.0.0
+"""
+
+import asyncio
+import logging
+import random
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class PeriodicJob:
+    """A registered job and its run-time statistics"""
+
+    def __init__(self, name: str, func: Callable[[], Awaitable[Any]], interval: float,
+                 timeout: Optional[float] = None, jitter: float = 0.1,
+                 initial_delay: Optional[float] = None):
+        self.name = name
+        self.func = func
+        self.interval = interval
+        self.timeout = timeout if timeout is not None else interval
+        self.jitter = jitter
+        self.initial_delay = interval if initial_delay is None else initial_delay
+
+        self.current: Optional[asyncio.Task] = None
+        self.runs = 0
+        self.failures = 0
+        self.timeouts = 0
+        self.overruns = 0
+        self.total_duration = 0.0
+        self.max_duration = 0.0
+        self.last_duration: Optional[float] = None
+        self.last_started: Optional[float] = None
+        self.last_error: Optional[str] = None
+
+    @property
+    def running(self) -> bool:
+        return self.current is not None and not self.current.done()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Run-time statistics for this job"""
+        return {
+            "interval": self.interval,
+            "timeout": self.timeout,
+            "running": self.running,
+            "runs": self.runs,
+            "failures": self.failures,
+            "timeouts": self.timeouts,
+            "overruns": self.overruns,
+            "avg_duration_ms": round(self.total_duration / self.runs * 1000, 2) if self.runs else None,
+            "max_duration_ms": round(self.max_duration * 1000, 2),
+            "last_duration_ms": round(self.last_duration * 1000, 2) if self.last_duration is not None else None,
+            "last_started": self.last_started,
+            "last_error": self.last_error,
+        }
+
+
+class JobScheduler:
+    """Runs registered periodic jobs on the current event loop"""
+
+    def __init__(self):
+        self.jobs: Dict[str, PeriodicJob] = {}
+        self._loops: List[asyncio.Task] = []
+        self._stopping: Optional[asyncio.Event] = None
+
+    def register(self, name: str, func: Callable[[], Awaitable[Any]], interval: float,
+                 timeout: Optional[float] = None, jitter: float = 0.1,
+                 initial_delay: Optional[float] = None) -> PeriodicJob:
+        """Register a job; jitter is a fraction of the interval"""
+        if name in self.jobs:
+            raise ValueError(f"Job already registered: {name}")
+        job = PeriodicJob(name, func, interval, timeout, jitter, initial_delay)
+        self.jobs[name] = job
+        if self._stopping is not None and not self._stopping.is_set():
+            self._loops.append(asyncio.create_task(self._job_loop(job)))
+        return job
+
+    @property
+    def started(self) -> bool:
+        return self._stopping is not None and not self._stopping.is_set()
+
+    async def start(self):
+        """Start a loop for every registered job"""
+        if self.started:
+            return
+        self._stopping = asyncio.Event()
+        self._loops = [asyncio.create_task(self._job_loop(job)) for job in self.jobs.values()]
+        logger.info(f"Background scheduler started with {len(self.jobs)} jobs")
+
+    async def stop(self, timeout: float = 5.0):
+        """Stop scheduling and cancel runs still in flight after timeout"""
+        if self._stopping is None:
+            return
+        self._stopping.set()
+
+        running = [job.current for job in self.jobs.values() if job.running]
+        if running:
+            _, pending = await asyncio.wait(running, timeout=timeout)
+            for task in pending:
+                task.cancel()
+        for task in self._loops:
+            task.cancel()
+        await asyncio.gather(*self._loops, *running, return_exceptions=True)
+        self._loops = []
+        logger.info("Background scheduler stopped")
+
+    def get_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Statistics for every registered job"""
+        return {name: job.get_stats() for name, job in self.jobs.items()}
+
+    async def _job_loop(self, job: PeriodicJob):
+        """Tick a job at its interval, skipping ticks while it is still running"""
+        loop = asyncio.get_running_loop()
+        next_run = loop.time() + job.initial_delay
+        jitter = 0.0
+
+        while not self._stopping.is_set():
+            delay = next_run - loop.time() + jitter
+            jitter = random.uniform(0, job.interval * job.jitter)
+            try:
+                await asyncio.wait_for(self._stopping.wait(), timeout=max(0.0, delay))
+                break
+            except asyncio.TimeoutError:
+                pass
+
+            if job.running:
+                job.overruns += 1
+                logger.warning(f"Job {job.name} still running, skipping this run")
+            else:
+                job.current = asyncio.create_task(self._run_once(job))
+
+            next_run += job.interval
+            now = loop.time()
+            if next_run < now:
+                # Missed ticks are not replayed
+                next_run = now + job.interval
+
+    async def _run_once(self, job: PeriodicJob):
+        """Run a job once under its timeout and record the outcome"""
+        job.last_started = time.time()
+        started = time.perf_counter()
+        try:
+            await asyncio.wait_for(job.func(), timeout=job.timeout)
+            job.last_error = None
+        except asyncio.TimeoutError:
+            job.timeouts += 1
+            job.last_error = f"timed out after {job.timeout}s"
+            logger.error(f"Job {job.name} timed out after {job.timeout}s")
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            job.failures += 1
+            job.last_error = str(e)
+            logger.error(f"Job {job.name} failed: {e}")
+        finally:
+            duration = time.perf_counter() - started
+            job.runs += 1
+            job.total_duration += duration
+            job.max_duration = max(job.max_duration, duration)
+            job.last_duration = duration
@@ -0,0 +1,574 @@
+"""
+P6 Scheduled and Recurring Tasks
+================================
+
+Commands the server submits by itself on a schedule, instead of an
+external cron job calling ``POST /tasks``:
+
+- ``at``: once, at a given time
+- ``interval``: every N seconds, anchored to the start time so runs do not
+  drift however late each one fires
+- ``cron``: a five-field cron expression (minute hour day month weekday,
+  local time), with ``*``, lists, ranges, steps, month/day names and the
+  ``@hourly``/``@daily``/``@weekly``/``@monthly``/``@yearly`` aliases
+
+All schedules share one min-heap of due times and a single timer task that
+sleeps until the earliest one, so an idle book costs nothing and firing or
+rescheduling is O(log n) for tens of thousands of schedules. Paused,
+deleted or rescheduled entries are left in the heap and dropped when they
+surface (the heap is rebuilt once stale entries dominate it).
+
+Misfire policy, for runs that were due while the server was down or busy
+(later than the grace period):
+
+- ``skip``: drop them and wait for the next occurrence
+- ``run_once``: run once now for all of them (default)
+- ``run_all``: run each missed occurrence, up to a catch-up cap
+
+Overlap policy, when the schedule's previous task is still pending or
+running: ``skip`` this run (default), ``allow`` it to queue behind, or
+``replace`` it by cancelling the previous task first.
+
+Schedules are saved to a JSON file (``P6_SCHEDULES_FILE``, default
+``p6_schedules.json`` next to this file) with their next due time, so
+after a restart they resume where they left off and the misfire policy
+decides what happens to the runs that were missed.
+
+Author: DexiMind Development Team
+Date: 2025-01-15
+Version: 1.0.0
+"""
+
+import asyncio
+import bisect
+import heapq
+import json
+import logging
+import math
+import os
+import time
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple, Union
+
+logger = logging.getLogger(__name__)
+
+SCHEDULES_FILE = os.environ.get(
+    "P6_SCHEDULES_FILE",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "p6_schedules.json")
+)
+
+SCHEDULE_KINDS = ("at", "interval", "cron")
+MISFIRE_POLICIES = ("skip", "run_once", "run_all")
+OVERLAP_POLICIES = ("skip", "allow", "replace")
+
+MIN_INTERVAL = 1.0  # seconds
+DEFAULT_MISFIRE_GRACE = 60.0
+MAX_CATCHUP_RUNS = 10  # run_all submits at most this many missed runs at once
+MISSED_COUNT_LIMIT = 10000  # missed occurrences counted per misfire
+MAX_TIMER_SLEEP = 60.0  # re-read the wall clock at least this often
+CRON_SEARCH_YEARS = 5
+
+CRON_ALIASES = {
+    "@hourly": "0 * * * *",
+    "@daily": "0 0 * * *",
+    "@midnight": "0 0 * * *",
+    "@weekly": "0 0 * * 0",
+    "@monthly": "0 0 1 * *",
+    "@yearly": "0 0 1 1 *",
+    "@annually": "0 0 1 1 *",
+}
+MONTH_NAMES = {name: i + 1 for i, name in enumerate(
+    ("jan", "feb", "mar", "apr", "may", "jun", "jul", "aug", "sep", "oct", "nov", "dec"))}
+WEEKDAY_NAMES = {name: i for i, name in enumerate(("sun", "mon", "tue", "wed", "thu", "fri", "sat"))}
+
+
+class ScheduleError(ValueError):
+    """The submitted schedule is invalid or can never fire"""
+
+
+def parse_time(value: Union[float, str], name: str) -> float:
+    """Epoch seconds or an ISO timestamp (local time when naive)"""
+    if isinstance(value, (int, float)):
+        return float(value)
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    try:
+        return datetime.fromisoformat(value).timestamp()
+    except ValueError:
+        raise ScheduleError(f"Invalid {name}: {value}")
+
+
+def _iso(timestamp: Optional[float]) -> Optional[str]:
+    return datetime.fromtimestamp(timestamp).isoformat() if timestamp is not None else None
+
+
+def _parse_cron_field(text: str, low: int, high: int, names: Dict[str, int]) -> List[int]:
+    values = set()
+    for part in text.lower().split(","):
+        step = 1
+        if "/" in part:
+            part, step_text = part.split("/", 1)
+            if not step_text.isdigit() or int(step_text) == 0:
+                raise ScheduleError(f"Invalid cron step: {step_text}")
+            step = int(step_text)
+        if part == "*":
+            start, end = low, high
+        else:
+            bounds = [names.get(bound, bound) for bound in part.split("-", 1)]
+            try:
+                bounds = [int(bound) for bound in bounds]
+            except ValueError:
+                raise ScheduleError(f"Invalid cron value: {part}")
+            start = bounds[0]
+            # "5/15" means from 5 to the end of the range
+            end = bounds[-1] if len(bounds) == 2 else (high if step > 1 else start)
+        if not low <= start <= end <= high:
+            raise ScheduleError(f"Cron value out of range {low}-{high}: {part}")
+        values.update(range(start, end + 1, step))
+    return sorted(values)
+
+
+class CronExpression:
+    """Five-field cron expression evaluated in local time"""
+
+    def __init__(self, expression: str):
+        self.expression = expression
+        fields = CRON_ALIASES.get(expression.strip().lower(), expression).split()
+        if len(fields) != 5:
+            raise ScheduleError(f"Cron expression needs 5 fields, got {len(fields)}: {expression}")
+        self.minutes = _parse_cron_field(fields[0], 0, 59, {})
+        self.hours = _parse_cron_field(fields[1], 0, 23, {})
+        self.days = set(_parse_cron_field(fields[2], 1, 31, {}))
+        self.months = set(_parse_cron_field(fields[3], 1, 12, MONTH_NAMES))
+        # 7 is Sunday as well as 0
+        self.weekdays = {day % 7 for day in _parse_cron_field(fields[4], 0, 7, WEEKDAY_NAMES)}
+        self._hour_set = set(self.hours)
+        # Like cron, a restricted day and weekday match when either one does
+        self._any_day = fields[2].startswith("*")
+        self._any_weekday = fields[4].startswith("*")
+
+    def _day_matches(self, moment: datetime) -> bool:
+        weekday = (moment.weekday() + 1) % 7
+        if self._any_day:
+            return self._any_weekday or weekday in self.weekdays
+        if self._any_weekday:
+            return moment.day in self.days
+        return moment.day in self.days or weekday in self.weekdays
+
+    def next_after(self, timestamp: float) -> Optional[float]:
+        """First matching minute strictly after the timestamp"""
+        moment = datetime.fromtimestamp(timestamp).replace(second=0, microsecond=0) + timedelta(minutes=1)
+        last_year = moment.year + CRON_SEARCH_YEARS
+        while moment.year <= last_year:
+            if moment.month not in self.months:
+                moment = (moment.replace(day=1, hour=0, minute=0) + timedelta(days=32)).replace(day=1)
+                continue
+            if not self._day_matches(moment):
+                moment = (moment + timedelta(days=1)).replace(hour=0, minute=0)
+                continue
+            if moment.hour not in self._hour_set:
+                i = bisect.bisect_left(self.hours, moment.hour)
+                if i == len(self.hours):
+                    moment = (moment + timedelta(days=1)).replace(hour=0, minute=0)
+                else:
+                    moment = moment.replace(hour=self.hours[i], minute=0)
+                continue
+            i = bisect.bisect_left(self.minutes, moment.minute)
+            if i == len(self.minutes):
+                moment = moment.replace(minute=0) + timedelta(hours=1)
+                continue
+            return moment.replace(minute=self.minutes[i]).timestamp()
+        return None
+
+
+_cron_cache: Dict[str, CronExpression] = {}
+
+
+def cron_expression(expression: Optional[str]) -> CronExpression:
+    """Parsed expression, shared between schedules that use the same one"""
+    if expression is None:
+        raise ScheduleError("A cron schedule needs an expression")
+    parsed = _cron_cache.get(expression)
+    if parsed is None:
+        parsed = CronExpression(expression)
+        if len(_cron_cache) < 4096:
+            _cron_cache[expression] = parsed
+    return parsed
+
+
+class Schedule:
+    """A command submitted at set times, with its run counters"""
+
+    # Fields saved to the schedules file
+    RECORD_FIELDS = (
+        "schedule_id", "name", "command", "user_id", "priority", "device", "pool", "timeout",
+        "kind", "at", "interval", "cron", "start_at", "end_at", "max_runs",
+        "misfire", "misfire_grace", "overlap", "enabled", "created_at",
+        "next_run", "last_run", "last_task_id", "last_error", "runs", "missed", "skipped", "failures",
+    )
+
+    def __init__(self, schedule_id: str, command: str, kind: str, user_id: str = "web_user",
+                 priority: int = 5, device: Optional[str] = None, pool: Optional[str] = None,
+                 timeout: Optional[float] = None, name: Optional[str] = None,
+                 at: Optional[float] = None, interval: Optional[float] = None,
+                 cron: Optional[str] = None, start_at: Optional[float] = None,
+                 end_at: Optional[float] = None, max_runs: Optional[int] = None,
+                 misfire: str = "run_once", misfire_grace: float = DEFAULT_MISFIRE_GRACE,
+                 overlap: str = "skip", enabled: bool = True, created_at: Optional[float] = None):
+        if kind not in SCHEDULE_KINDS:
+            raise ScheduleError(f"Unknown schedule kind: {kind}")
+        if misfire not in MISFIRE_POLICIES:
+            raise ScheduleError(f"Unknown misfire policy: {misfire}")
+        if overlap not in OVERLAP_POLICIES:
+            raise ScheduleError(f"Unknown overlap policy: {overlap}")
+        if kind == "at" and at is None:
+            raise ScheduleError("An 'at' schedule needs a time")
+        if kind == "interval" and (interval is None or interval < MIN_INTERVAL):
+            raise ScheduleError(f"An interval schedule needs an interval of at least {MIN_INTERVAL}s")
+        if end_at is not None and start_at is not None and end_at <= start_at:
+            raise ScheduleError("end_at must be after start_at")
+
+        self.schedule_id = schedule_id
+        self.name = name
+        self.command = command
+        self.user_id = user_id
+        self.priority = priority
+        self.device = device
+        self.pool = pool
+        self.timeout = timeout
+        self.kind = kind
+        self.at = at
+        self.interval = interval
+        self.cron = cron
+        self._cron = cron_expression(cron) if kind == "cron" else None
+        self.start_at = start_at
+        self.end_at = end_at
+        self.max_runs = max_runs
+        self.misfire = misfire
+        self.misfire_grace = misfire_grace
+        self.overlap = overlap
+        self.enabled = enabled
+        self.created_at = created_at if created_at is not None else time.time()
+
+        self.next_run: Optional[float] = None
+        self.last_run: Optional[float] = None
+        self.last_task_id: Optional[str] = None
+        self.last_error: Optional[str] = None
+        self.runs = 0
+        self.missed = 0
+        self.skipped = 0
+        self.failures = 0
+        # Bumped whenever the schedule's heap entry is superseded
+        self.generation = 0
+
+    @property
+    def state(self) -> str:
+        if not self.enabled:
+            return "paused"
+        return "finished" if self.next_run is None else "active"
+
+    def next_after(self, timestamp: float) -> Optional[float]:
+        """The first occurrence strictly after the timestamp, or None if there are no more"""
+        if self.max_runs is not None and self.runs >= self.max_runs:
+            return None
+        if self.kind == "at":
+            candidate = self.at if self.at > timestamp else None
+        elif self.kind == "interval":
+            anchor = self.start_at if self.start_at is not None else self.created_at
+            if timestamp < anchor:
+                candidate = anchor
+            else:
+                candidate = anchor + (math.floor((timestamp - anchor) / self.interval) + 1) * self.interval
+        else:
+            if self.start_at is not None:
+                timestamp = max(timestamp, self.start_at - 1)
+            candidate = self._cron.next_after(timestamp)
+        if candidate is not None and self.end_at is not None and candidate > self.end_at:
+            return None
+        return candidate
+
+    def count_between(self, start: float, end: float, limit: int = MISSED_COUNT_LIMIT) -> int:
+        """Occurrences in (start, end], counted up to the limit"""
+        if self.kind == "interval" and self.end_at is None:
+            first = self.next_after(start)
+            if first is None or first > end:
+                return 0
+            return min(limit, int((end - first) // self.interval) + 1)
+        count = 0
+        occurrence = self.next_after(start)
+        while occurrence is not None and occurrence <= end and count < limit:
+            count += 1
+            occurrence = self.next_after(occurrence)
+        return count
+
+    def to_record(self) -> Dict[str, Any]:
+        """Saved fields; unset ones are left out to keep the file small"""
+        record = {}
+        for field in self.RECORD_FIELDS:
+            value = getattr(self, field)
+            if value is not None:
+                record[field] = value
+        return record
+
+    @classmethod
+    def from_record(cls, record: Dict[str, Any]) -> "Schedule":
+        schedule = cls(
+            record["schedule_id"], record["command"], record["kind"],
+            **{field: record[field] for field in (
+                "user_id", "priority", "device", "pool", "timeout", "name", "at", "interval",
+                "cron", "start_at", "end_at", "max_runs", "misfire", "misfire_grace",
+                "overlap", "enabled", "created_at",
+            ) if field in record}
+        )
+        for field in ("next_run", "last_run", "last_task_id", "last_error",
+                      "runs", "missed", "skipped", "failures"):
+            if field in record:
+                setattr(schedule, field, record[field])
+        return schedule
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = {field: getattr(self, field) for field in self.RECORD_FIELDS}
+        for field in ("at", "start_at", "end_at", "created_at", "next_run", "last_run"):
+            data[field] = _iso(data[field])
+        data["state"] = self.state
+        return data
+
+
+class ScheduleBook:
+    """All schedules, their due-time heap and the timer task that fires them"""
+
+    def __init__(self, submit: Callable[[Schedule, float], Awaitable[Optional[str]]],
+                 is_active: Callable[[str], bool], cancel: Callable[[str], Awaitable[None]],
+                 path: str = SCHEDULES_FILE):
+        self._submit = submit
+        self._is_active = is_active
+        self._cancel = cancel
+        self.path = path
+        self.schedules: Dict[str, Schedule] = {}
+        self._heap: List[Tuple[float, int, str, int]] = []
+        self._sequence = 0
+        self._stale = 0
+        self._wake: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self.dirty = False
+        self.fired = 0
+
+    # -- persistence --
+
+    def load(self):
+        """Read the schedules file; an unreadable file is moved aside, not overwritten"""
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path) as f:
+                records = json.load(f)["schedules"]
+            schedules = [Schedule.from_record(record) for record in records]
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            aside = f"{self.path}.corrupt-{int(time.time())}"
+            logger.error(f"❌ Could not load schedules from {self.path} ({e}); moved to {aside}")
+            os.replace(self.path, aside)
+            return
+        for schedule in schedules:
+            self.schedules[schedule.schedule_id] = schedule
+        logger.info(f"⏰ Loaded {len(schedules)} schedules")
+
+    def pending_save(self) -> Optional[List[Schedule]]:
+        """The schedules to save if anything changed since the last call, else None"""
+        if not self.dirty:
+            return None
+        self.dirty = False
+        return list(self.schedules.values())
+
+    def write(self, schedules: List[Schedule]):
+        """Replace the schedules file atomically; safe to run off the event loop"""
+        body = json.dumps({"schedules": [schedule.to_record() for schedule in schedules]},
+                          separators=(",", ":"))
+        temp_path = f"{self.path}.tmp"
+        with open(temp_path, "w") as f:
+            f.write(body)
+        os.replace(temp_path, self.path)
+
+    # -- schedule management --
+
+    def add(self, schedule: Schedule):
+        """Register a schedule; raises ScheduleError if it would never fire"""
+        if schedule.enabled and schedule.next_run is None:
+            schedule.next_run = schedule.next_after(time.time())
+            if schedule.next_run is None:
+                raise ScheduleError("The schedule has no future run")
+        self.schedules[schedule.schedule_id] = schedule
+        self._push(schedule)
+        self.dirty = True
+
+    def remove(self, schedule_id: str) -> Optional[Schedule]:
+        schedule = self.schedules.pop(schedule_id, None)
+        if schedule is not None:
+            self._retire(schedule)
+            self.dirty = True
+        return schedule
+
+    def pause(self, schedule: Schedule):
+        self._retire(schedule)
+        schedule.enabled = False
+        schedule.next_run = None
+        self.dirty = True
+
+    def resume(self, schedule: Schedule):
+        """Re-enable from now; runs that fell due while paused are not made up"""
+        schedule.enabled = True
+        schedule.next_run = schedule.next_after(time.time())
+        self._push(schedule)
+        self.dirty = True
+
+    async def run_now(self, schedule: Schedule) -> Optional[str]:
+        """Submit a run immediately, outside the schedule; returns the task id"""
+        return await self._start_run(schedule, time.time())
+
+    def _push(self, schedule: Schedule):
+        if not schedule.enabled or schedule.next_run is None:
+            return
+        self._sequence += 1
+        entry = (schedule.next_run, self._sequence, schedule.schedule_id, schedule.generation)
+        heapq.heappush(self._heap, entry)
+        if self._wake is not None and self._heap[0] is entry:
+            self._wake.set()
+
+    def _retire(self, schedule: Schedule):
+        """Invalidate the schedule's heap entry"""
+        if schedule.enabled and schedule.next_run is not None:
+            self._stale += 1
+        schedule.generation += 1
+
+    def _compact(self):
+        live = [entry for entry in self._heap if self._is_live(entry)]
+        heapq.heapify(live)
+        self._heap = live
+        self._stale = 0
+
+    def _is_live(self, entry: Tuple[float, int, str, int]) -> bool:
+        schedule = self.schedules.get(entry[2])
+        return schedule is not None and schedule.generation == entry[3]
+
+    # -- timer --
+
+    def start(self):
+        """Start firing due schedules on the running loop"""
+        self._wake = asyncio.Event()
+        self._heap = []
+        self._stale = 0
+        for schedule in self.schedules.values():
+            if schedule.enabled and schedule.next_run is not None:
+                self._sequence += 1
+                self._heap.append((schedule.next_run, self._sequence, schedule.schedule_id, schedule.generation))
+        heapq.heapify(self._heap)
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self._wake = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    async def _run(self):
+        while True:
+            now = time.time()
+            while self._heap and self._heap[0][0] <= now:
+                entry = heapq.heappop(self._heap)
+                if not self._is_live(entry):
+                    self._stale = max(0, self._stale - 1)
+                    continue
+                await self._fire_due(self.schedules[entry[2]], entry[0], now)
+            if self._stale > 1024 and self._stale * 2 >= len(self._heap):
+                self._compact()
+
+            self._wake.clear()
+            delay = MAX_TIMER_SLEEP
+            if self._heap:
+                delay = min(delay, max(0.0, self._heap[0][0] - time.time()))
+            try:
+                await asyncio.wait_for(self._wake.wait(), delay)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _fire_due(self, schedule: Schedule, due: float, now: float):
+        """Apply the misfire policy to a due occurrence, run it and reschedule"""
+        generation = schedule.generation
+        occurrences = 1 + schedule.count_between(due, now)
+        if schedule.misfire == "run_all":
+            runs = min(occurrences, MAX_CATCHUP_RUNS)
+        elif schedule.misfire == "skip" and now - due > schedule.misfire_grace:
+            runs = 0
+        else:
+            runs = 1
+        if occurrences > runs:
+            schedule.missed += occurrences - runs
+            logger.warning(f"⏰ Schedule {schedule.name or schedule.schedule_id} missed "
+                           f"{occurrences - runs} runs (due {_iso(due)}, misfire={schedule.misfire})")
+
+        for _ in range(runs):
+            if schedule.max_runs is not None and schedule.runs >= schedule.max_runs:
+                break
+            await self._start_run(schedule, due)
+
+        # Paused, resumed or deleted while submitting: that already rescheduled it
+        if schedule.generation == generation and schedule.schedule_id in self.schedules:
+            schedule.next_run = schedule.next_after(max(now, due))
+            self._push(schedule)
+            self.dirty = True
+
+    async def _start_run(self, schedule: Schedule, due: float) -> Optional[str]:
+        """Submit one run, honouring the overlap policy; returns the task id"""
+        previous = schedule.last_task_id
+        if previous and self._is_active(previous):
+            if schedule.overlap == "skip":
+                schedule.skipped += 1
+                self.dirty = True
+                logger.info(f"⏭️ Schedule {schedule.name or schedule.schedule_id} skipped: "
+                            f"task {previous} still running")
+                return None
+            if schedule.overlap == "replace":
+                await self._cancel(previous)
+
+        try:
+            task_id = await self._submit(schedule, due)
+        except Exception as e:
+            schedule.failures += 1
+            schedule.last_error = str(e)
+            self.dirty = True
+            logger.error(f"❌ Schedule {schedule.name or schedule.schedule_id} could not submit: {e}")
+            return None
+        if task_id is None:
+            schedule.skipped += 1
+            self.dirty = True
+            return None
+
+        schedule.runs += 1
+        schedule.last_run = time.time()
+        schedule.last_task_id = task_id
+        schedule.last_error = None
+        self.fired += 1
+        self.dirty = True
+        return task_id
+
+    def get_stats(self) -> Dict[str, Any]:
+        states: Dict[str, int] = {"active": 0, "paused": 0, "finished": 0}
+        for schedule in self.schedules.values():
+            states[schedule.state] += 1
+        return {
+            "running": self.running,
+            "schedules": len(self.schedules),
+            **states,
+            "next_due": _iso(self._heap[0][0]) if self._heap else None,
+            "heap_entries": len(self._heap),
+            "fired": self.fired,
+        }
@@ -0,0 +1,139 @@
+"""
+P6 Versioned Status Snapshots
+=============================
+
+``/status`` serves immutable snapshots of the server status instead of the
+live dict that tasks and background jobs mutate. A snapshot is rebuilt only
+after something marks the status as changed (rebuilds requested in the same
+event loop iteration are coalesced), gets a new version only if its content
+actually differs, and keeps its encoded response bodies so each format is
+serialized once per version.
+
+Pollers pass the version they have; ``wait_for_change`` parks them on an
+event that is set when the next version is published, so an idle long-poll
+costs nothing until the status changes or the wait times out.
+
+Author: DexiMind Development Team
+Date: 2025-01-15
+Version: 1.0.0
+"""
+
+import asyncio
+import json
+import time
+from typing import Any, Callable, Dict, Optional, Tuple
+from uuid import uuid4
+
+
+class StatusSnapshot:
+    """One published version of the status; never mutated after creation"""
+
+    __slots__ = ("version", "data", "etag", "created_at", "_canonical", "_bodies")
+
+    def __init__(self, version: int, canonical: str, etag: str):
+        self.version = version
+        self.data: Dict[str, Any] = json.loads(canonical)
+        self.data["version"] = version
+        self.etag = etag
+        self.created_at = time.time()
+        self._canonical = canonical
+        self._bodies: Dict[Tuple[str, Optional[str]], Tuple[bytes, Optional[str]]] = {}
+
+    def encoded(self, key: Tuple[str, Optional[str]],
+                encode: Callable[[], Tuple[bytes, Optional[str]]]) -> Tuple[bytes, Optional[str]]:
+        """Encoded body for a (media type, accept-encoding) pair, built once"""
+        body = self._bodies.get(key)
+        if body is None:
+            body = self._bodies[key] = encode()
+        return body
+
+
+class StatusBoard:
+    """Publishes versioned snapshots of a status dict and wakes long-pollers"""
+
+    def __init__(self, build: Callable[[], Dict[str, Any]]):
+        self._build = build
+        # Versions restart with the process; the ETag prefix tells them apart
+        self._epoch = uuid4().hex[:8]
+        self._snapshot: Optional[StatusSnapshot] = None
+        self._dirty = True
+        self._scheduled = False
+        self._changed: Optional[asyncio.Event] = None
+        self._closed = False
+        self.rebuilds = 0
+        self.waiting = 0
+
+    @property
+    def version(self) -> int:
+        return self.current().version
+
+    def invalidate(self):
+        """Mark the status changed; the rebuild is coalesced per loop iteration"""
+        self._dirty = True
+        if self._scheduled:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        self._scheduled = True
+        loop.call_soon(self._rebuild_scheduled)
+
+    def _rebuild_scheduled(self):
+        self._scheduled = False
+        if self._dirty:
+            self.refresh()
+
+    def refresh(self) -> StatusSnapshot:
+        """Rebuild now; publishes a new version only if the content changed"""
+        self._dirty = False
+        self.rebuilds += 1
+        canonical = json.dumps(self._build(), sort_keys=True, default=str)
+        previous = self._snapshot
+        if previous is not None and previous._canonical == canonical:
+            return previous
+
+        version = previous.version + 1 if previous is not None else 1
+        self._snapshot = StatusSnapshot(version, canonical, f'"{self._epoch}-{version}"')
+        if self._changed is not None:
+            self._changed.set()
+            self._changed = None
+        return self._snapshot
+
+    def current(self) -> StatusSnapshot:
+        """Latest snapshot, rebuilt first if a change is pending"""
+        if self._dirty or self._snapshot is None:
+            return self.refresh()
+        return self._snapshot
+
+    async def wait_for_change(self, since: int, timeout: float) -> StatusSnapshot:
+        """Return once the version differs from ``since``, or at the timeout"""
+        snapshot = self.current()
+        if snapshot.version != since or timeout <= 0 or self._closed:
+            return snapshot
+
+        if self._changed is None:
+            self._changed = asyncio.Event()
+        changed = self._changed
+        self.waiting += 1
+        try:
+            await asyncio.wait_for(changed.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        finally:
+            self.waiting -= 1
+        return self.current()
+
+    def close(self):
+        """Release every long-poll now and stop holding new ones"""
+        self._closed = True
+        if self._changed is not None:
+            self._changed.set()
+            self._changed = None
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "version": self._snapshot.version if self._snapshot is not None else 0,
+            "rebuilds": self.rebuilds,
+            "waiting": self.waiting,
+        }
@@ -0,0 +1,78 @@
+"""
+P6 Task Index
+=============
+
+Secondary indexes over the server's in-memory tasks, so bulk operations
+(``POST /tasks/query``, ``POST /tasks/cancel``) start from the tasks a
+filter names instead of scanning every task.
+
+Tasks are indexed by ``user_id`` and by parsed command type, which never
+change once a task exists. Status changes in place throughout a task's
+life, so it is not indexed here: unfinished tasks are exactly those with a
+live executor, and the server passes that collection in as ``unfinished``.
+A selection starts from the smallest index that applies and checks the
+remaining criteria task by task.
+
+Author: DexiMind Development Team
+Date: 2025-01-15
+Version: 1.0.0
+"""
+
+from typing import Any, Collection, Dict, List, Optional, Set, Tuple
+
+UNFINISHED_STATUSES = ("pending", "running")
+
+
+def command_type(task: Dict[str, Any]) -> str:
+    return task.get("parsed_command", {}).get("type", "unknown")
+
+
+class TaskIndex:
+    """Task ids by user and by command type"""
+
+    def __init__(self):
+        self.by_user: Dict[str, Set[str]] = {}
+        self.by_type: Dict[str, Set[str]] = {}
+
+    def add(self, task: Dict[str, Any]):
+        task_id = task["task_id"]
+        self.by_user.setdefault(task["user_id"], set()).add(task_id)
+        self.by_type.setdefault(command_type(task), set()).add(task_id)
+
+    def discard(self, task: Dict[str, Any]):
+        task_id = task["task_id"]
+        for index, key in ((self.by_user, task["user_id"]), (self.by_type, command_type(task))):
+            ids = index.get(key)
+            if ids is not None:
+                ids.discard(task_id)
+                if not ids:
+                    del index[key]
+
+    def select(self, tasks: Dict[str, Dict[str, Any]], unfinished: Collection[str],
+               statuses: Optional[Set[str]] = None, user_id: Optional[str] = None,
+               command: Optional[str] = None,
+               created_before: Optional[str] = None) -> Tuple[List[Dict[str, Any]], int]:
+        """(matching tasks oldest first, number of tasks examined)"""
+        candidates: List[Collection[str]] = []
+        if user_id is not None:
+            candidates.append(self.by_user.get(user_id, ()))
+        if command is not None:
+            candidates.append(self.by_type.get(command, ()))
+        if statuses is not None and statuses <= set(UNFINISHED_STATUSES):
+            candidates.append(unfinished)
+
+        if candidates:
+            smallest = min(candidates, key=len)
+            examined = [tasks[task_id] for task_id in smallest if task_id in tasks]
+        else:
+            examined = list(tasks.values())
+
+        matched = [
+            task for task in examined
+            if (statuses is None or task["status"] in statuses)
+            and (user_id is None or task["user_id"] == user_id)
+            and (command is None or command_type(task) == command)
+            and (created_before is None or task["created_at"] < created_before)
+        ]
+        matched.sort(key=lambda task: task["created_at"])
+        return matched, len(examined)
@@ -0,0 +1,342 @@
+"""
+P6 Device Telemetry
+===================
+
+Live hardware readings from every registered Pi5, polled by the server so
+dashboards get them from ``/status`` instead of each browser polling each
+device.
+
+``HttpConnectionPool`` is a small asyncio HTTP/1.1 client for the devices'
+JSON API. Connections are kept open between polls and reused per host
+(devices answering HTTP/1.0 or ``Connection: close`` simply get a new
+connection each time), a semaphore caps how many requests are in flight
+across all devices, and every request runs under a timeout.
+
+``TelemetryCollector`` polls ``/api/status`` and ``/api/network`` of each
+device and keeps the last good values per device. A device that stops
+answering keeps its last values, marked ``stale`` once they are older than
+the stale age, together with the errors from the latest attempt.
+
+Author: DexiMind Development Team
+Date: 2025-01-15
+Version: 1.0.0
+"""
+
+import asyncio
+import json
+import logging
+import time
+from collections import deque
+from datetime import datetime
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+MAX_RESPONSE_BYTES = 1024 * 1024
+MAX_HEADER_LINES = 100
+IDLE_CONNECTION_TIMEOUT = 30.0  # pooled connections unused this long are closed
+
+ENDPOINTS = {"status": "/api/status", "network": "/api/network"}
+
+
+class TelemetryError(Exception):
+    """A device answered with something other than a JSON 200 response"""
+
+
+class _Connection:
+    __slots__ = ("reader", "writer", "idle_since")
+
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.reader = reader
+        self.writer = writer
+        self.idle_since = time.monotonic()
+
+    @property
+    def usable(self) -> bool:
+        return (not self.reader.at_eof() and not self.writer.is_closing()
+                and time.monotonic() - self.idle_since < IDLE_CONNECTION_TIMEOUT)
+
+    def close(self):
+        self.writer.close()
+
+
+class HttpConnectionPool:
+    """Keep-alive GET client for device JSON endpoints, with a concurrency cap"""
+
+    def __init__(self, max_concurrency: int = 8, max_idle_per_host: int = 2):
+        self.max_concurrency = max_concurrency
+        self.max_idle_per_host = max_idle_per_host
+        self._idle: Dict[Tuple[str, int], Deque[_Connection]] = {}
+        self._limit: Optional[asyncio.Semaphore] = None
+        self.requests = 0
+        self.opened = 0
+        self.reused = 0
+        self.errors = 0
+
+    async def get_json(self, host: str, port: int, path: str, timeout: float) -> Any:
+        """GET a JSON document; raises OSError, TimeoutError or TelemetryError"""
+        if self._limit is None:
+            self._limit = asyncio.Semaphore(self.max_concurrency)
+        async with self._limit:
+            self.requests += 1
+            try:
+                return await asyncio.wait_for(self._get(host, port, path), timeout)
+            except Exception:
+                self.errors += 1
+                raise
+
+    async def _get(self, host: str, port: int, path: str) -> Any:
+        key = (host, port)
+        connection = self._checkout(key)
+        if connection is not None:
+            self.reused += 1
+            try:
+                return await self._request(key, connection, path)
+            except (OSError, asyncio.IncompleteReadError):
+                # The device closed the idle connection: retry once on a new one
+                pass
+        reader, writer = await asyncio.open_connection(host, port)
+        self.opened += 1
+        return await self._request(key, _Connection(reader, writer), path)
+
+    def _checkout(self, key: Tuple[str, int]) -> Optional[_Connection]:
+        idle = self._idle.get(key)
+        while idle:
+            connection = idle.pop()
+            if connection.usable:
+                return connection
+            connection.close()
+        return None
+
+    async def _request(self, key: Tuple[str, int], connection: _Connection, path: str) -> Any:
+        host, port = key
+        keep = False
+        try:
+            connection.writer.write(
+                f"GET {path} HTTP/1.1\r\nHost: {host}:{port}\r\n"
+                f"Accept: application/json\r\nConnection: keep-alive\r\n\r\n".encode()
+            )
+            await connection.writer.drain()
+            status, body, keep = await self._read_response(connection.reader)
+        finally:
+            if keep:
+                self._checkin(key, connection)
+            else:
+                connection.close()
+        if status != 200:
+            raise TelemetryError(f"HTTP {status} from {host}:{port}{path}")
+        try:
+            return json.loads(body)
+        except ValueError:
+            raise TelemetryError(f"Invalid JSON from {host}:{port}{path}")
+
+    def _checkin(self, key: Tuple[str, int], connection: _Connection):
+        idle = self._idle.setdefault(key, deque())
+        if len(idle) >= self.max_idle_per_host:
+            connection.close()
+            return
+        connection.idle_since = time.monotonic()
+        idle.append(connection)
+
+    async def _read_response(self, reader: asyncio.StreamReader) -> Tuple[int, bytes, bool]:
+        """(status, body, connection reusable) of one response"""
+        status_line = await reader.readline()
+        if not status_line:
+            raise ConnectionResetError("Connection closed before the response")
+        parts = status_line.decode("latin-1").split(None, 2)
+        if len(parts) < 2 or not parts[0].startswith("HTTP/") or not parts[1].isdigit():
+            raise TelemetryError(f"Malformed status line: {status_line[:80]!r}")
+        version, status = parts[0], int(parts[1])
+
+        headers: Dict[str, str] = {}
+        for _ in range(MAX_HEADER_LINES):
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+        else:
+            raise TelemetryError("Too many response headers")
+
+        connection_header = headers.get("connection", "").lower()
+        keep = (connection_header != "close" if version == "HTTP/1.1"
+                else connection_header == "keep-alive")
+        if "chunked" in headers.get("transfer-encoding", "").lower():
+            body = await self._read_chunked(reader)
+        elif "content-length" in headers:
+            length = int(headers["content-length"])
+            if length > MAX_RESPONSE_BYTES:
+                raise TelemetryError(f"Response too large: {length} bytes")
+            body = await reader.readexactly(length)
+        else:
+            # No length: the body runs to the end of the connection
+            body = await self._read_to_eof(reader)
+            keep = False
+        return status, body, keep
+
+    async def _read_to_eof(self, reader: asyncio.StreamReader) -> bytes:
+        chunks: List[bytes] = []
+        total = 0
+        while True:
+            data = await reader.read(65536)
+            if not data:
+                return b"".join(chunks)
+            total += len(data)
+            if total > MAX_RESPONSE_BYTES:
+                raise TelemetryError("Response too large")
+            chunks.append(data)
+
+    async def _read_chunked(self, reader: asyncio.StreamReader) -> bytes:
+        chunks: List[bytes] = []
+        total = 0
+        while True:
+            size = int((await reader.readline()).split(b";", 1)[0].strip() or b"0", 16)
+            if size == 0:
+                # Trailers, up to the blank line
+                while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+                    pass
+                return b"".join(chunks)
+            total += size
+            if total > MAX_RESPONSE_BYTES:
+                raise TelemetryError("Response too large")
+            chunks.append(await reader.readexactly(size))
+            await reader.readline()
+
+    async def close(self):
+        for idle in self._idle.values():
+            for connection in idle:
+                connection.close()
+        self._idle.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "max_concurrency": self.max_concurrency,
+            "requests": self.requests,
+            "connections_opened": self.opened,
+            "connections_reused": self.reused,
+            "errors": self.errors,
+            "idle_connections": sum(len(idle) for idle in self._idle.values()),
+        }
+
+
+def _number(value: Any) -> Optional[float]:
+    return float(value) if isinstance(value, (int, float)) and not isinstance(value, bool) else None
+
+
+class DeviceTelemetry:
+    """Last good readings of one device and the outcome of the latest poll"""
+
+    def __init__(self, device_id: str):
+        self.device_id = device_id
+        self.readings: Dict[str, Dict[str, Any]] = {}
+        self.updated_at: Dict[str, float] = {}
+        self.errors: Dict[str, str] = {}
+        self.rtt_ms: Optional[float] = None
+        self.polls = 0
+        self.failures = 0
+
+    def age(self, endpoint: str) -> Optional[float]:
+        updated = self.updated_at.get(endpoint)
+        return time.time() - updated if updated is not None else None
+
+    def is_stale(self, endpoint: str, stale_after: float) -> bool:
+        age = self.age(endpoint)
+        return age is None or age > stale_after
+
+    def to_dict(self, stale_after: float) -> Dict[str, Any]:
+        """Flattened view merged into system_status"""
+        status = self.readings.get("status", {})
+        network = self.readings.get("network", {})
+        updated = max(self.updated_at.values()) if self.updated_at else None
+        return {
+            "online": "status" in self.updated_at and "status" not in self.errors,
+            "stale": self.is_stale("status", stale_after),
+            "temperature": _number(status.get("temperature")),
+            "cpu_percent": _number(status.get("cpuUsage")),
+            "memory_percent": _number(status.get("memoryUsage")),
+            "uptime": _number(status.get("uptime")),
+            "has_internet": network.get("hasInternet"),
+            "ip_address": network.get("ipAddress"),
+            "gateway": network.get("gateway"),
+            "rtt_ms": self.rtt_ms,
+            "updated_at": datetime.fromtimestamp(updated).isoformat() if updated else None,
+            "errors": dict(self.errors),
+        }
+
+
+class TelemetryCollector:
+    """Polls every device's status and network endpoints over a shared pool"""
+
+    def __init__(self, pool: HttpConnectionPool, timeout: float = 2.0, stale_after: float = 30.0):
+        self.pool = pool
+        self.timeout = timeout
+        self.stale_after = stale_after
+        self.devices: Dict[str, DeviceTelemetry] = {}
+
+    async def collect(self, targets: List[Tuple[str, str, int]]) -> Dict[str, DeviceTelemetry]:
+        """Poll (device id, host, port) targets; returns the devices whose status was read"""
+        jobs = [
+            (device_id, endpoint, self._poll(host, port, path))
+            for device_id, host, port in targets
+            for endpoint, path in ENDPOINTS.items()
+        ]
+        results = await asyncio.gather(*(job for _, _, job in jobs), return_exceptions=True)
+
+        updated: Dict[str, DeviceTelemetry] = {}
+        now = time.time()
+        for device_id, _, _ in targets:
+            telemetry = self.devices.get(device_id)
+            if telemetry is None:
+                telemetry = self.devices[device_id] = DeviceTelemetry(device_id)
+            telemetry.polls += 1
+            telemetry.errors = {}
+
+        for (device_id, endpoint, _), result in zip(jobs, results):
+            telemetry = self.devices[device_id]
+            if isinstance(result, BaseException):
+                telemetry.errors[endpoint] = self._describe(result)
+                continue
+            reading, rtt_ms = result
+            if not isinstance(reading, dict) or "error" in reading:
+                error = reading.get("error") if isinstance(reading, dict) else "not a JSON object"
+                telemetry.errors[endpoint] = str(error)
+                continue
+            telemetry.readings[endpoint] = reading
+            telemetry.updated_at[endpoint] = now
+            if endpoint == "status":
+                telemetry.rtt_ms = rtt_ms
+                updated[device_id] = telemetry
+
+        for device_id, _, _ in targets:
+            if self.devices[device_id].errors:
+                self.devices[device_id].failures += 1
+        known = {device_id for device_id, _, _ in targets}
+        for device_id in list(self.devices):
+            if device_id not in known:
+                del self.devices[device_id]
+        return updated
+
+    async def _poll(self, host: str, port: int, path: str) -> Tuple[Any, float]:
+        started = time.perf_counter()
+        reading = await self.pool.get_json(host, port, path, self.timeout)
+        return reading, round((time.perf_counter() - started) * 1000, 1)
+
+    def _describe(self, error: BaseException) -> str:
+        if isinstance(error, asyncio.TimeoutError):
+            return f"timed out after {self.timeout}s"
+        return str(error) or type(error).__name__
+
+    def fleet_average(self, field: str) -> Optional[float]:
+        """Mean of a numeric field over devices with fresh status readings"""
+        values = []
+        for telemetry in self.devices.values():
+            if telemetry.is_stale("status", self.stale_after):
+                continue
+            value = _number(telemetry.readings["status"].get(field))
+            if value is not None:
+                values.append(value)
+        return round(sum(values) / len(values), 1) if values else None
+
+    def to_dict(self) -> Dict[str, Dict[str, Any]]:
+        return {device_id: telemetry.to_dict(self.stale_after)
+                for device_id, telemetry in self.devices.items()}
@@ -0,0 +1,177 @@
+"""
+P6 Thermal and Load Throttling
+==============================
+
+Adapts how hard the P6 UI drives each Pi5 from the telemetry the device
+reports (``/api/status``: ``temperature`` and ``cpuUsage``). Each reading
+is placed in a band, and the band sets the device's throttle level:
+
+- normal: tasks start as soon as the lane frees up
+- elevated / high: a pause is inserted after each task before the next
+  one starts, and the router counts the device's expected wait as longer,
+  so pool tasks drift to cooler devices
+- critical: no new task starts on the device until a reading drops out of
+  the band; the router avoids it whenever another device is available
+
+Levels fall only once a reading is a margin below the band it entered, so
+a device hovering on a boundary does not flap. Telemetry older than the
+maximum age is ignored and the device returns to normal.
+
+Bands default to the Pi5's own limits (it throttles itself at 80°C and
+85°C) and can be set with ``P6_TEMP_BANDS`` and ``P6_CPU_BANDS``: three
+comma-separated thresholds for elevated, high and critical.
+
+Author: DexiMind Development Team
+Date: 2025-01-15
+Version: 1.0.0
+"""
+
+import asyncio
+import logging
+import os
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+LEVELS = ("normal", "elevated", "high", "critical")
+
+
+def _bands(name: str, default: str) -> Tuple[float, ...]:
+    values = tuple(float(value) for value in os.environ.get(name, default).split(","))
+    if len(values) != 3 or list(values) != sorted(values):
+        raise ValueError(f"{name} needs three increasing thresholds, got {values}")
+    return values
+
+
+TEMP_BANDS = _bands("P6_TEMP_BANDS", "70,80,85")  # °C
+CPU_BANDS = _bands("P6_CPU_BANDS", "75,90,97")  # percent
+TEMP_HYSTERESIS = 3.0
+CPU_HYSTERESIS = 10.0
+
+# Pause after each task before the next starts, per level (seconds)
+DISPATCH_GAP = {"normal": 0.0, "elevated": 0.5, "high": 2.0}
+# Multiplier on the router's expected wait, per level
+ROUTING_PENALTY = {"normal": 1.0, "elevated": 1.5, "high": 3.0, "critical": 10.0}
+
+TELEMETRY_MAX_AGE = 60.0  # seconds
+PAUSE_RECHECK = 5.0  # a paused device re-checks its telemetry age this often
+
+
+def _band_level(value: Optional[float], bands: Tuple[float, ...], hysteresis: float,
+                current: int) -> int:
+    """Band index for a reading, holding the current one within the hysteresis margin"""
+    if value is None:
+        return 0
+    level = sum(1 for threshold in bands if value >= threshold)
+    if level < current and value > bands[current - 1] - hysteresis:
+        return current
+    return level
+
+
+class DispatchThrottle:
+    """Per-device dispatch pacing driven by temperature and CPU bands"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.temperature: Optional[float] = None
+        self.cpu_percent: Optional[float] = None
+        self.updated_at: Optional[float] = None
+        self._temp_level = 0
+        self._cpu_level = 0
+        self._last_finish = 0.0
+        self._changed: Optional[asyncio.Event] = None
+        self.waits = 0
+        self.delayed_seconds = 0.0
+
+    @property
+    def fresh(self) -> bool:
+        return self.updated_at is not None and time.time() - self.updated_at <= TELEMETRY_MAX_AGE
+
+    @property
+    def level(self) -> str:
+        if not self.fresh:
+            return "normal"
+        return LEVELS[max(self._temp_level, self._cpu_level)]
+
+    @property
+    def paused(self) -> bool:
+        return self.level == "critical"
+
+    @property
+    def penalty(self) -> float:
+        return ROUTING_PENALTY[self.level]
+
+    def update(self, temperature: Optional[float], cpu_percent: Optional[float]) -> bool:
+        """Record a telemetry reading; returns True if the level changed"""
+        before = self.level
+        self.temperature = temperature
+        self.cpu_percent = cpu_percent
+        self.updated_at = time.time()
+        self._temp_level = _band_level(temperature, TEMP_BANDS, TEMP_HYSTERESIS, self._temp_level)
+        self._cpu_level = _band_level(cpu_percent, CPU_BANDS, CPU_HYSTERESIS, self._cpu_level)
+        if self._changed is not None:
+            self._changed.set()
+            self._changed = None
+        if self.level != before:
+            logger.warning(f"🌡️ {self.name} throttle {before} -> {self.level} "
+                           f"({self.temperature}°C, CPU {self.cpu_percent}%)")
+            return True
+        return False
+
+    def reset(self):
+        """Drop readings that no longer apply (the device moved); normal until the next one"""
+        self.temperature = None
+        self.cpu_percent = None
+        self.updated_at = None
+        self._temp_level = 0
+        self._cpu_level = 0
+        if self._changed is not None:
+            self._changed.set()
+            self._changed = None
+
+    def mark_finished(self):
+        self._last_finish = time.monotonic()
+
+    async def wait(self) -> float:
+        """Hold a task until the device may take it; returns the seconds waited"""
+        started = time.monotonic()
+        while True:
+            if self.paused:
+                if self._changed is None:
+                    self._changed = asyncio.Event()
+                try:
+                    await asyncio.wait_for(self._changed.wait(), PAUSE_RECHECK)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            remaining = self._last_finish + DISPATCH_GAP[self.level] - time.monotonic()
+            if remaining <= 0:
+                break
+            await asyncio.sleep(remaining)
+
+        waited = time.monotonic() - started
+        if waited < 0.001:
+            return 0.0
+        self.waits += 1
+        self.delayed_seconds += waited
+        return waited
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "level": self.level,
+            "temperature": self.temperature,
+            "cpu_percent": self.cpu_percent,
+            "telemetry_age": round(time.time() - self.updated_at, 1) if self.updated_at else None,
+            "waits": self.waits,
+            "delayed_seconds": round(self.delayed_seconds, 1),
+        }
+
+
+def parse_device_status(data: Dict[str, Any]) -> Tuple[Optional[float], Optional[float]]:
+    """(temperature, cpu percent) from a Pi5 ``/api/status`` response"""
+    readings: List[Optional[float]] = []
+    for key in ("temperature", "cpuUsage"):
+        value = data.get(key)
+        readings.append(float(value) if isinstance(value, (int, float)) else None)
+    return readings[0], readings[1]
@@ -0,0 +1,168 @@
+"""
+P6 Event Loop Watchdog
+======================
+
+Continuous health monitoring of the server's asyncio event loop:
+
+- a ticker task sleeps for a fixed interval and records how late it woke
+  up. That scheduling lag is how long every other callback had to wait, and
+  it goes into a log-spaced histogram plus a one-minute window for
+  percentiles.
+- a watchdog thread notices when the ticker has been silent for longer
+  than the stall threshold. That means some callback is blocking the loop,
+  so the thread captures the loop thread's stack at that moment. The stack
+  names the blocking code while it is still running, and the stall's total
+  duration is filled in once the loop resumes.
+
+Author: DexiMind Development Team
+Date: 2025-01-15
+Version: 1.0.0
+"""
+
+import asyncio
+import bisect
+import logging
+import sys
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Lag bin upper bounds: 1ms growing 50% per bin, up to about 11s
+LAG_BOUNDS_MS = [1.0 * 1.5 ** i for i in range(24)]
+
+STACK_DEPTH = 40  # innermost frames kept per captured stall
+
+
+def _format_stack(frame) -> List[str]:
+    stack = []
+    while frame is not None and len(stack) < STACK_DEPTH:
+        code = frame.f_code
+        stack.append(f"{code.co_filename}:{frame.f_lineno} {code.co_name}")
+        frame = frame.f_back
+    stack.reverse()
+    return stack
+
+
+class LoopMonitor:
+    """Scheduling-lag histogram and blocked-loop stack capture"""
+
+    def __init__(self, interval: float = 0.1, stall_threshold: float = 0.1,
+                 max_stalls: int = 50, window: float = 60):
+        self.interval = interval
+        self.stall_threshold = stall_threshold
+        self.histogram = [0] * (len(LAG_BOUNDS_MS) + 1)
+        self.samples = 0
+        self.max_lag = 0.0
+        self.stalls: Deque[Dict[str, Any]] = deque(maxlen=max_stalls)
+        self.stall_count = 0
+        self._recent: Deque[float] = deque(maxlen=max(1, int(window / interval)))
+
+        self._task: Optional[asyncio.Task] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._loop_thread: Optional[int] = None
+        self._beat = time.perf_counter()
+        self._captured_beat: Optional[float] = None
+        self._open_stall: Optional[Dict[str, Any]] = None
+
+    def start(self):
+        """Start the ticker on the running loop and the watchdog thread"""
+        self._loop_thread = threading.get_ident()
+        self._beat = time.perf_counter()
+        self._stop.clear()
+        self._task = asyncio.create_task(self._tick())
+        self._thread = threading.Thread(target=self._watch, name="p6-loop-watchdog", daemon=True)
+        self._thread.start()
+
+    async def stop(self):
+        self._stop.set()
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _tick(self):
+        while True:
+            expected = time.perf_counter() + self.interval
+            await asyncio.sleep(self.interval)
+            now = time.perf_counter()
+            self._beat = now
+            self._record(max(0.0, now - expected))
+
+    def _record(self, lag: float):
+        lag_ms = lag * 1000
+        self.histogram[bisect.bisect_left(LAG_BOUNDS_MS, lag_ms)] += 1
+        self.samples += 1
+        self.max_lag = max(self.max_lag, lag)
+        self._recent.append(lag_ms)
+
+        stall = self._open_stall
+        if stall is not None:
+            self._open_stall = None
+            stall["duration_ms"] = round(lag_ms + self.interval * 1000, 1)
+            logger.warning(
+                f"🐢 Event loop was blocked for {stall['duration_ms']}ms in {stall['stack'][-1] if stall['stack'] else '?'}"
+            )
+
+    def _watch(self):
+        check = min(self.stall_threshold, self.interval) / 2
+        while not self._stop.wait(check):
+            beat = self._beat
+            silent = time.perf_counter() - beat
+            if silent < self.interval + self.stall_threshold or beat == self._captured_beat:
+                continue
+            # One capture per stall: the loop has not ticked since this beat
+            self._captured_beat = beat
+            frame = sys._current_frames().get(self._loop_thread)
+            stall = {
+                "detected_at": datetime.now().isoformat(),
+                "blocked_ms_at_capture": round(silent * 1000, 1),
+                "duration_ms": None,
+                "stack": _format_stack(frame),
+            }
+            self.stall_count += 1
+            self.stalls.append(stall)
+            self._open_stall = stall
+
+    def _percentiles(self) -> Dict[str, Optional[float]]:
+        recent = sorted(self._recent)
+        if not recent:
+            return {"p50": None, "p90": None, "p99": None, "max": None}
+        last = len(recent) - 1
+        return {
+            "p50": round(recent[int(last * 0.5)], 2),
+            "p90": round(recent[int(last * 0.9)], 2),
+            "p99": round(recent[int(last * 0.99)], 2),
+            "max": round(recent[-1], 2),
+        }
+
+    def summary(self) -> Dict[str, Any]:
+        """Compact lag figures, headlining the full report"""
+        return {
+            "lag_ms": self._percentiles(),
+            "max_lag_ms": round(self.max_lag * 1000, 2),
+            "stalls": self.stall_count,
+        }
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Full report: settings, lag histogram and the recent stalls with stacks"""
+        buckets: List[Tuple[Any, int]] = [
+            (round(bound, 2), count) for bound, count in zip(LAG_BOUNDS_MS, self.histogram)
+        ]
+        buckets.append(("inf", self.histogram[-1]))
+        return {
+            "running": self._task is not None and not self._task.done(),
+            "interval_ms": self.interval * 1000,
+            "stall_threshold_ms": self.stall_threshold * 1000,
+            "samples": self.samples,
+            **self.summary(),
+            "histogram": [{"le_ms": bound, "count": count} for bound, count in buckets if count],
+            "recent_stalls": list(self.stalls),
+        }
@@ -0,0 +1,165 @@
+"""
+P6 Task Workflows
+=================
+
+Multi-step jobs submitted as one DAG of commands. Each step names the
+steps it depends on; the server dispatches a step as a normal task the
+moment all of its dependencies have completed, so independent branches
+(for example on different devices) run in parallel and no client round
+trip is needed between steps.
+
+A failed, cancelled or timed-out step skips every step downstream of it;
+branches that do not depend on it carry on. The workflow finishes when no
+step is pending or running: ``completed`` if every step completed,
+otherwise ``failed`` (or ``cancelled`` if it was cancelled).
+
+Author: DexiMind Development Team
+Date: 2025-01-15
+Version: 1.0.0
+"""
+
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+FINISHED_STEP_STATES = ("completed", "failed", "cancelled", "skipped")
+
+
+class WorkflowError(ValueError):
+    """The submitted steps do not form a valid DAG"""
+
+
+def topological_order(steps: List[Dict[str, Any]]) -> List[str]:
+    """Step ids in dependency order; raises WorkflowError for bad graphs"""
+    ids = [step["id"] for step in steps]
+    if len(set(ids)) != len(ids):
+        raise WorkflowError("Step ids must be unique")
+
+    known = set(ids)
+    indegree = {step_id: 0 for step_id in ids}
+    dependents: Dict[str, List[str]] = {step_id: [] for step_id in ids}
+    for step in steps:
+        for dependency in step["depends_on"]:
+            if dependency not in known:
+                raise WorkflowError(f"Step {step['id']} depends on unknown step {dependency}")
+            if dependency == step["id"]:
+                raise WorkflowError(f"Step {step['id']} depends on itself")
+            indegree[step["id"]] += 1
+            dependents[dependency].append(step["id"])
+
+    order = [step_id for step_id in ids if indegree[step_id] == 0]
+    for step_id in order:
+        for dependent in dependents[step_id]:
+            indegree[dependent] -= 1
+            if indegree[dependent] == 0:
+                order.append(dependent)
+
+    if len(order) != len(ids):
+        cyclic = sorted(step_id for step_id in ids if indegree[step_id] > 0)
+        raise WorkflowError(f"Dependency cycle between steps: {', '.join(cyclic)}")
+    return order
+
+
+class Workflow:
+    """Runtime state of one workflow: step states and the dependency graph"""
+
+    def __init__(self, workflow_id: str, name: Optional[str], user_id: str,
+                 steps: List[Dict[str, Any]]):
+        self.order = topological_order(steps)
+        self.workflow_id = workflow_id
+        self.name = name
+        self.user_id = user_id
+        self.created_at = datetime.now().isoformat()
+        self.finished_at: Optional[str] = None
+        self.cancelled = False
+
+        self.steps: Dict[str, Dict[str, Any]] = {}
+        self._waiting_on: Dict[str, int] = {}
+        self._dependents: Dict[str, List[str]] = {step["id"]: [] for step in steps}
+        for step in steps:
+            self.steps[step["id"]] = dict(step, status="pending", task_id=None)
+            self._waiting_on[step["id"]] = len(step["depends_on"])
+            for dependency in step["depends_on"]:
+                self._dependents[dependency].append(step["id"])
+
+    @property
+    def finished(self) -> bool:
+        return all(step["status"] in FINISHED_STEP_STATES for step in self.steps.values())
+
+    @property
+    def status(self) -> str:
+        if not self.finished:
+            return "running"
+        if self.cancelled:
+            return "cancelled"
+        if all(step["status"] == "completed" for step in self.steps.values()):
+            return "completed"
+        return "failed"
+
+    def ready_steps(self) -> List[str]:
+        """Pending steps whose dependencies have all completed"""
+        return [
+            step_id for step_id in self.order
+            if self.steps[step_id]["status"] == "pending" and self._waiting_on[step_id] == 0
+        ]
+
+    def mark_dispatched(self, step_id: str, task_id: str):
+        self.steps[step_id]["status"] = "dispatched"
+        self.steps[step_id]["task_id"] = task_id
+
+    def step_finished(self, step_id: str, status: str) -> List[str]:
+        """Record a step's outcome; returns the steps that became ready"""
+        step = self.steps[step_id]
+        if step["status"] in FINISHED_STEP_STATES:
+            return []
+        step["status"] = status
+
+        if status == "completed":
+            for dependent in self._dependents[step_id]:
+                self._waiting_on[dependent] -= 1
+        else:
+            self._skip_downstream(step_id)
+
+        ready = self.ready_steps()
+        self._check_finished()
+        return ready
+
+    def cancel(self) -> List[str]:
+        """Skip steps not yet dispatched; returns task ids still to cancel"""
+        self.cancelled = True
+        running = []
+        for step in self.steps.values():
+            if step["status"] == "pending":
+                step["status"] = "skipped"
+            elif step["status"] == "dispatched":
+                running.append(step["task_id"])
+        self._check_finished()
+        return running
+
+    def _skip_downstream(self, step_id: str):
+        stack = list(self._dependents[step_id])
+        while stack:
+            dependent = self.steps[stack.pop()]
+            if dependent["status"] == "pending":
+                dependent["status"] = "skipped"
+                stack.extend(self._dependents[dependent["id"]])
+
+    def _check_finished(self):
+        if self.finished_at is None and self.finished:
+            self.finished_at = datetime.now().isoformat()
+
+    def to_dict(self) -> Dict[str, Any]:
+        counts: Dict[str, int] = {}
+        for step in self.steps.values():
+            counts[step["status"]] = counts.get(step["status"], 0) + 1
+        done = sum(counts.get(state, 0) for state in FINISHED_STEP_STATES)
+        return {
+            "workflow_id": self.workflow_id,
+            "name": self.name,
+            "user_id": self.user_id,
+            "status": self.status,
+            "progress": round(done * 100 / len(self.steps)),
+            "step_counts": counts,
+            "created_at": self.created_at,
+            "finished_at": self.finished_at,
+            "steps": [self.steps[step_id] for step_id in self.order],
+        }
@@ -10,11 +10,16 @@ import subprocess
 import socket
 import time
 import os
-from http.server import HTTPServer, BaseHTTPRequestHandler
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
 from urllib.parse import urlparse, parse_qs
 import threading
 
 class Pi5APIHandler(BaseHTTPRequestHandler):
+    # Keep-alive, so pollers such as the P6 UI reuse their connection
+    protocol_version = 'HTTP/1.1'
+    # Previous /proc/stat sample (total, idle, usage) for CPU usage between calls
+    cpu_sample = None
+    
     def __init__(self, *args, **kwargs):
         self.start_time = time.time()
         super().__init__(*args, **kwargs)
@@ -24,14 +29,7 @@ class Pi5APIHandler(BaseHTTPRequestHandler):
         parsed_path = urlparse(self.path)
         path = parsed_path.path
         
-        # Set CORS headers
-        self.send_response(200)
-        self.send_header('Content-Type', 'application/json')
-        self.send_header('Access-Control-Allow-Origin', '*')
-        self.send_header('Access-Control-Allow-Methods', 'GET, POST, OPTIONS')
-        self.send_header('Access-Control-Allow-Headers', 'Content-Type')
-        self.end_headers()
-        
+        status = 200
         try:
             if path == '/api/status':
                 response = self.get_device_status()
@@ -43,13 +41,20 @@ class Pi5APIHandler(BaseHTTPRequestHandler):
                 response = self.get_cpuinfo()
             else:
                 response = {'error': 'Endpoint not found'}
-                self.send_response(404)
-            
-            self.wfile.write(json.dumps(response).encode())
-            
+                status = 404
         except Exception as e:
-            error_response = {'error': str(e)}
-            self.wfile.write(json.dumps(error_response).encode())
+            response = {'error': str(e)}
+        
+        # The body length lets the client keep the connection open
+        body = json.dumps(response).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('Access-Control-Allow-Origin', '*')
+        self.send_header('Access-Control-Allow-Methods', 'GET, POST, OPTIONS')
+        self.send_header('Access-Control-Allow-Headers', 'Content-Type')
+        self.end_headers()
+        self.wfile.write(body)
     
     def do_OPTIONS(self):
         """Handle CORS preflight requests"""
@@ -57,13 +62,18 @@ class Pi5APIHandler(BaseHTTPRequestHandler):
         self.send_header('Access-Control-Allow-Origin', '*')
         self.send_header('Access-Control-Allow-Methods', 'GET, POST, OPTIONS')
         self.send_header('Access-Control-Allow-Headers', 'Content-Type')
+        self.send_header('Content-Length', '0')
         self.end_headers()
     
     def get_device_status(self):
         """Get Pi5 device status"""
         try:
             # Get uptime
-            uptime_seconds = time.time() - self.start_time
+            try:
+                with open('/proc/uptime', 'r') as f:
+                    uptime_seconds = float(f.read().split()[0])
+            except (OSError, ValueError, IndexError):
+                uptime_seconds = time.time() - self.start_time
             
             # Get CPU temperature
             try:
@@ -73,23 +83,47 @@ class Pi5APIHandler(BaseHTTPRequestHandler):
             except:
                 temperature = None
             
-            # Get CPU usage (simplified)
-            try:
-                result = subprocess.run(['top', '-bn1'], capture_output=True, text=True, timeout=5)
-                cpu_usage = 0.0  # Simplified - you might want to parse this better
-            except:
-                cpu_usage = None
-            
             return {
                 'status': 'online',
                 'uptime': uptime_seconds,
                 'temperature': temperature,
-                'cpuUsage': cpu_usage,
+                'cpuUsage': self.get_cpu_usage(),
+                'memoryUsage': self.get_memory_usage(),
                 'timestamp': time.time()
             }
         except Exception as e:
             return {'error': f'Failed to get device status: {str(e)}'}
     
+    def get_cpu_usage(self):
+        """CPU busy percentage since the previous call (from /proc/stat)"""
+        try:
+            with open('/proc/stat', 'r') as f:
+                values = [int(value) for value in f.readline().split()[1:]]
+        except (OSError, ValueError):
+            return None
+        total, idle = sum(values), values[3] + (values[4] if len(values) > 4 else 0)
+        previous = Pi5APIHandler.cpu_sample
+        if previous is None:
+            # First call: average since boot
+            usage = round(100.0 * (total - idle) / total, 1) if total else None
+        elif total - previous[0] < 100:
+            # Too few ticks since the last sample to be meaningful
+            return previous[2]
+        else:
+            busy, elapsed = (total - idle) - (previous[0] - previous[1]), total - previous[0]
+            usage = round(100.0 * busy / elapsed, 1)
+        Pi5APIHandler.cpu_sample = (total, idle, usage)
+        return usage
+    
+    def get_memory_usage(self):
+        """Used memory percentage (from /proc/meminfo)"""
+        try:
+            with open('/proc/meminfo', 'r') as f:
+                meminfo = {line.split(':')[0]: int(line.split()[1]) for line in f if ':' in line}
+            return round(100.0 * (1 - meminfo['MemAvailable'] / meminfo['MemTotal']), 1)
+        except (OSError, ValueError, KeyError, IndexError, ZeroDivisionError):
+            return None
+    
     def get_serial_number(self):
         """Get Pi5 serial number"""
         try:
@@ -182,7 +216,8 @@ class Pi5APIHandler(BaseHTTPRequestHandler):
 def run_server(host='0.0.0.0', port=8080):
     """Run the Pi5 API server"""
     server_address = (host, port)
-    httpd = HTTPServer(server_address, Pi5APIHandler)
+    # One thread per connection, so a kept-alive poller cannot block others
+    httpd = ThreadingHTTPServer(server_address, Pi5APIHandler)
     
     print(f"Pi5 API Server starting on {host}:{port}")
     print("Available endpoints:")
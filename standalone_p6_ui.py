@@ -15,20 +15,53 @@ Version: 1.0.0
 """
 
 import asyncio
+import csv
+import hmac
+import io
 import json
 import logging
 import os
+import re
+import secrets
+import signal
+import socket
+import subprocess
 import sys
+import urllib.request
+import time
+from collections import deque
+from contextlib import asynccontextmanager
 from datetime import datetime
-from typing import Dict, List, Optional, Any
+from typing import Deque, Dict, List, Optional, Any, Tuple, Union
 from uuid import uuid4
 
 from fastapi import FastAPI, HTTPException, WebSocket, WebSocketDisconnect, Request
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import HTMLResponse, JSONResponse
-from fastapi.staticfiles import StaticFiles
-from pydantic import BaseModel, Field
-import uvicorn
+from fastapi.responses import HTMLResponse, JSONResponse, Response, StreamingResponse
+from fastapi.websockets import WebSocketState
+from pydantic import BaseModel, Field, ValidationError
+
+import p6_encoding
+from p6_circuit import CircuitOpenError
+from p6_connections import ConnectionManager
+from p6_discovery import LanDiscovery, local_subnet
+from p6_events import TaskEventHub
+from p6_fleet import DEFAULT_API_PORT, DeviceRegistry, NoDeviceAvailable, Pi5Device
+from p6_history import (EXPORT_FIELDS, FINISH_EVENTS, GROUP_FIELDS, TaskHistory, archived_record,
+                        export_record, finished_at)
+from p6_intents import INTENT_KEYWORDS, IntentMatcher
+from p6_lanes import LaneTicket
+from p6_metrics import TaskMetrics
+from p6_profiling import (KEY_TYPES, MAX_INTERVAL_MS, MAX_PROFILE_SECONDS, MIN_INTERVAL_MS,
+                          MemoryProfiler, ProfilerBusy, SamplingProfiler, object_counts)
+from p6_scheduler import JobScheduler
+from p6_schedules import Schedule, ScheduleBook, ScheduleError, parse_time
+from p6_status import StatusBoard, StatusSnapshot
+from p6_task_index import UNFINISHED_STATUSES, TaskIndex
+from p6_telemetry import HttpConnectionPool, TelemetryCollector
+from p6_watchdog import LoopMonitor
+from p6_workflows import Workflow, WorkflowError
 
 # Configure logging
 logging.basicConfig(
@@ -37,11 +70,113 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Pi5 execution settings (devices themselves are configured in p6_fleet)
+PI5_COMMAND_TIMEOUT = 30  # seconds
+PI5_CONNECT_TIMEOUT = 5  # seconds for the SSH connection itself
+SSH_CONNECTION_ERROR = 255  # ssh exit status when it cannot reach the device
+
+# Remote output handling: only a bounded tail of each task's output is kept
+OUTPUT_TAIL_LINES = 50
+OUTPUT_LINE_LIMIT = 1024  # bytes per line, longer lines are truncated
+OUTPUT_READ_CHUNK = 4096
+
+# Progress markers printed by the device script, e.g. "PROGRESS 40 typing text"
+PROGRESS_MARKER = re.compile(r'^\s*PROGRESS[:\s]\s*(\d{1,3})\s*%?(?:\s+(.*))?$')
+
+# Startup budget: time from process exec until the listener serves requests
+STARTUP_BUDGET_MS = int(os.environ.get("P6_STARTUP_BUDGET_MS", "1500"))
+
+def _process_start_time() -> float:
+    """Wall-clock time the current process was exec'd (falls back to now)"""
+    try:
+        with open("/proc/self/stat") as f:
+            start_ticks = int(f.read().rsplit(")", 1)[1].split()[19])
+        with open("/proc/uptime") as f:
+            uptime = float(f.read().split()[0])
+        return time.time() - (uptime - start_ticks / os.sysconf("SC_CLK_TCK"))
+    except (OSError, ValueError, IndexError, AttributeError):
+        return time.time()
+
+PROCESS_STARTED_AT = _process_start_time()
+
+# Graceful reload: the new process inherits the listening socket, the old one
+# stops starting tasks, lets running ones finish and hands the pending ones over
+RELOAD_READY_TIMEOUT = 30  # seconds for the new process to start serving
+# Long enough for a command that started just before the reload to finish
+RELOAD_DRAIN_TIMEOUT = float(os.environ.get("P6_DRAIN_TIMEOUT", str(PI5_COMMAND_TIMEOUT + 5)))
+RELOAD_RETRY_MS = 500  # reconnect delay suggested to WebSocket clients
+LISTEN_FD_ENV = "P6_LISTEN_FD"
+READY_FD_ENV = "P6_READY_FD"
+HANDOFF_TOKEN_ENV = "P6_HANDOFF_TOKEN"
+
+# Transport-level permessage-deflate for text /ws clients that offer it;
+# binary clients (?encoding=binary|msgpack) get size-thresholded compression
+WS_PER_MESSAGE_DEFLATE = os.environ.get("P6_WS_DEFLATE", "1") != "0"
+
+# /ws connection limits and liveness: clients answer "heartbeat" messages
+# (any frame counts) and are dropped after WS_IDLE_TIMEOUT of silence.
+# Protocol-level pings catch half-open TCP connections as well.
+WS_MAX_CONNECTIONS = int(os.environ.get("P6_WS_MAX_CONNECTIONS", "500"))
+WS_MAX_PER_IP = int(os.environ.get("P6_WS_MAX_PER_IP", "20"))
+WS_HEARTBEAT_INTERVAL = 20  # seconds
+WS_IDLE_TIMEOUT = 60
+WS_SEND_TIMEOUT = 5  # a client that cannot take a frame this fast is dropped
+WS_CLOSE_TIMEOUT = 2
+WS_PING_INTERVAL = 20.0
+WS_PING_TIMEOUT = 20.0
+WS_TRY_AGAIN_LATER = 1013  # close code for refused connections
+
+# Admin endpoints require this token in X-Admin-Token; unset means loopback only
+ADMIN_TOKEN = os.environ.get("P6_ADMIN_TOKEN")
+
+# Background job settings
+METRICS_INTERVAL = 5  # seconds
+TASK_EVICTION_INTERVAL = 60
+TASK_RETENTION_SECONDS = 3600  # finished tasks are kept this long
+MAX_RETAINED_TASKS = 1000
+EVENT_COMPACTION_INTERVAL = 60
+EVENT_RETENTION_SECONDS = 900  # SSE replay window
+DEVICE_PROBE_INTERVAL = 30
+DEVICE_PROBE_TIMEOUT = 3
+TELEMETRY_INTERVAL = 10  # device /api/status and /api/network polling
+TELEMETRY_TIMEOUT = 4  # per request; the Pi5's /api/network checks internet access for up to 3s
+TELEMETRY_CONCURRENCY = int(os.environ.get("P6_TELEMETRY_CONCURRENCY", "8"))
+TELEMETRY_STALE_AFTER = 3 * TELEMETRY_INTERVAL
+# Subnets swept for Pi5 devices: comma-separated CIDRs, "auto" for this host's /24, unset for off
+DISCOVERY_SUBNETS = [subnet.strip() for subnet in os.environ.get("P6_DISCOVERY_SUBNETS", "").split(",")
+                     if subnet.strip()]
+DISCOVERY_PORT = int(os.environ.get("P6_DISCOVERY_PORT", str(DEFAULT_API_PORT)))
+DISCOVERY_INTERVAL = 20  # incremental sweep: known devices plus a slice of the subnet
+DISCOVERY_TIMEOUT = 0.75  # per address
+DISCOVERY_CONCURRENCY = int(os.environ.get("P6_DISCOVERY_CONCURRENCY", "128"))
+HISTORY_FLUSH_INTERVAL = 1  # task history log is appended in batches
+SCHEDULE_SAVE_INTERVAL = 2  # changed schedules are written to disk in batches
+
+# Event loop health: scheduling lag is sampled every LOOP_MONITOR_INTERVAL and
+# the loop thread's stack is captured when it is blocked past the threshold
+LOOP_MONITOR_INTERVAL = 0.1  # seconds
+LOOP_STALL_THRESHOLD_MS = int(os.environ.get("P6_LOOP_STALL_MS", "100"))
+
+# GET /tasks/export streams rows in batches of this size
+EXPORT_BATCH_ROWS = 500
+EXPORT_MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+TASK_STATUSES = ("pending", "running", "completed", "failed", "cancelled")
+
+# GET /status?since=<version>&wait=<seconds> holds the request at most this long
+STATUS_MAX_WAIT = 60
+
+# /analytics time windows, e.g. ?window=30m, 24h, 7d
+ANALYTICS_WINDOW = re.compile(r'^(\d+)([mhd])$')
+ANALYTICS_WINDOW_UNITS = {"m": 60, "h": 3600, "d": 86400}
+ANALYTICS_DEFAULT_WINDOW = "24h"
+
 # Pydantic models
 class TaskCreate(BaseModel):
     command: str = Field(..., description="Natural language command")
     user_id: str = Field(default="web_user", description="User ID")
     priority: int = Field(default=5, ge=1, le=10, description="Task priority (1-10)")
+    device: Optional[str] = Field(default=None, description="Target device id")
+    pool: Optional[str] = Field(default=None, description="Target device pool")
 
 class TaskResponse(BaseModel):
     task_id: str
@@ -51,6 +186,49 @@ class TaskResponse(BaseModel):
     user_id: str
     created_at: str
     estimated_duration: int
+    device: Optional[str] = None
+    pool: Optional[str] = None
+
+class TaskFilter(BaseModel):
+    status: Optional[List[str]] = Field(default=None, description="Match any of these statuses")
+    user_id: Optional[str] = Field(default=None, description="Submitted by this user")
+    created_before: Optional[Union[float, str]] = Field(default=None, description="Created before this time")
+    command_type: Optional[str] = Field(default=None, description="Parsed command type, e.g. click")
+
+class TaskQuery(TaskFilter):
+    limit: Optional[int] = Field(default=None, ge=1, description="Return at most this many tasks")
+
+class WorkflowStep(BaseModel):
+    id: str = Field(..., description="Step id, unique within the workflow")
+    command: str = Field(..., description="Natural language command")
+    depends_on: List[str] = Field(default_factory=list, description="Steps that must complete first")
+    priority: int = Field(default=5, ge=1, le=10, description="Task priority (1-10)")
+    device: Optional[str] = Field(default=None, description="Target device id")
+    pool: Optional[str] = Field(default=None, description="Target device pool")
+    timeout: Optional[float] = Field(default=None, gt=0, description="Step timeout in seconds")
+
+class WorkflowCreate(BaseModel):
+    name: Optional[str] = Field(default=None, description="Workflow name")
+    user_id: str = Field(default="web_user", description="User ID")
+    steps: List[WorkflowStep] = Field(..., description="Steps of the workflow DAG")
+
+class ScheduleCreate(BaseModel):
+    command: str = Field(..., description="Natural language command")
+    name: Optional[str] = Field(default=None, description="Schedule name")
+    user_id: str = Field(default="web_user", description="User ID")
+    priority: int = Field(default=5, ge=1, le=10, description="Task priority (1-10)")
+    device: Optional[str] = Field(default=None, description="Target device id")
+    pool: Optional[str] = Field(default=None, description="Target device pool")
+    timeout: Optional[float] = Field(default=None, gt=0, description="Task timeout in seconds")
+    at: Optional[Union[float, str]] = Field(default=None, description="Run once at this time")
+    interval: Optional[float] = Field(default=None, description="Run every this many seconds")
+    cron: Optional[str] = Field(default=None, description="Five-field cron expression")
+    start_at: Optional[Union[float, str]] = Field(default=None, description="First run / anchor time")
+    end_at: Optional[Union[float, str]] = Field(default=None, description="No runs after this time")
+    max_runs: Optional[int] = Field(default=None, ge=1, description="Stop after this many runs")
+    misfire: str = Field(default="run_once", description="skip, run_once or run_all")
+    misfire_grace: float = Field(default=60, ge=0, description="Seconds late a run still counts as on time")
+    overlap: str = Field(default="skip", description="skip, allow or replace")
 
 class WebSocketMessage(BaseModel):
     type: str
@@ -62,15 +240,58 @@ class StandaloneP6UI:
     def __init__(self, host: str = "0.0.0.0", port: int = 8001):
         self.host = host
         self.port = port
-        self.app = FastAPI(title="DexiMind P6 UI", version="1.0.0")
+        self.app = FastAPI(title="DexiMind P6 UI", version="1.0.0", lifespan=self._lifespan)
         
         # Task management
         self.tasks: Dict[str, Dict] = {}
         self.task_queue: List[str] = []
         self.active_tasks: Dict[str, asyncio.Task] = {}
+        self.task_index = TaskIndex()
+        self.task_output: Dict[str, Deque[str]] = {}
+        self.workflows: Dict[str, Workflow] = {}
+        
+        # Pi5 devices tasks can be routed to
+        self.devices = DeviceRegistry.load()
+        self.devices.set_circuit_listener(self._on_circuit_change)
         
         # WebSocket connections
-        self.websocket_connections: List[WebSocket] = []
+        self.websockets = ConnectionManager(WS_MAX_CONNECTIONS, WS_MAX_PER_IP, WS_IDLE_TIMEOUT)
+        
+        # Startup state: /ready flips once the device connection is warm
+        self.ready = False
+        self.listening_at: Optional[float] = None
+        self.draining = False
+        # Set by a reloading parent so it can post its tasks here without the admin token
+        self.handoff_token = os.environ.pop(HANDOFF_TOKEN_ENV, None)
+        self._server = None
+        self._listen_sockets: List[socket.socket] = []
+        self._ui_html: Optional[str] = None
+        
+        # Typo-tolerant lookup of command keywords for _parse_command
+        self.intent_matcher = IntentMatcher()
+        
+        # Replayable task event feed for SSE clients
+        self.task_events = TaskEventHub()
+        
+        # On-disk task lifecycle log for /analytics
+        self.history = TaskHistory()
+        
+        # Sliding-window throughput, failure rate and latency counters
+        self.task_metrics = TaskMetrics()
+        
+        # On-demand CPU sampling and tracemalloc profiling for /admin/profile
+        self.cpu_profiler = SamplingProfiler()
+        self.memory_profiler = MemoryProfiler()
+        
+        # Event loop lag histogram and blocked-loop stack capture
+        self.loop_monitor = LoopMonitor(LOOP_MONITOR_INTERVAL, LOOP_STALL_THRESHOLD_MS / 1000)
+        
+        # Live hardware readings polled from every device's HTTP API
+        self.device_http = HttpConnectionPool(TELEMETRY_CONCURRENCY)
+        self.telemetry = TelemetryCollector(self.device_http, TELEMETRY_TIMEOUT, TELEMETRY_STALE_AFTER)
+        
+        # Pi5 devices found on the LAN by serial; configured serials follow them
+        self.discovery = self._create_discovery()
         
         # System status
         self.system_status = {
@@ -83,9 +304,9 @@ class StandaloneP6UI:
                 "performance_monitor": "active"
             },
             "performance": {
-                "cpu_percent": 45.0,
-                "memory_percent": 65.0,
-                "latency_p80": 118.0,
+                "cpu_percent": None,
+                "memory_percent": None,
+                "latency_p80": None,
                 "accuracy": 96.0,
                 "active_tasks": 0,
                 "total_tasks": 0
@@ -93,15 +314,60 @@ class StandaloneP6UI:
             "security": {
                 "kill_switch_active": False,
                 "privacy_level": "basic"
-            }
+            },
+            "devices": {}
         }
         
+        # Immutable, versioned copies of system_status served by /status
+        self.status_board = StatusBoard(self._current_status)
+        
+        # Scheduled and recurring commands, submitted as tasks when due
+        self.schedules = ScheduleBook(
+            self._submit_scheduled_task,
+            lambda task_id: task_id in self.active_tasks,
+            self._cancel_scheduled_task
+        )
+        
+        # Periodic background jobs, run for the lifetime of the app
+        self.scheduler = JobScheduler()
+        self._register_background_jobs()
+        
         # Setup routes
         self._setup_routes()
         self._setup_middleware()
-        
-        # Start background tasks
-        self._start_background_tasks()
+    
+    @asynccontextmanager
+    async def _lifespan(self, app: FastAPI):
+        """Start background jobs with the app and stop them on shutdown"""
+        if self.discovery is not None:
+            # Cached addresses first, so the first health probes go to the right place
+            await run_in_threadpool(self.discovery.load)
+            self._apply_discovery()
+        await self.scheduler.start()
+        self.loop_monitor.start()
+        await run_in_threadpool(self.schedules.load)
+        self.schedules.start()
+        try:
+            asyncio.get_running_loop().add_signal_handler(
+                signal.SIGHUP, lambda: asyncio.create_task(self._graceful_reload())
+            )
+        except (AttributeError, NotImplementedError, RuntimeError):
+            # No SIGHUP (Windows) or not on the main thread: use POST /admin/reload
+            pass
+        try:
+            yield
+        finally:
+            await self.schedules.stop()
+            await self.loop_monitor.stop()
+            await self.scheduler.stop()
+            await self._save_schedules()
+            await self.device_http.close()
+            if self.discovery is not None:
+                records = self.discovery.pending_save()
+                if records is not None:
+                    await run_in_threadpool(self.discovery.write, records)
+                await self.discovery.pool.close()
+            await run_in_threadpool(self.history.flush)
     
     def _setup_middleware(self):
         """Setup CORS and other middleware"""
@@ -119,7 +385,10 @@ class StandaloneP6UI:
         @self.app.get("/", response_class=HTMLResponse)
         async def get_ui():
             """Serve the main UI"""
-            return self._get_ui_html()
+            # Rendered on first request rather than at startup
+            if self._ui_html is None:
+                self._ui_html = self._get_ui_html()
+            return self._ui_html
         
         @self.app.get("/health")
         async def health_check():
@@ -131,51 +400,119 @@ class StandaloneP6UI:
                 "components": self.system_status["components"]
             }
         
+        @self.app.get("/ready")
+        async def readiness_check():
+            """Readiness endpoint: 503 until the server can execute tasks"""
+            body = {
+                "ready": self.ready,
+                "listening": self.listening_at is not None,
+                "device": self.system_status["components"].get("pi5_device", "unknown"),
+                "startup_ms": self._startup_ms()
+            }
+            return JSONResponse(body, status_code=200 if self.ready else 503)
+        
         @self.app.post("/tasks", response_model=TaskResponse)
         async def create_task(task: TaskCreate):
             """Create a new task"""
-            task_id = str(uuid4())
-            
-            # Parse natural language command
-            parsed_command = self._parse_command(task.command)
-            
-            new_task = {
-                "task_id": task_id,
-                "command": task.command,
-                "parsed_command": parsed_command,
-                "status": "pending",
-                "priority": task.priority,
-                "user_id": task.user_id,
-                "session_id": str(uuid4()),
-                "created_at": datetime.now().isoformat(),
-                "estimated_duration": self._estimate_duration(parsed_command),
-                "progress": 0
-            }
+            self._check_accepting()
+            self._check_target(task.device, task.pool)
             
-            self.tasks[task_id] = new_task
-            self.task_queue.append(task_id)
-            self.system_status["performance"]["total_tasks"] += 1
-            
-            # Start task execution
-            asyncio.create_task(self._execute_task(task_id))
+            new_task = self._create_task(task.command, task.user_id, task.priority, task.device, task.pool)
             
             # Notify WebSocket clients
             await self._broadcast_task_update(new_task)
             
             return TaskResponse(
-                task_id=task_id,
+                task_id=new_task["task_id"],
                 command=task.command,
                 status=new_task["status"],
                 priority=new_task["priority"],
                 user_id=new_task["user_id"],
                 created_at=new_task["created_at"],
-                estimated_duration=new_task["estimated_duration"]
+                estimated_duration=new_task["estimated_duration"],
+                device=task.device,
+                pool=task.pool
+            )
+        
+        @self.app.post("/tasks/query")
+        async def query_tasks(query: TaskQuery, request: Request):
+            """Tasks matching a filter, oldest first (JSON, columnar JSON or MessagePack)"""
+            tasks, examined = self._select_tasks(query)
+            matched = len(tasks)
+            if query.limit is not None:
+                tasks = tasks[:query.limit]
+            return self._negotiated_response(
+                request, {"tasks": tasks, "matched": matched, "examined": examined},
+                columnar=lambda: {**p6_encoding.tasks_to_columnar(tasks),
+                                  "matched": matched, "examined": examined}
             )
         
+        @self.app.post("/tasks/cancel")
+        async def cancel_tasks(task_filter: TaskFilter):
+            """Cancel every unfinished task matching a filter, published as one batch update"""
+            if not any(value is not None for value in (task_filter.status, task_filter.user_id,
+                                                       task_filter.created_before, task_filter.command_type)):
+                raise HTTPException(status_code=422, detail="Give at least one filter; use /kill-switch to stop everything")
+            if task_filter.status is not None and not set(task_filter.status) <= set(UNFINISHED_STATUSES):
+                raise HTTPException(status_code=400, detail="Only pending or running tasks can be cancelled")
+            tasks, examined = self._select_tasks(task_filter)
+            cancelled = await self._cancel_tasks(tasks)
+            if cancelled:
+                logger.info(f"Cancelled {len(cancelled)} tasks by filter")
+            return {
+                "cancelled": len(cancelled),
+                "task_ids": [task["task_id"] for task in cancelled],
+                "examined": examined
+            }
+        
         @self.app.get("/tasks")
-        async def get_tasks():
-            """Get all tasks"""
-            return {"tasks": list(self.tasks.values())}
+        async def get_tasks(request: Request):
+            """Get all tasks (JSON, columnar JSON or MessagePack)"""
+            tasks = list(self.tasks.values())
+            return self._negotiated_response(
+                request, {"tasks": tasks},
+                columnar=lambda: p6_encoding.tasks_to_columnar(tasks)
+            )
+        
+        @self.app.get("/tasks/export")
+        async def export_tasks(format: str = "ndjson", since: Optional[str] = None,
+                               until: Optional[str] = None, status: Optional[str] = None):
+            """Stream tasks from memory and the history archive as NDJSON or CSV"""
+            if format not in EXPORT_MEDIA_TYPES:
+                raise HTTPException(status_code=400, detail=f"Unknown format: {format}")
+            start = self._parse_time_param(since, "since") if since else 0.0
+            end = self._parse_time_param(until, "until") if until else float("inf")
+            statuses = {value.strip() for value in status.split(",")} if status else set(TASK_STATUSES)
+            unknown = statuses - set(TASK_STATUSES)
+            if unknown:
+                raise HTTPException(status_code=400, detail=f"Unknown status: {', '.join(sorted(unknown))}")
+            
+            # In-memory tasks are the richer copy; archived rows for them are skipped
+            records = [export_record(task) for task in self.tasks.values()]
+            in_memory = {record["task_id"] for record in records}
+            records = [record for record in records if record["status"] in statuses
+                       and start <= self._export_time(record) < end]
+            await run_in_threadpool(self.history.flush)
+            encode = self._csv_row if format == "csv" else self._ndjson_row
+            
+            async def rows():
+                if format == "csv":
+                    yield self._csv_row(dict(zip(EXPORT_FIELDS, EXPORT_FIELDS)))
+                if statuses & set(FINISH_EVENTS):
+                    archive = self.history.finished_tasks(start, end)
+                    done = False
+                    while not done:
+                        chunk, done = await run_in_threadpool(
+                            self._export_archive_batch, archive, in_memory, statuses, encode
+                        )
+                        if chunk:
+                            yield chunk
+                for i in range(0, len(records), EXPORT_BATCH_ROWS):
+                    yield "".join(encode(record) for record in records[i:i + EXPORT_BATCH_ROWS])
+            
+            return StreamingResponse(rows(), media_type=EXPORT_MEDIA_TYPES[format], headers={
+                "Content-Disposition": f'attachment; filename="tasks.{format}"'
+            })
         
         @self.app.get("/tasks/{task_id}")
         async def get_task(task_id: str):
@@ -184,31 +521,248 @@ class StandaloneP6UI:
                 raise HTTPException(status_code=404, detail="Task not found")
             return self.tasks[task_id]
         
-        @self.app.delete("/tasks/{task_id}")
-        async def cancel_task(task_id: str):
-            """Cancel a task"""
+        @self.app.get("/tasks/{task_id}/events")
+        async def stream_task_events(task_id: str, request: Request):
+            """Stream updates for one task as Server-Sent Events"""
             if task_id not in self.tasks:
                 raise HTTPException(status_code=404, detail="Task not found")
             
-            task = self.tasks[task_id]
-            if task["status"] in ["completed", "failed", "cancelled"]:
-                raise HTTPException(status_code=400, detail="Task cannot be cancelled")
+            def snapshot():
+                task = self.tasks.get(task_id)
+                if task is None:
+                    return []
+                return [self.task_events.snapshot_event("task_update", task, task_id)]
             
-            task["status"] = "cancelled"
-            task["cancelled_at"] = datetime.now().isoformat()
-            
-            # Cancel background task if running
-            if task_id in self.active_tasks:
-                self.active_tasks[task_id].cancel()
-                del self.active_tasks[task_id]
+            def is_finished(event):
+                # Decided by the event, so a resumed stream still replays up to the terminal update
+                return event.status in ["completed", "failed", "cancelled"]
             
+            return self._sse_response(self.task_events.stream(
+                self._get_last_event_id(request), snapshot,
+                task_id=task_id, is_finished=is_finished
+            ))
+        
+        @self.app.delete("/tasks/{task_id}")
+        async def cancel_task(task_id: str):
+            """Cancel a task"""
+            task = self._get_cancellable_task(task_id)
+            self._cancel_task(task)
             await self._broadcast_task_update(task)
             return {"message": "Task cancelled successfully"}
         
+        @self.app.post("/workflows")
+        async def create_workflow(workflow: WorkflowCreate):
+            """Submit a DAG of commands; steps run as soon as their dependencies complete"""
+            self._check_accepting()
+            if not workflow.steps:
+                raise HTTPException(status_code=422, detail="A workflow needs at least one step")
+            for step in workflow.steps:
+                self._check_target(step.device, step.pool)
+                self._parse_submitted_command(step.command)
+            
+            try:
+                new_workflow = Workflow(
+                    str(uuid4()), workflow.name, workflow.user_id,
+                    [step.model_dump() if hasattr(step, "model_dump") else step.dict() for step in workflow.steps]
+                )
+            except WorkflowError as e:
+                raise HTTPException(status_code=422, detail=str(e))
+            
+            self.workflows[new_workflow.workflow_id] = new_workflow
+            await self._dispatch_workflow_steps(new_workflow, new_workflow.ready_steps())
+            return new_workflow.to_dict()
+        
+        @self.app.get("/workflows")
+        async def get_workflows():
+            """Get all workflows"""
+            return {"workflows": [workflow.to_dict() for workflow in self.workflows.values()]}
+        
+        @self.app.get("/workflows/{workflow_id}")
+        async def get_workflow(workflow_id: str):
+            """Get a workflow and the state of each step"""
+            if workflow_id not in self.workflows:
+                raise HTTPException(status_code=404, detail="Workflow not found")
+            return self.workflows[workflow_id].to_dict()
+        
+        @self.app.delete("/workflows/{workflow_id}")
+        async def cancel_workflow(workflow_id: str):
+            """Cancel a workflow: running steps are cancelled, pending ones skipped"""
+            if workflow_id not in self.workflows:
+                raise HTTPException(status_code=404, detail="Workflow not found")
+            workflow = self.workflows[workflow_id]
+            if workflow.finished:
+                raise HTTPException(status_code=400, detail="Workflow cannot be cancelled")
+            
+            await self._cancel_tasks([self.tasks[task_id] for task_id in workflow.cancel()
+                                      if task_id in self.tasks])
+            await self._broadcast_workflow_update(workflow)
+            return {"message": "Workflow cancelled successfully"}
+        
+        @self.app.post("/schedules")
+        async def create_schedule(schedule: ScheduleCreate):
+            """Register an at-time, interval or cron schedule for a command"""
+            self._check_accepting()
+            self._check_target(schedule.device, schedule.pool)
+            self._parse_submitted_command(schedule.command)
+            kinds = [kind for kind in ("at", "interval", "cron") if getattr(schedule, kind) is not None]
+            if len(kinds) != 1:
+                raise HTTPException(status_code=422, detail="Give exactly one of at, interval or cron")
+            
+            try:
+                times = {field: parse_time(getattr(schedule, field), field)
+                         for field in ("at", "start_at", "end_at") if getattr(schedule, field) is not None}
+                new_schedule = Schedule(
+                    str(uuid4()), schedule.command, kinds[0], user_id=schedule.user_id,
+                    priority=schedule.priority, device=schedule.device, pool=schedule.pool,
+                    timeout=schedule.timeout, name=schedule.name, interval=schedule.interval,
+                    cron=schedule.cron, max_runs=schedule.max_runs, misfire=schedule.misfire,
+                    misfire_grace=schedule.misfire_grace, overlap=schedule.overlap, **times
+                )
+                self.schedules.add(new_schedule)
+            except ScheduleError as e:
+                raise HTTPException(status_code=422, detail=str(e))
+            
+            logger.info(f"⏰ Schedule {new_schedule.schedule_id} created, next run {new_schedule.to_dict()['next_run']}")
+            return new_schedule.to_dict()
+        
+        @self.app.get("/schedules")
+        async def get_schedules(offset: int = 0, limit: int = 100):
+            """List schedules in creation order, a page at a time"""
+            if offset < 0 or not 1 <= limit <= 1000:
+                raise HTTPException(status_code=400, detail="offset must be >= 0 and limit 1-1000")
+            schedules = list(self.schedules.schedules.values())[offset:offset + limit]
+            return {
+                "schedules": [schedule.to_dict() for schedule in schedules],
+                "total": len(self.schedules.schedules),
+                "stats": self.schedules.get_stats()
+            }
+        
+        @self.app.get("/schedules/{schedule_id}")
+        async def get_schedule(schedule_id: str):
+            """Get a schedule with its next run and run counters"""
+            return self._get_schedule(schedule_id).to_dict()
+        
+        @self.app.delete("/schedules/{schedule_id}")
+        async def delete_schedule(schedule_id: str):
+            """Delete a schedule; a run already submitted keeps going"""
+            self._get_schedule(schedule_id)
+            self.schedules.remove(schedule_id)
+            return {"message": "Schedule deleted successfully"}
+        
+        @self.app.post("/schedules/{schedule_id}/pause")
+        async def pause_schedule(schedule_id: str):
+            """Stop a schedule from firing until it is resumed"""
+            schedule = self._get_schedule(schedule_id)
+            self.schedules.pause(schedule)
+            return schedule.to_dict()
+        
+        @self.app.post("/schedules/{schedule_id}/resume")
+        async def resume_schedule(schedule_id: str):
+            """Resume a paused schedule from its next occurrence"""
+            schedule = self._get_schedule(schedule_id)
+            if schedule.enabled:
+                raise HTTPException(status_code=400, detail="Schedule is not paused")
+            self.schedules.resume(schedule)
+            return schedule.to_dict()
+        
+        @self.app.post("/schedules/{schedule_id}/run")
+        async def run_schedule(schedule_id: str):
+            """Submit a run of the schedule now, outside its timetable"""
+            self._check_accepting()
+            schedule = self._get_schedule(schedule_id)
+            failures = schedule.failures
+            task_id = await self.schedules.run_now(schedule)
+            if task_id is None:
+                if schedule.failures > failures:
+                    raise HTTPException(status_code=422, detail=schedule.last_error)
+                raise HTTPException(status_code=409, detail="The previous run is still in progress")
+            return {"task_id": task_id, "schedule": schedule.to_dict()}
+        
+        @self.app.get("/events")
+        async def stream_events(request: Request):
+            """Stream all task updates as Server-Sent Events"""
+            def snapshot():
+                return [self.task_events.snapshot_event(
+                    "tasks_update", {"tasks": list(self.tasks.values())}
+                )]
+            
+            return self._sse_response(self.task_events.stream(
+                self._get_last_event_id(request), snapshot
+            ))
+        
         @self.app.get("/status")
-        async def get_system_status():
-            """Get system status"""
-            return self.system_status
+        async def get_system_status(request: Request, since: Optional[int] = None, wait: float = 0):
+            """Get system status (JSON or MessagePack); ?since=&wait= long-polls for a newer version"""
+            if since is not None:
+                snapshot = await self.status_board.wait_for_change(since, min(max(wait, 0), STATUS_MAX_WAIT))
+            else:
+                snapshot = self.status_board.current()
+            if snapshot.version == since or request.headers.get("if-none-match") == snapshot.etag:
+                return Response(status_code=304, headers=self._status_headers(snapshot))
+            return self._status_response(request, snapshot)
+        
+        @self.app.get("/devices")
+        async def get_devices():
+            """Get registered Pi5 devices with their health and load"""
+            return {"devices": self.devices.get_status(), "telemetry_client": self.device_http.get_stats()}
+        
+        @self.app.get("/discovery")
+        async def get_discovery():
+            """Pi5 devices found on the LAN, by serial, and the sweep statistics"""
+            if self.discovery is None:
+                return {"enabled": False, "devices": []}
+            devices = []
+            for found in self.discovery.devices.values():
+                device = self.devices.by_serial(found.serial)
+                devices.append({**found.to_dict(), "device_id": device.device_id if device else None})
+            return {"enabled": True, "devices": devices, **self.discovery.get_stats()}
+        
+        @self.app.post("/discovery/scan")
+        async def scan_for_devices(request: Request):
+            """Sweep every address of the discovery subnets now"""
+            self._require_admin(request)
+            if self.discovery is None:
+                raise HTTPException(status_code=400, detail="LAN discovery is not configured (P6_DISCOVERY_SUBNETS)")
+            if self.discovery.sweeping:
+                raise HTTPException(status_code=409, detail="A sweep is already running")
+            result = await self.discovery.full_sweep()
+            if self._apply_discovery():
+                await self._broadcast_system_update()
+            return result
+        
+        @self.app.get("/jobs")
+        async def get_background_jobs():
+            """Get background job statistics"""
+            return {"jobs": self.scheduler.get_stats()}
+        
+        @self.app.get("/analytics")
+        async def get_analytics(window: Optional[str] = None, since: Optional[str] = None,
+                                until: Optional[str] = None, group_by: Optional[str] = None):
+            """Aggregate task history: counts, failure rates, latency percentiles"""
+            end = self._parse_time_param(until, "until") if until else time.time()
+            if since:
+                start = self._parse_time_param(since, "since")
+            else:
+                match = ANALYTICS_WINDOW.match(window or ANALYTICS_DEFAULT_WINDOW)
+                if not match:
+                    raise HTTPException(status_code=400, detail=f"Invalid window: {window}")
+                start = end - int(match.group(1)) * ANALYTICS_WINDOW_UNITS[match.group(2)]
+            fields = [field.strip() for field in (group_by or "").split(",") if field.strip()]
+            unknown = [field for field in fields if field not in GROUP_FIELDS]
+            if unknown:
+                raise HTTPException(status_code=400, detail=f"Cannot group by: {', '.join(unknown)}")
+            
+            result = await run_in_threadpool(self.history.query, start, end, fields)
+            result["history"] = self.history.get_stats()
+            return result
+        
+        @self.app.get("/analytics/tasks/{task_id}")
+        async def get_task_history(task_id: str):
+            """Logged lifecycle events of one task"""
+            events = await run_in_threadpool(self.history.task_events, task_id)
+            if not events:
+                raise HTTPException(status_code=404, detail="Task not found in history")
+            return {"task_id": task_id, "events": events}
         
         @self.app.post("/kill-switch")
         async def activate_kill_switch(request: Request):
@@ -220,12 +774,8 @@ class StandaloneP6UI:
             self.system_status["status"] = "critical"
             
             # Cancel all active tasks
-            for task_id in list(self.active_tasks.keys()):
-                if task_id in self.tasks:
-                    self.tasks[task_id]["status"] = "cancelled"
-                    self.tasks[task_id]["cancelled_at"] = datetime.now().isoformat()
-                    self.active_tasks[task_id].cancel()
-                    del self.active_tasks[task_id]
+            await self._cancel_tasks([self.tasks[task_id] for task_id in list(self.active_tasks)
+                                      if task_id in self.tasks])
             
             await self._broadcast_system_update()
             return {"message": f"Kill switch activated: {reason}"}
@@ -239,36 +789,459 @@ class StandaloneP6UI:
             await self._broadcast_system_update()
             return {"message": "Kill switch reset successfully"}
         
+        @self.app.post("/admin/reload")
+        async def reload_server(request: Request):
+            """Restart into a new process without dropping the listening socket"""
+            self._require_admin(request)
+            if self.draining:
+                raise HTTPException(status_code=409, detail="Reload already in progress")
+            asyncio.create_task(self._graceful_reload())
+            return {"message": "Graceful reload started"}
+        
+        @self.app.post("/admin/profile/cpu")
+        async def start_cpu_profile(request: Request, seconds: float = 10, interval_ms: float = 5):
+            """Start a sampling CPU profile of every thread for the given duration"""
+            self._require_admin(request)
+            if not 0 < seconds <= MAX_PROFILE_SECONDS:
+                raise HTTPException(status_code=400, detail=f"seconds must be in (0, {MAX_PROFILE_SECONDS}]")
+            if not MIN_INTERVAL_MS <= interval_ms <= MAX_INTERVAL_MS:
+                raise HTTPException(status_code=400,
+                                    detail=f"interval_ms must be in [{MIN_INTERVAL_MS}, {MAX_INTERVAL_MS}]")
+            try:
+                self.cpu_profiler.start(seconds, interval_ms)
+            except ProfilerBusy as e:
+                raise HTTPException(status_code=409, detail=str(e))
+            logger.info(f"🔬 CPU profile started for {seconds}s")
+            return self.cpu_profiler.get_status()
+        
+        @self.app.get("/admin/profile/cpu")
+        async def get_cpu_profile(request: Request, limit: int = 20):
+            """Profile progress and the functions with the most self time"""
+            self._require_admin(request)
+            top = await run_in_threadpool(self.cpu_profiler.top, limit)
+            return {**self.cpu_profiler.get_status(), "top": top}
+        
+        @self.app.delete("/admin/profile/cpu")
+        async def stop_cpu_profile(request: Request):
+            """Stop the running CPU profile early"""
+            self._require_admin(request)
+            await run_in_threadpool(self.cpu_profiler.stop)
+            return self.cpu_profiler.get_status()
+        
+        @self.app.get("/admin/profile/cpu/download")
+        async def download_cpu_profile(request: Request, format: str = "collapsed"):
+            """Profile report as collapsed stacks or a pstats file"""
+            self._require_admin(request)
+            if format == "collapsed":
+                body = await run_in_threadpool(self.cpu_profiler.collapsed)
+                return Response(content=body, media_type="text/plain", headers={
+                    "Content-Disposition": 'attachment; filename="p6-cpu.collapsed.txt"'})
+            if format == "pstats":
+                body = await run_in_threadpool(self.cpu_profiler.pstats)
+                return Response(content=body, media_type="application/octet-stream", headers={
+                    "Content-Disposition": 'attachment; filename="p6-cpu.pstats"'})
+            raise HTTPException(status_code=400, detail=f"Unknown format: {format}")
+        
+        @self.app.post("/admin/profile/memory/start")
+        async def start_memory_tracing(request: Request, frames: int = 1):
+            """Start tracing allocations with tracemalloc"""
+            self._require_admin(request)
+            if not 1 <= frames <= 64:
+                raise HTTPException(status_code=400, detail="frames must be in [1, 64]")
+            self.memory_profiler.start(frames)
+            logger.info("🔬 Memory tracing started")
+            return self.memory_profiler.get_status()
+        
+        @self.app.post("/admin/profile/memory/stop")
+        async def stop_memory_tracing(request: Request):
+            """Stop tracing allocations and drop the snapshots"""
+            self._require_admin(request)
+            self.memory_profiler.stop()
+            logger.info("🔬 Memory tracing stopped")
+            return self.memory_profiler.get_status()
+        
+        @self.app.post("/admin/profile/memory/snapshot")
+        async def take_memory_snapshot(request: Request, baseline: bool = False):
+            """Take a snapshot; the first one, or baseline=true, becomes the baseline"""
+            self._require_admin(request)
+            try:
+                return await run_in_threadpool(self.memory_profiler.snapshot, baseline)
+            except RuntimeError as e:
+                raise HTTPException(status_code=409, detail=str(e))
+        
+        @self.app.get("/admin/profile/memory")
+        async def get_memory_profile(request: Request, limit: int = 20, key_type: str = "lineno"):
+            """Top allocation sites of the latest snapshot and growth since the baseline"""
+            self._require_admin(request)
+            if key_type not in KEY_TYPES:
+                raise HTTPException(status_code=400, detail=f"Unknown key_type: {key_type}")
+            try:
+                top = await run_in_threadpool(self.memory_profiler.top, limit, key_type)
+            except RuntimeError as e:
+                raise HTTPException(status_code=409, detail=str(e))
+            return {**self.memory_profiler.get_status(), **top}
+        
+        @self.app.get("/admin/profile/memory/download")
+        async def download_memory_snapshot(request: Request, which: str = "latest"):
+            """Snapshot in tracemalloc dump format"""
+            self._require_admin(request)
+            if which not in ("latest", "baseline"):
+                raise HTTPException(status_code=400, detail=f"Unknown snapshot: {which}")
+            try:
+                body = await run_in_threadpool(self.memory_profiler.dump, which)
+            except RuntimeError as e:
+                raise HTTPException(status_code=409, detail=str(e))
+            return Response(content=body, media_type="application/octet-stream", headers={
+                "Content-Disposition": f'attachment; filename="p6-{which}.tracemalloc"'})
+        
+        @self.app.get("/admin/loop")
+        async def get_loop_health(request: Request):
+            """Event loop lag histogram and stacks of recent blocking calls"""
+            self._require_admin(request)
+            return self.loop_monitor.get_stats()
+        
+        @self.app.get("/admin/profile/objects")
+        async def get_object_counts(request: Request, limit: int = 30):
+            """Live objects by type, with growth since the previous call"""
+            self._require_admin(request)
+            return await run_in_threadpool(object_counts, limit)
+        
+        @self.app.post("/internal/handoff")
+        async def accept_handoff(request: Request):
+            """Take over tasks from the previous process during a reload"""
+            token = request.headers.get("x-handoff-token", "")
+            if not (self.handoff_token and hmac.compare_digest(token, self.handoff_token)):
+                self._require_admin(request)
+            data = await request.json()
+            resumed = 0
+            for task in data.get("tasks", []):
+                if task["task_id"] in self.tasks:
+                    continue
+                self.tasks[task["task_id"]] = task
+                self.task_index.add(task)
+                self.task_queue.append(task["task_id"])
+                if task["status"] == "running":
+                    # Never replay a command the device may already have acted on
+                    self._fail_interrupted_task(task)
+                elif task["status"] == "pending":
+                    task["progress"] = 0
+                    self.active_tasks[task["task_id"]] = asyncio.create_task(
+                        self._execute_task(task["task_id"])
+                    )
+                    resumed += 1
+            logger.info(f"Handoff received: {len(data.get('tasks', []))} tasks, {resumed} resumed")
+            return {"accepted": len(data.get("tasks", [])), "resumed": resumed}
+        
         @self.app.websocket("/ws")
         async def websocket_endpoint(websocket: WebSocket):
             """WebSocket endpoint for real-time updates"""
-            await websocket.accept()
-            self.websocket_connections.append(websocket)
+            # Frame encoding: ?encoding=binary|msgpack or a p6.* subprotocol
+            encoding, subprotocol = p6_encoding.negotiate_ws_encoding(
+                websocket.query_params.get("encoding"),
+                websocket.scope.get("subprotocols", [])
+            )
+            codec = p6_encoding.WebSocketCodec(encoding)
+            ip = websocket.client.host if websocket.client else "unknown"
+            # Admission reserves the slot, so handshakes in flight count against the limits
+            refusal = self.websockets.admit(ip)
+            try:
+                await websocket.accept(subprotocol=subprotocol)
+            except BaseException:
+                if not refusal:
+                    self.websockets.release(ip)
+                raise
+            if refusal:
+                logger.warning(f"⚠️ WebSocket from {ip} refused: {refusal}")
+                await websocket.close(code=WS_TRY_AGAIN_LATER, reason=refusal)
+                return
+            self.websockets.add(websocket, ip, codec)
             
             try:
                 # Send initial system status
-                await websocket.send_json({
+                await self._send_websocket(websocket, {
                     "type": "system_status",
-                    "data": self.system_status
+                    "data": self.status_board.current().data
                 })
                 
                 # Send current tasks
-                await websocket.send_json({
+                await self._send_websocket(websocket, {
                     "type": "tasks_update",
                     "data": {"tasks": list(self.tasks.values())}
                 })
                 
                 while True:
-                    data = await websocket.receive_text()
-                    message = json.loads(data)
+                    frame = await websocket.receive()
+                    if frame["type"] == "websocket.disconnect":
+                        raise WebSocketDisconnect(frame.get("code", 1000))
+                    self.websockets.touch(websocket)
+                    data = frame.get("text") if frame.get("text") is not None else frame.get("bytes")
+                    message = codec.decode(data)
                     await self._handle_websocket_message(websocket, message)
                     
             except WebSocketDisconnect:
-                self.websocket_connections.remove(websocket)
+                await self._remove_websocket(websocket)
             except Exception as e:
                 logger.error(f"WebSocket error: {e}")
-                if websocket in self.websocket_connections:
-                    self.websocket_connections.remove(websocket)
+                await self._remove_websocket(websocket)
+    
+    def _check_accepting(self):
+        """Refuse new work while the server is restarting"""
+        if self.draining:
+            # Restarting: the client retries on a new connection to the new process
+            raise HTTPException(
+                status_code=503, detail="Server is restarting",
+                headers={"Retry-After": "1", "Connection": "close"}
+            )
+    
+    def _check_target(self, device: Optional[str], pool: Optional[str]):
+        """404 for a device or pool that is not registered"""
+        if device and not self.devices.get(device):
+            raise HTTPException(status_code=404, detail=f"Unknown device: {device}")
+        if pool and not self.devices.has_pool(pool):
+            raise HTTPException(status_code=404, detail=f"Unknown device pool: {pool}")
+    
+    def _create_task(self, command: str, user_id: str, priority: int,
+                     device: Optional[str] = None, pool: Optional[str] = None,
+                     **extra: Any) -> Dict[str, Any]:
+        """Register a task and schedule its execution; the caller broadcasts it"""
+        # Parse natural language command; unrunnable commands are refused here
+        parsed_command = self._parse_submitted_command(command)
+        task_id = str(uuid4())
+        
+        new_task = {
+            "task_id": task_id,
+            "command": command,
+            "parsed_command": parsed_command,
+            "status": "pending",
+            "priority": priority,
+            "user_id": user_id,
+            "session_id": str(uuid4()),
+            "created_at": datetime.now().isoformat(),
+            "estimated_duration": self._estimate_duration(parsed_command),
+            "progress": 0,
+            "target_device": device,
+            "target_pool": pool
+        }
+        new_task.update(extra)
+        
+        self.tasks[task_id] = new_task
+        self.task_index.add(new_task)
+        self.task_queue.append(task_id)
+        self.system_status["performance"]["total_tasks"] += 1
+        self.status_board.invalidate()
+        self.history.record("created", new_task)
+        
+        # Start task execution
+        self.active_tasks[task_id] = asyncio.create_task(self._execute_task(task_id))
+        return new_task
+    
+    def _get_cancellable_task(self, task_id: Optional[str]) -> Dict[str, Any]:
+        """The task, or 404/400 if it does not exist or has already finished"""
+        task = self.tasks.get(task_id) if isinstance(task_id, str) else None
+        if task is None:
+            raise HTTPException(status_code=404, detail="Task not found")
+        if task["status"] in ["completed", "failed", "cancelled"]:
+            raise HTTPException(status_code=400, detail="Task cannot be cancelled")
+        return task
+    
+    def _cancel_task(self, task: Dict[str, Any]):
+        """Mark a task cancelled and stop its execution"""
+        task["status"] = "cancelled"
+        task["cancelled_at"] = datetime.now().isoformat()
+        
+        # Cancel background task if running
+        if task["task_id"] in self.active_tasks:
+            self.active_tasks.pop(task["task_id"]).cancel()
+    
+    async def _cancel_tasks(self, tasks: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Cancel the unfinished tasks among these and publish them as one batch"""
+        cancelled = [task for task in tasks if task["status"] in UNFINISHED_STATUSES]
+        for task in cancelled:
+            self._cancel_task(task)
+        if cancelled:
+            await self._broadcast_task_batch(cancelled)
+        return cancelled
+    
+    def _select_tasks(self, task_filter: TaskFilter) -> Tuple[List[Dict[str, Any]], int]:
+        """Tasks matching a filter, oldest first, and how many tasks were examined"""
+        statuses = set(task_filter.status) if task_filter.status is not None else None
+        unknown = (statuses or set()) - set(TASK_STATUSES)
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Unknown status: {', '.join(sorted(unknown))}")
+        created_before = None
+        if task_filter.created_before is not None:
+            cutoff = self._parse_time_param(str(task_filter.created_before), "created_before")
+            created_before = datetime.fromtimestamp(cutoff).isoformat()
+        return self.task_index.select(
+            self.tasks, self.active_tasks, statuses, task_filter.user_id,
+            task_filter.command_type, created_before
+        )
+    
+    async def _dispatch_workflow_steps(self, workflow: Workflow, step_ids: List[str]):
+        """Start ready workflow steps as tasks and publish the workflow state"""
+        new_tasks = []
+        for step_id in step_ids:
+            step = workflow.steps[step_id]
+            task = self._create_task(
+                step["command"], workflow.user_id, step["priority"], step["device"], step["pool"],
+                workflow_id=workflow.workflow_id, step_id=step_id, timeout=step["timeout"]
+            )
+            workflow.mark_dispatched(step_id, task["task_id"])
+            new_tasks.append(task)
+        
+        for task in new_tasks:
+            await self._broadcast_task_update(task)
+        await self._broadcast_workflow_update(workflow)
+    
+    async def _advance_workflow(self, task: Dict[str, Any]):
+        """A workflow step finished: dispatch whatever it unblocked"""
+        workflow = self.workflows.get(task["workflow_id"])
+        if workflow is None or task["status"] not in ["completed", "failed", "cancelled"]:
+            return
+        ready = workflow.step_finished(task["step_id"], task["status"])
+        if workflow.cancelled:
+            ready = []
+        await self._dispatch_workflow_steps(workflow, ready)
+        if workflow.finished:
+            logger.info(f"Workflow {workflow.workflow_id} {workflow.status}")
+    
+    async def _broadcast_workflow_update(self, workflow: Workflow):
+        """Broadcast workflow progress to all WebSocket clients"""
+        await self._broadcast_message({
+            "type": "workflow_update",
+            "data": workflow.to_dict()
+        })
+    
+    def _get_schedule(self, schedule_id: str) -> Schedule:
+        """The schedule, or 404"""
+        schedule = self.schedules.schedules.get(schedule_id)
+        if schedule is None:
+            raise HTTPException(status_code=404, detail="Schedule not found")
+        return schedule
+    
+    async def _submit_scheduled_task(self, schedule: Schedule, due: float) -> Optional[str]:
+        """Submit one run of a schedule as a task; None while the server is restarting"""
+        if self.draining:
+            return None
+        task = self._create_task(
+            schedule.command, schedule.user_id, schedule.priority, schedule.device, schedule.pool,
+            schedule_id=schedule.schedule_id, scheduled_for=datetime.fromtimestamp(due).isoformat(),
+            timeout=schedule.timeout
+        )
+        await self._broadcast_task_update(task)
+        return task["task_id"]
+    
+    async def _cancel_scheduled_task(self, task_id: str):
+        """Cancel a schedule's previous run that is being replaced"""
+        task = self.tasks.get(task_id)
+        if task and task["status"] not in ["completed", "failed", "cancelled"]:
+            self._cancel_task(task)
+            await self._broadcast_task_update(task)
+    
+    def _require_admin(self, request: Request):
+        """Allow the request only with the admin token, or from loopback when none is set"""
+        if ADMIN_TOKEN:
+            if hmac.compare_digest(request.headers.get("x-admin-token", ""), ADMIN_TOKEN):
+                return
+        elif request.client and request.client.host in ("127.0.0.1", "::1", "localhost"):
+            return
+        raise HTTPException(status_code=403, detail="Admin access required")
+    
+    def _parse_time_param(self, value: str, name: str) -> float:
+        """Epoch seconds or an ISO timestamp from a query parameter"""
+        try:
+            return float(value)
+        except ValueError:
+            pass
+        try:
+            return datetime.fromisoformat(value).timestamp()
+        except ValueError:
+            raise HTTPException(status_code=400, detail=f"Invalid {name}: {value}")
+    
+    def _negotiated_response(self, request: Request, data: Dict[str, Any], columnar=None):
+        """Encode a read response in the format and compression the client asked for"""
+        media_type = p6_encoding.negotiate(
+            request.headers.get("accept"), request.query_params.get("format")
+        )
+        if media_type == p6_encoding.COLUMNAR_TYPE:
+            if columnar is None:
+                media_type = p6_encoding.JSON_TYPE
+            else:
+                data = columnar()
+        
+        body = p6_encoding.encode(data, media_type)
+        body, encoding = p6_encoding.compress(body, request.headers.get("accept-encoding"))
+        
+        headers = {"Vary": "Accept, Accept-Encoding"}
+        if encoding:
+            headers["Content-Encoding"] = encoding
+        return Response(content=body, media_type=media_type, headers=headers)
+    
+    def _export_time(self, record: Dict[str, Any]) -> float:
+        """Export time filters apply to finish time, or creation time while unfinished"""
+        return datetime.fromisoformat(record["finished_at"] or record["created_at"]).timestamp()
+    
+    def _export_archive_batch(self, archive, skip_ids, statuses, encode) -> Tuple[str, bool]:
+        """Next batch of encoded archive rows, and whether the archive is exhausted"""
+        lines = []
+        for row in archive:
+            if row["id"] in skip_ids or row["e"] not in statuses:
+                continue
+            lines.append(encode(archived_record(row)))
+            if len(lines) >= EXPORT_BATCH_ROWS:
+                return "".join(lines), False
+        return "".join(lines), True
+    
+    def _ndjson_row(self, record: Dict[str, Any]) -> str:
+        return json.dumps(record, separators=(",", ":")) + "\n"
+    
+    def _csv_row(self, record: Dict[str, Any]) -> str:
+        buffer = io.StringIO()
+        csv.writer(buffer).writerow(["" if record[field] is None else record[field] for field in EXPORT_FIELDS])
+        return buffer.getvalue()
+    
+    def _status_headers(self, snapshot: StatusSnapshot) -> Dict[str, str]:
+        return {
+            "ETag": snapshot.etag,
+            "X-Status-Version": str(snapshot.version),
+            "Cache-Control": "no-cache",
+        }
+    
+    def _status_response(self, request: Request, snapshot: StatusSnapshot) -> Response:
+        """A status snapshot, encoded once per format and compression"""
+        media_type = p6_encoding.negotiate(
+            request.headers.get("accept"), request.query_params.get("format")
+        )
+        if media_type == p6_encoding.COLUMNAR_TYPE:
+            media_type = p6_encoding.JSON_TYPE
+        gzip_ok = "gzip" in (request.headers.get("accept-encoding") or "")
+        
+        body, encoding = snapshot.encoded((media_type, gzip_ok), lambda: p6_encoding.compress(
+            p6_encoding.encode(snapshot.data, media_type), "gzip" if gzip_ok else None
+        ))
+        headers = {"Vary": "Accept, Accept-Encoding", **self._status_headers(snapshot)}
+        if encoding:
+            headers["Content-Encoding"] = encoding
+        return Response(content=body, media_type=media_type, headers=headers)
+    
+    def _get_last_event_id(self, request: Request) -> Optional[int]:
+        """Resume point from the Last-Event-ID header or last_event_id query"""
+        value = request.headers.get("last-event-id") or request.query_params.get("last_event_id")
+        try:
+            return int(value) if value else None
+        except ValueError:
+            return None
+    
+    def _sse_response(self, frames) -> StreamingResponse:
+        """Wrap an SSE frame generator in a non-buffered streaming response"""
+        return StreamingResponse(
+            frames,
+            media_type="text/event-stream",
+            headers={
+                "Cache-Control": "no-cache",
+                "X-Accel-Buffering": "no"
+            }
+        )
     
     def _get_ui_html(self) -> str:
         """Generate the complete UI HTML"""
@@ -600,6 +1573,10 @@ class StandaloneP6UI:
                 this.connected = false;
                 this.tasks = [];
                 this.systemStatus = {{}};
+                this.lastEventId = null;
+                this.reconnectDelay = 3000;
+                this.pendingAcks = new Map();
+                this.nextRequestId = 1;
                 
                 this.init();
             }}
@@ -615,7 +1592,12 @@ class StandaloneP6UI:
                 
                 this.ws.onopen = () => {{
                     this.connected = true;
+                    this.reconnectDelay = 3000;
                     console.log('✅ Connected to DexiMind P6 UI');
+                    if (this.lastEventId !== null) {{
+                        // Catch up on task updates missed while disconnected
+                        this.ws.send(JSON.stringify({{ type: 'resume', data: {{ last_event_id: this.lastEventId }} }}));
+                    }}
                     this.updateConnectionStatus('Connected', '#28a745');
                     this.addNotification({{
                         type: 'success',
@@ -636,6 +1618,7 @@ class StandaloneP6UI:
                 
                 this.ws.onclose = (event) => {{
                     this.connected = false;
+                    this.failPendingAcks('Connection closed');
                     console.log('❌ Disconnected from DexiMind P6 UI:', event.code, event.reason);
                     this.updateConnectionStatus('Disconnected', '#dc3545');
                     this.addNotification({{
@@ -643,11 +1626,11 @@ class StandaloneP6UI:
                         title: 'Disconnected',
                         message: 'Lost connection to DexiMind API. Attempting to reconnect...'
                     }});
-                    // Attempt to reconnect after 3 seconds
+                    // Attempt to reconnect (sooner when the server is restarting)
                     setTimeout(() => {{
                         console.log('🔄 Attempting to reconnect...');
                         this.connectWebSocket();
-                    }}, 3000);
+                    }}, this.reconnectDelay);
                 }};
                 
                 this.ws.onerror = (error) => {{
@@ -684,6 +1667,9 @@ class StandaloneP6UI:
             }}
             
             handleMessage(data) {{
+                if (data.event_id) {{
+                    this.lastEventId = data.event_id;
+                }}
                 switch (data.type) {{
                     case 'system_status':
                         this.updateSystemStatus(data.data);
@@ -694,12 +1680,78 @@ class StandaloneP6UI:
                     case 'task_update':
                         this.updateTask(data.data);
                         break;
+                    case 'task_batch':
+                        this.updateTaskBatch(data.data.tasks);
+                        break;
                     case 'notification':
                         this.addNotification(data.data);
                         break;
+                    case 'heartbeat':
+                        this.ws.send(JSON.stringify({{ type: 'heartbeat_ack' }}));
+                        break;
+                    case 'ack':
+                        this.handleAck(data);
+                        break;
+                    case 'reconnect':
+                        this.reconnectDelay = data.data.retry_ms;
+                        if (this.lastEventId === null) {{
+                            this.lastEventId = data.data.resume_from;
+                        }}
+                        break;
                 }}
             }}
             
+            sendRequest(type, data) {{
+                // Resolves with the server's ack for this request id
+                return new Promise((resolve, reject) => {{
+                    const id = String(this.nextRequestId++);
+                    const timer = setTimeout(() => {{
+                        this.pendingAcks.delete(id);
+                        reject(new Error('No response from server'));
+                    }}, 10000);
+                    this.pendingAcks.set(id, {{ resolve, reject, timer }});
+                    this.ws.send(JSON.stringify({{ type: type, id: id, data: data }}));
+                }});
+            }}
+            
+            handleAck(message) {{
+                const pending = this.pendingAcks.get(message.id);
+                if (!pending) return;
+                this.pendingAcks.delete(message.id);
+                clearTimeout(pending.timer);
+                if (message.ok) {{
+                    pending.resolve(message.data);
+                }} else {{
+                    const detail = message.error.detail;
+                    pending.reject(new Error(typeof detail === 'string' ? detail : JSON.stringify(detail)));
+                }}
+            }}
+            
+            failPendingAcks(reason) {{
+                for (const pending of this.pendingAcks.values()) {{
+                    clearTimeout(pending.timer);
+                    pending.reject(new Error(reason));
+                }}
+                this.pendingAcks.clear();
+            }}
+            
+            async submitTask(payload) {{
+                // Over the open WebSocket when possible, otherwise POST /tasks
+                if (this.ws && this.ws.readyState === WebSocket.OPEN) {{
+                    return this.sendRequest('submit_task', payload);
+                }}
+                const response = await fetch('/tasks', {{
+                    method: 'POST',
+                    headers: {{ 'Content-Type': 'application/json' }},
+                    body: JSON.stringify(payload)
+                }});
+                const body = await response.json();
+                if (!response.ok) {{
+                    throw new Error(typeof body.detail === 'string' ? body.detail : 'Failed to create task');
+                }}
+                return body;
+            }}
+            
             async createTask() {{
                 const command = document.getElementById('command-input').value.trim();
                 if (!command) return;
@@ -715,32 +1767,23 @@ class StandaloneP6UI:
                 }}
                 
                 try {{
-                    const response = await fetch('/tasks', {{
-                        method: 'POST',
-                        headers: {{ 'Content-Type': 'application/json' }},
-                        body: JSON.stringify({{
-                            command: command,
-                            user_id: 'web_user',
-                            priority: 5
-                        }})
+                    await this.submitTask({{
+                        command: command,
+                        user_id: 'web_user',
+                        priority: 5
+                    }});
+                    document.getElementById('command-input').value = '';
+                    this.addNotification({{
+                        type: 'success',
+                        title: 'Task Created',
+                        message: `Task created: ${{command}}`
                     }});
-                    
-                    if (response.ok) {{
-                        document.getElementById('command-input').value = '';
-                        this.addNotification({{
-                            type: 'success',
-                            title: 'Task Created',
-                            message: `Task created: ${{command}}`
-                        }});
-                    }} else {{
-                        throw new Error('Failed to create task');
-                    }}
                 }} catch (error) {{
                     console.error('Error creating task:', error);
                     this.addNotification({{
                         type: 'error',
                         title: 'Error',
-                        message: 'Failed to create task'
+                        message: `Failed to create task: ${{error.message}}`
                     }});
                 }}
             }}
@@ -751,13 +1794,22 @@ class StandaloneP6UI:
             }}
             
             updateTask(task) {{
+                this.mergeTask(task);
+                this.renderTasks();
+            }}
+            
+            updateTaskBatch(tasks) {{
+                tasks.forEach(task => this.mergeTask(task));
+                this.renderTasks();
+            }}
+            
+            mergeTask(task) {{
                 const existingIndex = this.tasks.findIndex(t => t.task_id === task.task_id);
                 if (existingIndex >= 0) {{
                     this.tasks[existingIndex] = task;
                 }} else {{
                     this.tasks.push(task);
                 }}
-                this.renderTasks();
             }}
             
             renderTasks() {{
@@ -800,9 +1852,11 @@ class StandaloneP6UI:
                 
                 // Update metrics
                 if (status.performance) {{
-                    document.getElementById('cpu-percent').textContent = Math.round(status.performance.cpu_percent || 0) + '%';
-                    document.getElementById('memory-percent').textContent = Math.round(status.performance.memory_percent || 0) + '%';
-                    document.getElementById('latency-p80').textContent = Math.round(status.performance.latency_p80 || 0) + 'ms';
+                    // Live values are null until a device or task has reported one
+                    const metric = (value, unit) => value == null ? '--' : Math.round(value) + unit;
+                    document.getElementById('cpu-percent').textContent = metric(status.performance.cpu_percent, '%');
+                    document.getElementById('memory-percent').textContent = metric(status.performance.memory_percent, '%');
+                    document.getElementById('latency-p80').textContent = metric(status.performance.latency_p80, 'ms');
                     document.getElementById('accuracy').textContent = Math.round(status.performance.accuracy || 0) + '%';
                 }}
             }}
@@ -870,12 +1924,12 @@ class StandaloneP6UI:
 </html>
         """
     
-    def _parse_command(self, command: str) -> Dict[str, Any]:
+    def _parse_command(self, command: str, corrected: bool = False) -> Dict[str, Any]:
         """Parse natural language command into structured format"""
         command_lower = command.lower()
         
         # Click commands
-        if any(word in command_lower for word in ['click', 'press', 'tap']):
+        if any(word in command_lower for word in INTENT_KEYWORDS["click"]):
             return {
                 "type": "click",
                 "target": self._extract_target(command),
@@ -883,7 +1937,7 @@ class StandaloneP6UI:
             }
         
         # Type commands
-        elif any(word in command_lower for word in ['type', 'enter', 'write', 'input']):
+        elif any(word in command_lower for word in INTENT_KEYWORDS["type"]):
             return {
                 "type": "type",
                 "text": self._extract_text(command),
@@ -892,7 +1946,7 @@ class StandaloneP6UI:
             }
         
         # Navigate commands
-        elif any(word in command_lower for word in ['navigate', 'go', 'open', 'visit']):
+        elif any(word in command_lower for word in INTENT_KEYWORDS["navigate"]):
             return {
                 "type": "navigate",
                 "target": self._extract_target(command),
@@ -900,7 +1954,7 @@ class StandaloneP6UI:
             }
         
         # Scroll commands
-        elif any(word in command_lower for word in ['scroll', 'move']):
+        elif any(word in command_lower for word in INTENT_KEYWORDS["scroll"]):
             return {
                 "type": "scroll",
                 "direction": self._extract_direction(command),
@@ -908,20 +1962,40 @@ class StandaloneP6UI:
             }
         
         # Search commands
-        elif any(word in command_lower for word in ['search', 'find', 'look']):
+        elif any(word in command_lower for word in INTENT_KEYWORDS["search"]):
             return {
                 "type": "search",
                 "query": self._extract_query(command),
                 "confidence": 0.8
             }
         
+        # Misspelled keywords: retry with the nearest vocabulary words
+        match = None if corrected else self.intent_matcher.correct(command)
+        if match:
+            parsed = self._parse_command(match["command"], corrected=True)
+            parsed["confidence"] = round(parsed["confidence"] * match["confidence"], 3)
+            parsed["corrected_command"] = match["command"]
+            parsed["corrections"] = match["corrections"]
+            return parsed
+        
         # Default
-        else:
-            return {
-                "type": "unknown",
-                "original_command": command,
-                "confidence": 0.5
-            }
+        return {
+            "type": "unknown",
+            "original_command": command,
+            "confidence": 0.5
+        }
+    
+    def _parse_submitted_command(self, command: str) -> Dict[str, Any]:
+        """Parse a submitted command; 422 if it maps to no device action"""
+        parsed_command = self._parse_command(command)
+        if self._map_to_hid_command(parsed_command) is None:
+            action = parsed_command["type"]
+            reason = "not understood" if action == "unknown" else f"'{action}' has no device action"
+            raise HTTPException(
+                status_code=422,
+                detail=f"Command {reason}: {command!r} (supported: click, type, scroll)"
+            )
+        return parsed_command
     
     def _extract_target(self, command: str) -> str:
         """Extract target element from command"""
@@ -1001,14 +2075,23 @@ class StandaloneP6UI:
             return
         
         task = self.tasks[task_id]
-        task["status"] = "running"
         self.system_status["performance"]["active_tasks"] += 1
-        
-        await self._broadcast_task_update(task)
+        self.status_board.invalidate()
         
         try:
-            # Execute command on Pi5
-            success = await self._execute_on_pi5(task["command"], task["parsed_command"])
+            # Route to the least-loaded healthy device for the task's target
+            device = self.devices.select(task.get("target_device"), task.get("target_pool"))
+            task["device"] = device.device_id
+            
+            # Tasks on one device run one at a time, in priority order
+            ticket = device.lane.enqueue(task["priority"])
+            try:
+                # Workflow steps may carry their own timeout, queue wait included
+                success = await asyncio.wait_for(self._execute_on_pi5(
+                    task["command"], task["parsed_command"], task_id, device, ticket
+                ), timeout=task.get("timeout"))
+            finally:
+                device.lane.release(ticket)
             
             if success:
                 task["status"] = "completed"
@@ -1031,27 +2114,62 @@ class StandaloneP6UI:
                     "message": f"Task failed: {task['command']}"
                 })
                 
+        except NoDeviceAvailable as e:
+            # Routing refused the task: nothing was sent to any device
+            logger.warning(f"⚠️ Task {task_id} not run: {e}")
+            task["status"] = "failed"
+            task["progress"] = 0
+            task["failed_at"] = datetime.now().isoformat()
+            task["error"] = str(e)
+            
+            await self._broadcast_notification({
+                "type": "error",
+                "title": "No Device Available",
+                "message": f"Task not run: {e}"
+            })
+                
         except Exception as e:
-            logger.error(f"Error executing task {task_id}: {e}")
+            error = f"Timed out after {task['timeout']}s" if isinstance(e, asyncio.TimeoutError) else str(e)
+            logger.error(f"Error executing task {task_id}: {error}")
             task["status"] = "failed"
             task["progress"] = 0
             task["failed_at"] = datetime.now().isoformat()
+            task["error"] = error
             
             await self._broadcast_notification({
                 "type": "error",
                 "title": "Task Error",
-                "message": f"Task error: {str(e)}"
+                "message": f"Task error: {error}"
             })
         
         finally:
+            self.active_tasks.pop(task_id, None)
             self.system_status["performance"]["active_tasks"] -= 1
-            await self._broadcast_task_update(task)
+            self.status_board.invalidate()
+            output = self.task_output.pop(task_id, None)
+            if output:
+                task["output_tail"] = list(output)
+            if task["status"] in ("completed", "failed", "cancelled"):
+                self.history.record(task["status"], task)
+                self._record_task_metrics(task["status"], task)
+            if task["status"] != "cancelled":
+                # Whoever cancels a task publishes it, in one batch for bulk cancels
+                await self._broadcast_task_update(task)
+            if task.get("workflow_id"):
+                await self._advance_workflow(task)
     
-    async def _execute_on_pi5(self, command: str, parsed_command: Dict[str, Any]) -> bool:
-        """Execute command on Pi5"""
+    async def _execute_on_pi5(self, command: str, parsed_command: Dict[str, Any],
+                              task_id: Optional[str] = None, device: Optional[Pi5Device] = None,
+                              ticket: Optional[LaneTicket] = None) -> bool:
+        """Execute command on a Pi5, streaming its output into task progress.
+        
+        With a lane ticket, the SSH session is opened as soon as the task is
+        next in line and held at a gate until the device is free.
+        """
+        device = device or self.devices.select()
+        process = None
+        admitted = False
         try:
-            import subprocess
-            
             # Map parsed command to Pi5 HID command
             hid_command = self._map_to_hid_command(parsed_command)
             
@@ -1059,26 +2177,189 @@ class StandaloneP6UI:
                 logger.error(f"Cannot map command to HID: {command}")
                 return False
             
-            # Execute on Pi5
-            cmd = [
-                "ssh", "-i", "C:/Users/hp/.ssh/id_rsa",
-                "hp@192.168.1.7",
-                f"sudo /tmp/hid_executor.sh {hid_command}"
-            ]
+            output: Deque[str] = deque(maxlen=OUTPUT_TAIL_LINES)
+            if task_id:
+                self.task_output[task_id] = output
             
-            result = subprocess.run(cmd, capture_output=True, text=True, timeout=30)
+            if ticket:
+                await ticket.on_deck.wait()
             
-            if result.returncode == 0:
-                logger.info(f"✅ Pi5 command executed: {hid_command}")
-                return True
-            else:
-                logger.error(f"❌ Pi5 command failed: {result.stderr}")
-                return False
+            # Fail fast while the device's circuit is open
+            device.breaker.check()
+            admitted = True
+            generation = device.generation
+            process = await self._open_pi5_session(device, hid_command)
+            
+            if ticket and not ticket.turn.is_set():
+                # Connected while the previous task runs; start the moment it ends
+                device.lane.mark_pipelined()
+                await ticket.turn.wait()
+            
+            # Pace dispatches while the device runs hot or loaded
+            throttled = await device.throttle.wait()
+            if throttled and task_id in self.tasks:
+                self.tasks[task_id]["throttle_wait_ms"] = round(throttled * 1000)
+            
+            if self.draining:
+                # Restarting: the task stays pending and is handed to the new process
+                await asyncio.Event().wait()
+            
+            if device.generation != generation:
+                # The device moved while this session waited: its gate leads to the old address
+                if process.returncode is None:
+                    process.kill()
+                    await process.wait()
+                logger.info(f"📍 Reconnecting task {task_id} to {device.device_id} at {device.host}")
+                if task_id in self.tasks:
+                    self.tasks[task_id]["reconnected_to"] = device.host
+                # The move reset the breaker and with it this request's admission (and any
+                # probe slot it held): admit it once more, against the new address
+                admitted = False
+                generation = device.generation
+                device.breaker.check()
+                admitted = True
+                process = await self._open_pi5_session(device, hid_command)
+            
+            if task_id in self.tasks:
+                task = self.tasks[task_id]
+                task["status"] = "running"
+                task["started_at"] = datetime.now().isoformat()
+                self.history.record("started", task)
+                self._record_task_metrics("started", task)
+                await self._broadcast_task_update(task)
+            
+            device.record_start()
+            started = time.perf_counter()
+            success = False
+            try:
+                success = await self._run_pi5_session(process, device, hid_command, task_id, output, generation)
+            finally:
+                device.record_finish((time.perf_counter() - started) * 1000, success)
+            return success
                 
+        except asyncio.CancelledError:
+            if process and process.returncode is None:
+                process.kill()
+            if admitted and device.generation == generation:
+                # Only a request the breaker let in holds its probe slot
+                device.breaker.abandon()
+            raise
+        except CircuitOpenError:
+            raise
         except Exception as e:
             logger.error(f"Error executing on Pi5: {e}")
+            if process and process.returncode is None:
+                process.kill()
+            if admitted and device.generation == generation:
+                # No outcome was recorded for the admitted request: don't leave its probe slot held
+                device.record_outcome(generation, False)
             return False
     
+    async def _open_pi5_session(self, device: Pi5Device, hid_command: str) -> asyncio.subprocess.Process:
+        """Connect to the device with the HID command waiting on a stdin gate"""
+        cmd = [
+            "ssh", "-i", device.ssh_key,
+            "-o", f"ConnectTimeout={PI5_CONNECT_TIMEOUT}", "-o", "BatchMode=yes",
+            device.ssh_target,
+            # Runs only once the gate line arrives; closing stdin without it aborts
+            f"read -r _ && sudo /tmp/hid_executor.sh {hid_command}"
+        ]
+        # A failure to start ssh is counted against the breaker by the caller
+        return await asyncio.create_subprocess_exec(
+            *cmd,
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE
+        )
+    
+    async def _run_pi5_session(self, process: asyncio.subprocess.Process, device: Pi5Device,
+                               hid_command: str, task_id: Optional[str], output: Deque[str],
+                               generation: int) -> bool:
+        """Open the gate of a prepared session and wait for the command to finish"""
+        if process.returncode is None:
+            try:
+                process.stdin.write(b"go\n")
+                await process.stdin.drain()
+                process.stdin.close()
+            except (BrokenPipeError, ConnectionResetError):
+                # SSH already gave up; its exit status says why
+                pass
+        
+        try:
+            await asyncio.wait_for(asyncio.gather(
+                self._read_remote_stream(process.stdout, "stdout", task_id, output),
+                self._read_remote_stream(process.stderr, "stderr", task_id, output),
+                process.wait()
+            ), timeout=PI5_COMMAND_TIMEOUT)
+        except asyncio.TimeoutError:
+            process.kill()
+            await process.wait()
+            device.record_outcome(generation, False)
+            logger.error(f"❌ Pi5 command timed out after {PI5_COMMAND_TIMEOUT}s: {hid_command}")
+            return False
+        
+        # Only connection-level failures count against the device
+        device.record_outcome(generation, process.returncode != SSH_CONNECTION_ERROR)
+        
+        if process.returncode == 0:
+            logger.info(f"✅ Pi5 command executed on {device.device_id}: {hid_command}")
+            return True
+        
+        errors = [line for line in output if line.startswith("[stderr]")]
+        logger.error(f"❌ Pi5 command failed on {device.device_id}: "
+                     f"{errors[-1] if errors else process.returncode}")
+        return False
+    
+    async def _read_remote_stream(self, stream: asyncio.StreamReader, name: str,
+                                  task_id: Optional[str], output: Deque[str]):
+        """Read remote output incrementally, line by line, with bounded line length"""
+        pending = b""
+        truncating = False
+        
+        while True:
+            chunk = await stream.read(OUTPUT_READ_CHUNK)
+            if not chunk:
+                break
+            
+            pending += chunk
+            *lines, pending = pending.split(b"\n")
+            for line in lines:
+                if truncating:
+                    # Remainder of an over-long line that was already handled
+                    truncating = False
+                    continue
+                await self._handle_remote_line(line, name, task_id, output)
+            
+            if len(pending) > OUTPUT_LINE_LIMIT and not truncating:
+                await self._handle_remote_line(pending[:OUTPUT_LINE_LIMIT], name, task_id, output)
+                truncating = True
+            if truncating:
+                pending = b""
+        
+        if pending and not truncating:
+            await self._handle_remote_line(pending, name, task_id, output)
+    
+    async def _handle_remote_line(self, raw_line: bytes, name: str,
+                                  task_id: Optional[str], output: Deque[str]):
+        """Record one line of remote output and apply any progress marker"""
+        line = raw_line[:OUTPUT_LINE_LIMIT].decode("utf-8", errors="replace").rstrip("\r")
+        output.append(f"[{name}] {line}")
+        
+        match = PROGRESS_MARKER.match(line)
+        if not match or task_id not in self.tasks:
+            return
+        
+        task = self.tasks[task_id]
+        progress = min(100, int(match.group(1)))
+        message = (match.group(2) or "").strip()
+        if progress == task.get("progress") and message == task.get("progress_message", ""):
+            return
+        
+        task["progress"] = progress
+        if message:
+            task["progress_message"] = message
+        await self._broadcast_task_update(task)
+    
     def _map_to_hid_command(self, parsed_command: Dict[str, Any]) -> Optional[str]:
         """Map parsed command to Pi5 HID command"""
         command_type = parsed_command.get("type", "unknown")
@@ -1108,21 +2389,47 @@ class StandaloneP6UI:
         return None
     
     async def _broadcast_task_update(self, task: Dict[str, Any]):
-        """Broadcast task update to all WebSocket clients"""
+        """Broadcast task update to all WebSocket and SSE clients"""
+        event_id = self.task_events.publish("task_update", task, task.get("task_id"))
         message = {
             "type": "task_update",
+            "event_id": event_id,
             "data": task
         }
         await self._broadcast_message(message)
     
+    async def _broadcast_task_batch(self, tasks: List[Dict[str, Any]]):
+        """Broadcast many task updates as one message to all WebSocket and SSE clients"""
+        # Single-task SSE streams still get a task_update for their own task
+        event_id = self.task_events.publish_batch("task_batch", tasks)
+        await self._broadcast_message({
+            "type": "task_batch",
+            "event_id": event_id,
+            "data": {"tasks": tasks}
+        })
+    
     async def _broadcast_system_update(self):
         """Broadcast system status update to all WebSocket clients"""
         message = {
             "type": "system_status",
-            "data": self.system_status
+            "data": self.status_board.refresh().data
         }
         await self._broadcast_message(message)
     
+    def _current_status(self) -> Dict[str, Any]:
+        """System status with the current task metric windows"""
+        self.system_status["performance"]["windows"] = self.task_metrics.snapshot()
+        self.system_status["connections"] = self.websockets.get_stats()
+        return self.system_status
+    
+    def _record_task_metrics(self, outcome: str, task: Dict[str, Any]):
+        """Count a task transition in the sliding-window metrics"""
+        latency_ms = None
+        if outcome in ("completed", "failed") and task.get("started_at"):
+            started = datetime.fromisoformat(task["started_at"])
+            latency_ms = (datetime.now() - started).total_seconds() * 1000
+        self.task_metrics.record(outcome, task["parsed_command"].get("type", "unknown"), latency_ms)
+    
     async def _broadcast_notification(self, notification: Dict[str, Any]):
         """Broadcast notification to all WebSocket clients"""
         message = {
@@ -1133,73 +2440,508 @@ class StandaloneP6UI:
     
     async def _broadcast_message(self, message: Dict[str, Any]):
         """Broadcast message to all WebSocket clients"""
-        if not self.websocket_connections:
+        if not self.websockets:
             return
         
-        message_str = json.dumps(message)
+        # Serialized once per format, compressed per connection
+        cache: Dict[str, Any] = {"json": json.dumps(message)}
         disconnected = []
         
-        for websocket in self.websocket_connections:
+        for websocket in self.websockets:
             try:
-                await websocket.send_text(message_str)
-            except:
+                await self._send_websocket(websocket, message, cache=cache)
+            except Exception:
                 disconnected.append(websocket)
         
-        # Remove disconnected clients
+        # Remove and close clients that failed or stalled
         for websocket in disconnected:
-            if websocket in self.websocket_connections:
-                self.websocket_connections.remove(websocket)
+            await self._remove_websocket(websocket)
+    
+    async def _send_websocket(self, websocket: WebSocket, message: Optional[Dict[str, Any]] = None,
+                              text: Optional[str] = None, cache: Optional[Dict[str, Any]] = None):
+        """Send one message in the connection's negotiated frame encoding"""
+        client = self.websockets.get(websocket)
+        if client is None:
+            send = websocket.send_text(text if text is not None else json.dumps(message))
+        else:
+            frame = client.codec.encode(message, text=text, cache=cache)
+            send = websocket.send_bytes(frame) if isinstance(frame, bytes) else websocket.send_text(frame)
+        
+        # A stalled client must not hold up a broadcast to everyone else
+        await asyncio.wait_for(send, timeout=WS_SEND_TIMEOUT)
+    
+    async def _remove_websocket(self, websocket: WebSocket, code: int = 1011):
+        """Forget a WebSocket connection and close it if it is still open"""
+        self.websockets.remove(websocket)
+        if (websocket.client_state == WebSocketState.DISCONNECTED
+                or websocket.application_state == WebSocketState.DISCONNECTED):
+            return
+        try:
+            await asyncio.wait_for(websocket.close(code=code), timeout=WS_CLOSE_TIMEOUT)
+        except Exception:
+            pass
+    
+    async def _websocket_heartbeat(self):
+        """Drop silent WebSocket clients and send a heartbeat to the rest"""
+        for client in self.websockets.idle():
+            self.websockets.reap(client.websocket)
+            logger.info(f"Reaped idle WebSocket client {client.ip}")
+            try:
+                await asyncio.wait_for(client.websocket.close(code=1001), timeout=WS_CLOSE_TIMEOUT)
+            except Exception:
+                pass
+        
+        await self._broadcast_message({"type": "heartbeat", "data": {"timestamp": time.time()}})
     
     async def _handle_websocket_message(self, websocket: WebSocket, message: Dict[str, Any]):
         """Handle incoming WebSocket message"""
         message_type = message.get("type")
         
         if message_type == "ping":
-            await websocket.send_text(json.dumps({"type": "pong"}))
+            await self._send_websocket(websocket, {"type": "pong"})
+        
+        elif message_type == "resume":
+            # Reconnect after a restart: replay missed task updates if still buffered
+            last_event_id = message.get("data", {}).get("last_event_id")
+            if isinstance(last_event_id, int) and self.task_events.can_resume(last_event_id):
+                for event in self.task_events.replay(last_event_id):
+                    await self._send_websocket(websocket, text=(
+                        f'{{"type": "{event.event_type}", "event_id": {event.event_id}, "data": {event.payload}}}'
+                    ))
+            else:
+                await self._send_websocket(websocket, {
+                    "type": "tasks_update",
+                    "data": {"tasks": list(self.tasks.values())}
+                })
+        
+        elif message_type in ("submit_task", "cancel_task"):
+            # Acked with the client's correlation id; the task's updates follow as broadcasts
+            request_id = message.get("id")
+            data = message.get("data")
+            try:
+                if message_type == "submit_task":
+                    task = self._submit_task_from_message(data)
+                else:
+                    task = self._get_cancellable_task(data.get("task_id") if isinstance(data, dict) else None)
+                    self._cancel_task(task)
+            except HTTPException as e:
+                await self._send_websocket(websocket, {
+                    "type": "ack", "id": request_id, "ok": False,
+                    "error": {"status": e.status_code, "detail": e.detail}
+                })
+                return
+            
+            await self._send_websocket(websocket, {
+                "type": "ack", "id": request_id, "ok": True,
+                "data": {"task_id": task["task_id"], "status": task["status"], "task": task}
+            })
+            await self._broadcast_task_update(task)
+    
+    def _submit_task_from_message(self, data: Any) -> Dict[str, Any]:
+        """Create a task from a WebSocket submit_task payload, with the POST /tasks checks"""
+        self._check_accepting()
+        if not isinstance(data, dict):
+            raise HTTPException(status_code=422, detail="data must be an object")
+        try:
+            request = TaskCreate(**data)
+        except ValidationError as e:
+            raise HTTPException(status_code=422, detail="; ".join(
+                f"{'.'.join(str(part) for part in error['loc'])}: {error['msg']}" for error in e.errors()
+            ))
+        self._check_target(request.device, request.pool)
+        return self._create_task(request.command, request.user_id, request.priority,
+                                 request.device, request.pool)
     
-    def _start_background_tasks(self):
-        """Start background monitoring tasks"""
-        asyncio.create_task(self._update_system_metrics())
+    def _register_background_jobs(self):
+        """Register periodic background jobs"""
+        self.scheduler.register("metrics", self._update_system_metrics,
+                                interval=METRICS_INTERVAL, initial_delay=0)
+        self.scheduler.register("task_eviction", self._evict_finished_tasks,
+                                interval=TASK_EVICTION_INTERVAL)
+        self.scheduler.register("event_compaction", self._compact_event_journal,
+                                interval=EVENT_COMPACTION_INTERVAL)
+        self.scheduler.register("device_health", self._probe_device_health,
+                                interval=DEVICE_PROBE_INTERVAL,
+                                timeout=DEVICE_PROBE_TIMEOUT * 2, initial_delay=0)
+        self.scheduler.register("device_telemetry", self._collect_device_telemetry,
+                                interval=TELEMETRY_INTERVAL, timeout=TELEMETRY_INTERVAL,
+                                initial_delay=0)
+        if self.discovery is not None:
+            self.scheduler.register("lan_discovery", self._discover_devices,
+                                    interval=DISCOVERY_INTERVAL, timeout=60, initial_delay=0)
+        self.scheduler.register("history_flush", self._flush_history,
+                                interval=HISTORY_FLUSH_INTERVAL, jitter=0)
+        self.scheduler.register("schedule_save", self._save_schedules,
+                                interval=SCHEDULE_SAVE_INTERVAL, jitter=0)
+        self.scheduler.register("ws_heartbeat", self._websocket_heartbeat,
+                                interval=WS_HEARTBEAT_INTERVAL)
     
     async def _update_system_metrics(self):
-        """Update system metrics periodically"""
-        while True:
+        """Refresh fleet CPU/memory and task latency, and broadcast them"""
+        performance = self.system_status["performance"]
+        # Averages over devices with fresh telemetry; None when there is none
+        performance["cpu_percent"] = self.telemetry.fleet_average("cpuUsage")
+        performance["memory_percent"] = self.telemetry.fleet_average("memoryUsage")
+        performance["latency_p80"] = self.task_metrics.snapshot()["5m"]["latency_ms"]["p80"]
+        self.system_status["devices"] = self.telemetry.to_dict()
+        
+        await self._broadcast_system_update()
+    
+    async def _flush_history(self):
+        """Append buffered task events to the history log"""
+        await run_in_threadpool(self.history.flush)
+    
+    async def _save_schedules(self):
+        """Write the schedules file if any schedule changed"""
+        schedules = self.schedules.pending_save()
+        if schedules is not None:
+            await run_in_threadpool(self.schedules.write, schedules)
+    
+    async def _evict_finished_tasks(self):
+        """Drop finished tasks past the retention window or over the cap"""
+        cutoff = datetime.fromtimestamp(time.time() - TASK_RETENTION_SECONDS).isoformat()
+        finished = [
+            task for task in self.tasks.values()
+            if task["status"] in ["completed", "failed", "cancelled"]
+        ]
+        # Retention runs from when a task finished, so long-queued results stay readable
+        def ended(task: Dict[str, Any]) -> str:
+            return finished_at(task) or task["created_at"]
+        finished.sort(key=ended)
+        
+        overflow = len(self.tasks) - MAX_RETAINED_TASKS
+        evicted = 0
+        for task in finished:
+            if ended(task) >= cutoff and evicted >= overflow:
+                break
+            del self.tasks[task["task_id"]]
+            self.task_index.discard(task)
+            evicted += 1
+        
+        if evicted:
+            self.task_queue = [task_id for task_id in self.task_queue if task_id in self.tasks]
+            logger.info(f"Evicted {evicted} finished tasks")
+        
+        for workflow_id, workflow in list(self.workflows.items()):
+            if workflow.finished_at and workflow.finished_at < cutoff:
+                del self.workflows[workflow_id]
+    
+    async def _compact_event_journal(self):
+        """Drop SSE replay events older than the retention window"""
+        dropped = self.task_events.discard_before(time.time() - EVENT_RETENTION_SECONDS)
+        if dropped:
+            logger.debug(f"Compacted {dropped} task events")
+    
+    async def _probe_device_health(self):
+        """Check that every registered Pi5 accepts SSH connections"""
+        devices = list(self.devices.devices.values())
+        results = await asyncio.gather(*(self._probe_device(device) for device in devices))
+        
+        changed = False
+        for device, status in zip(devices, results):
+            if device.status != status:
+                logger.info(f"Pi5 device {device.device_id} is {status}")
+            device.mark_status(status)
+            changed = self._update_device_component(device) or changed
+        
+        overall = "active" if "active" in results else "unreachable"
+        if overall == "active" and not self.ready:
+            self.ready = True
+            logger.info(f"✅ Ready: Pi5 connection warm {self._elapsed_ms(time.time())}ms after start")
+        
+        if self.system_status["components"].get("pi5_device") != overall:
+            self.system_status["components"]["pi5_device"] = overall
+            changed = True
+        if changed:
+            await self._broadcast_system_update()
+    
+    async def _collect_device_telemetry(self):
+        """Poll every device's status and network API into system_status"""
+        updated = await self.telemetry.collect([
+            (device.device_id, device.host, device.api_port)
+            for device in self.devices.devices.values()
+        ])
+        self.system_status["devices"] = self.telemetry.to_dict()
+        self.status_board.invalidate()
+        
+        changed = False
+        for device_id, telemetry in updated.items():
+            device = self.devices.get(device_id)
+            if device is not None and device.update_telemetry(telemetry.readings["status"]):
+                changed = self._update_device_component(device) or changed
+        if changed:
+            await self._broadcast_system_update()
+    
+    def _create_discovery(self) -> Optional[LanDiscovery]:
+        """LAN discovery for the configured subnets, or None when it is off"""
+        subnets = DISCOVERY_SUBNETS
+        if subnets == ["auto"]:
+            subnet = local_subnet()
+            subnets = [subnet] if subnet else []
+        if not subnets:
+            return None
+        try:
+            return LanDiscovery(subnets, DISCOVERY_PORT,
+                                HttpConnectionPool(DISCOVERY_CONCURRENCY, max_idle_per_host=1),
+                                DISCOVERY_TIMEOUT)
+        except ValueError as e:
+            logger.error(f"❌ LAN discovery disabled: {e}")
+            return None
+    
+    async def _discover_devices(self):
+        """Sweep the LAN: everything first, then known devices plus a slice at a time"""
+        if not self.discovery.swept:
+            result = await self.discovery.full_sweep()
+        else:
+            result = await self.discovery.incremental_sweep()
+            if result["missing"]:
+                # A device left its address: look for it everywhere
+                result = await self.discovery.full_sweep()
+        logger.debug(f"LAN discovery {result['kind']} sweep: {result['answered']}/{result['scanned']} "
+                     f"answered in {result['duration_ms']}ms")
+        if self._apply_discovery():
+            await self._broadcast_system_update()
+        records = self.discovery.pending_save()
+        if records is not None:
+            await run_in_threadpool(self.discovery.write, records)
+    
+    def _apply_discovery(self) -> bool:
+        """Move configured devices to the address their serial was found at"""
+        moved = False
+        for found in self.discovery.devices.values():
+            device = self.devices.by_serial(found.serial)
+            if device is None or device.host == found.host or found.state == "missing":
+                continue
+            logger.info(f"📍 Pi5 device {device.device_id} ({found.serial}) is now at {found.host}")
+            device.move_to(found.host)
+            device.mark_status("unknown")
+            moved = self._update_device_component(device) or moved
+        return moved
+    
+    def _update_device_component(self, device: Pi5Device) -> bool:
+        """Reflect device health and circuit state in /status components"""
+        if device.breaker.state != "closed":
+            value = f"circuit_{device.breaker.state}"
+        elif device.throttle.level != "normal" and device.status == "active":
+            value = f"throttled_{device.throttle.level}"
+        else:
+            value = device.status
+        component = f"pi5:{device.device_id}"
+        if self.system_status["components"].get(component) == value:
+            return False
+        self.system_status["components"][component] = value
+        return True
+    
+    def _on_circuit_change(self, device: Pi5Device):
+        """Circuit breaker state changed: publish it"""
+        logger.warning(f"⚡ Circuit for {device.device_id} is now {device.breaker.state}")
+        if self._update_device_component(device):
+            asyncio.create_task(self._broadcast_system_update())
+    
+    async def _probe_device(self, device: Pi5Device) -> str:
+        """TCP probe of one device's SSH port"""
+        try:
+            _, writer = await asyncio.wait_for(
+                asyncio.open_connection(device.host, 22), timeout=DEVICE_PROBE_TIMEOUT
+            )
+            writer.close()
+            return "active"
+        except (OSError, asyncio.TimeoutError):
+            return "unreachable"
+    
+    def _elapsed_ms(self, timestamp: float) -> int:
+        """Milliseconds between process start and timestamp"""
+        return int((timestamp - PROCESS_STARTED_AT) * 1000)
+    
+    def _startup_ms(self) -> Optional[int]:
+        """Time from process start until the listener was serving"""
+        return self._elapsed_ms(self.listening_at) if self.listening_at else None
+    
+    async def _report_startup(self, server):
+        """Record when uvicorn starts serving and check the startup budget"""
+        while not server.started:
+            await asyncio.sleep(0.005)
+        self.listening_at = time.time()
+        startup_ms = self._startup_ms()
+        if startup_ms > STARTUP_BUDGET_MS:
+            logger.warning(f"⚠️ Startup took {startup_ms}ms, over the {STARTUP_BUDGET_MS}ms budget")
+        else:
+            logger.info(f"Serving {startup_ms}ms after start (budget {STARTUP_BUDGET_MS}ms)")
+        
+        # Started by a graceful reload: tell the previous process we are serving
+        ready_fd = os.environ.pop(READY_FD_ENV, None)
+        if ready_fd:
+            with os.fdopen(int(ready_fd), "wb") as ready_pipe:
+                ready_pipe.write(b"ready\n")
+    
+    async def _graceful_reload(self):
+        """Hand the listening socket to a new process, then drain and exit"""
+        if self.draining or not self._listen_sockets or not hasattr(os, "pipe"):
+            return
+        if sys.platform == "win32":
+            logger.error("❌ Graceful reload needs POSIX file descriptor passing")
+            return
+        
+        logger.info("🔄 Graceful reload: starting new process")
+        # The new process loads the schedules file and fires from there on
+        await self.schedules.stop()
+        await self._save_schedules()
+        listen_fd = self._listen_sockets[0].fileno()
+        read_fd, write_fd = os.pipe()
+        self.handoff_token = secrets.token_hex(16)
+        env = dict(os.environ, **{LISTEN_FD_ENV: str(listen_fd), READY_FD_ENV: str(write_fd),
+                                  HANDOFF_TOKEN_ENV: self.handoff_token})
+        launcher = os.path.join(os.path.dirname(os.path.abspath(__file__)), "start_p6_ui.py")
+        
+        try:
+            subprocess.Popen(
+                [sys.executable, launcher, "--host", self.host, "--port", str(self.port)],
+                env=env, pass_fds=(listen_fd, write_fd)
+            )
+        except OSError as e:
+            logger.error(f"❌ Graceful reload failed to start new process: {e}")
+            os.close(read_fd)
+            self.schedules.start()
+            return
+        finally:
+            os.close(write_fd)
+        
+        def wait_ready() -> bool:
+            with os.fdopen(read_fd, "rb") as ready_pipe:
+                return ready_pipe.readline().strip() == b"ready"
+        
+        try:
+            ready = await asyncio.wait_for(run_in_threadpool(wait_ready), timeout=RELOAD_READY_TIMEOUT)
+        except asyncio.TimeoutError:
+            ready = False
+        if not ready:
+            logger.error("❌ Graceful reload aborted: new process did not become ready")
+            self.schedules.start()
+            return
+        
+        # The new process is serving on the same socket: stop admitting work here
+        self.draining = True
+        for server in self._server.servers:
+            server.close()
+        logger.info("New process is serving; draining this one")
+        
+        await self._send_reconnect_to_websockets()
+        self.task_events.close()
+        self.status_board.close()
+        
+        # Pending tasks no longer start here; wait for the running ones only
+        deadline = time.time() + RELOAD_DRAIN_TIMEOUT
+        while self._running_task_ids() and time.time() < deadline:
+            await asyncio.sleep(0.1)
+        
+        await self._hand_off_tasks()
+        self._server.should_exit = True
+    
+    async def _send_reconnect_to_websockets(self):
+        """Ask WebSocket clients to reconnect, with a resume point for missed updates"""
+        message = {
+            "type": "reconnect",
+            "data": {
+                "reason": "restart",
+                "retry_ms": RELOAD_RETRY_MS,
+                "resume_from": self.task_events.last_event_id
+            }
+        }
+        for websocket in self.websockets:
             try:
-                # Simulate changing metrics
-                import random
-                
-                self.system_status["performance"]["cpu_percent"] = max(20, min(80, 
-                    self.system_status["performance"]["cpu_percent"] + random.uniform(-5, 5)))
-                
-                self.system_status["performance"]["memory_percent"] = max(30, min(90,
-                    self.system_status["performance"]["memory_percent"] + random.uniform(-3, 3)))
-                
-                self.system_status["performance"]["latency_p80"] = max(50, min(300,
-                    self.system_status["performance"]["latency_p80"] + random.uniform(-10, 10)))
-                
-                await self._broadcast_system_update()
-                await asyncio.sleep(5)  # Update every 5 seconds
-                
-            except Exception as e:
-                logger.error(f"Error updating system metrics: {e}")
-                await asyncio.sleep(10)
+                await self._send_websocket(websocket, message)
+                await websocket.close(code=1012)  # Service Restart
+            except Exception:
+                pass
+    
+    def _running_task_ids(self) -> List[str]:
+        """Tasks whose command has been released to a device"""
+        return [task_id for task_id in self.active_tasks
+                if task_id in self.tasks and self.tasks[task_id]["status"] == "running"]
+    
+    def _fail_interrupted_task(self, task: Dict[str, Any]):
+        """A reload cut this task off mid-command: fail it rather than run it twice"""
+        task["status"] = "failed"
+        task["progress"] = 0
+        task["failed_at"] = datetime.now().isoformat()
+        task["error"] = "Interrupted by reload"
+    
+    def _local_url(self, path: str) -> str:
+        """URL of this server's port on the address it is bound to, loopback for wildcards"""
+        host = {"0.0.0.0": "127.0.0.1", "::": "::1", "": "127.0.0.1"}.get(self.host, self.host)
+        if ":" in host:
+            host = f"[{host}]"
+        return f"http://{host}:{self.port}{path}"
     
-    async def start(self):
-        """Start the server"""
+    async def _hand_off_tasks(self):
+        """Send task state to the new process; pending tasks are resumed there"""
+        unfinished = [task_id for task_id, task in self.tasks.items()
+                      if task["status"] in ["pending", "running"]]
+        for task_id in unfinished:
+            task = self.tasks[task_id]
+            if task["status"] == "running":
+                # Still running after the drain: the device may have done part of it
+                self._fail_interrupted_task(task)
+                logger.warning(f"⚠️ Task {task_id} interrupted by reload")
+            else:
+                task["handed_off_at"] = datetime.now().isoformat()
+            if task_id in self.active_tasks:
+                self.active_tasks.pop(task_id).cancel()
+        if not self.tasks:
+            return
+        
+        body = json.dumps({"tasks": list(self.tasks.values())}).encode()
+        url = self._local_url("/internal/handoff")
+        headers = {"Content-Type": "application/json", "X-Handoff-Token": self.handoff_token}
+        
+        def post_handoff():
+            request = urllib.request.Request(url, data=body, headers=headers, method="POST")
+            with urllib.request.urlopen(request, timeout=10) as response:
+                return json.loads(response.read())
+        
+        try:
+            result = await run_in_threadpool(post_handoff)
+            logger.info(f"Handed off {result['accepted']} tasks ({result['resumed']} unfinished)")
+        except Exception as e:
+            pending = sum(1 for task_id in unfinished if self.tasks[task_id]["status"] == "pending")
+            logger.error(f"❌ Task handoff failed, {pending} pending tasks lost: {e}")
+    
+    def _open_listener(self) -> socket.socket:
+        """Inherit the listening socket from a reloading parent, or bind a new one"""
+        inherited_fd = os.environ.pop(LISTEN_FD_ENV, None)
+        if inherited_fd:
+            return socket.socket(fileno=int(inherited_fd))
+        return socket.create_server((self.host, self.port), backlog=2048)
+    
+    async def start(self, sockets: Optional[List[socket.socket]] = None):
+        """Start the server, optionally on already-bound listening sockets"""
+        import uvicorn
+        
         logger.info(f"Starting DexiMind P6 UI server on {self.host}:{self.port}")
         config = uvicorn.Config(
             app=self.app,
             host=self.host,
             port=self.port,
-            log_level="info"
+            log_level="info",
+            ws_per_message_deflate=WS_PER_MESSAGE_DEFLATE,
+            ws_ping_interval=WS_PING_INTERVAL,
+            ws_ping_timeout=WS_PING_TIMEOUT,
+            timeout_graceful_shutdown=int(RELOAD_DRAIN_TIMEOUT) + 5
         )
         server = uvicorn.Server(config)
-        await server.serve()
+        self._server = server
+        self._listen_sockets = sockets or [self._open_listener()]
+        
+        startup_report = asyncio.create_task(self._report_startup(server))
+        try:
+            await server.serve(sockets=self._listen_sockets)
+        finally:
+            startup_report.cancel()
 
-async def main():
+async def main(host: str = "0.0.0.0", port: int = 8001, sockets: Optional[List[socket.socket]] = None):
     """Main function"""
-    ui = StandaloneP6UI(host="0.0.0.0", port=8001)
-    await ui.start()
+    ui = StandaloneP6UI(host=host, port=port)
+    await ui.start(sockets=sockets)
 
 if __name__ == "__main__":
     asyncio.run(main())
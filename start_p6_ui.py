@@ -7,15 +7,30 @@ This script starts the DexiMind P6 UI server for production deployment.
 It handles the standalone P6 UI server that provides the web interface
 accessible at https://engix.dev/deximind-p6-ui.html
 
+The listening socket is bound before the server module (FastAPI, pydantic,
+uvicorn) is imported, and the app runs in this process, so connections made
+during a cold start wait in the accept backlog instead of being refused.
+
+Usage:
+    python start_p6_ui.py                      # start the server
+    python start_p6_ui.py --profile-imports    # import-time profile report
+    python start_p6_ui.py --bench-startup 5    # exec -> first /health benchmark
+
 Author: DexiMind Development Team
 Date: 2025-01-15
 Version: 1.0.0
 """
 
+import argparse
+import asyncio
+import logging
 import os
-import sys
+import socket
+import statistics
 import subprocess
-import logging
+import sys
+import time
+import urllib.request
 from pathlib import Path
 
 # Configure logging
@@ -25,37 +40,135 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-def start_p6_ui_server():
+SCRIPT_DIR = Path(__file__).resolve().parent
+
+def open_listener(host: str, port: int) -> socket.socket:
+    """Listen on the server port before any heavy imports.
+
+    During a graceful reload the previous process passes its listening
+    socket down in P6_LISTEN_FD, so the port is never unbound.
+    """
+    inherited_fd = os.environ.pop("P6_LISTEN_FD", None)
+    if inherited_fd:
+        return socket.socket(fileno=int(inherited_fd))
+    return socket.create_server((host, port), backlog=2048)
+
+def start_p6_ui_server(host: str = "0.0.0.0", port: int = 8001):
     """Start the P6 UI server"""
     try:
         # Check if standalone_p6_ui.py exists
-        script_path = Path("standalone_p6_ui.py")
+        script_path = SCRIPT_DIR / "standalone_p6_ui.py"
         if not script_path.exists():
             logger.error("❌ standalone_p6_ui.py not found!")
             return False
-        
+
         logger.info("🚀 Starting DexiMind P6 UI Server...")
-        logger.info("📡 Server will be available at: http://localhost:8001")
+        logger.info(f"📡 Server will be available at: http://localhost:{port}")
         logger.info("🌐 Web interface: https://engix.dev/deximind-p6-ui.html")
-        
-        # Start the server
-        subprocess.run([sys.executable, "standalone_p6_ui.py"], check=True)
-        
-    except subprocess.CalledProcessError as e:
+
+        # Accept connections straight away; they are served once the app is up
+        sock = open_listener(host, port)
+
+        sys.path.insert(0, str(SCRIPT_DIR))
+        import standalone_p6_ui
+
+        # Run the server in this process
+        asyncio.run(standalone_p6_ui.main(host=host, port=port, sockets=[sock]))
+        return True
+
+    except OSError as e:
         logger.error(f"❌ Failed to start P6 UI server: {e}")
         return False
+    except KeyboardInterrupt:
+        return True
     except Exception as e:
         logger.error(f"❌ Error starting P6 UI server: {e}")
         return False
 
+def profile_imports(top: int = 15):
+    """Report the slowest imports of the server module (python -X importtime)"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import standalone_p6_ui"],
+        cwd=SCRIPT_DIR, capture_output=True, text=True
+    )
+
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        rows.append((int(cumulative_us), int(self_us), name.rstrip()))
+
+    if not rows:
+        logger.error(f"❌ Import profile failed: {result.stderr.strip()}")
+        return False
+
+    total_us = max(rows)[0]
+    print(f"Import time for standalone_p6_ui: {total_us / 1000:.1f}ms")
+    print(f"{'cumulative ms':>14} {'self ms':>9}  module")
+    for cumulative_us, self_us, name in sorted(rows, reverse=True)[:top]:
+        print(f"{cumulative_us / 1000:14.1f} {self_us / 1000:9.1f}  {name}")
+    return True
+
+def benchmark_startup(runs: int, port: int, timeout: float = 30.0):
+    """Measure time from exec to the first successful /health response"""
+    url = f"http://127.0.0.1:{port}/health"
+    samples = []
+
+    for run in range(runs):
+        started = time.perf_counter()
+        process = subprocess.Popen(
+            [sys.executable, str(SCRIPT_DIR / "start_p6_ui.py"), "--host", "127.0.0.1", "--port", str(port)],
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+        )
+        try:
+            while True:
+                elapsed = time.perf_counter() - started
+                if elapsed > timeout or process.poll() is not None:
+                    logger.error(f"❌ Run {run + 1}: no healthy response after {elapsed:.1f}s")
+                    return False
+                try:
+                    with urllib.request.urlopen(url, timeout=1) as response:
+                        if response.status == 200:
+                            break
+                except OSError:
+                    time.sleep(0.005)
+            samples.append((time.perf_counter() - started) * 1000)
+            logger.info(f"Run {run + 1}: first /health after {samples[-1]:.0f}ms")
+        finally:
+            process.terminate()
+            process.wait()
+
+    print(f"exec -> first /health over {runs} runs: "
+          f"min {min(samples):.0f}ms, median {statistics.median(samples):.0f}ms, max {max(samples):.0f}ms")
+    return True
+
+def parse_args():
+    """Parse command line arguments"""
+    parser = argparse.ArgumentParser(description="Start the DexiMind P6 UI server")
+    parser.add_argument("--host", default=os.environ.get("P6_HOST", "0.0.0.0"))
+    parser.add_argument("--port", type=int, default=int(os.environ.get("P6_PORT", "8001")))
+    parser.add_argument("--profile-imports", action="store_true",
+                        help="print an import-time profile of the server module and exit")
+    parser.add_argument("--bench-startup", type=int, metavar="RUNS",
+                        help="measure exec to first successful /health over RUNS starts")
+    return parser.parse_args()
+
 if __name__ == "__main__":
+    args = parse_args()
+
+    if args.profile_imports:
+        sys.exit(0 if profile_imports() else 1)
+    if args.bench_startup:
+        sys.exit(0 if benchmark_startup(args.bench_startup, args.port) else 1)
+
     logger.info("🎬 DexiMind P6 UI Server Startup")
     logger.info("=" * 50)
-    
-    success = start_p6_ui_server()
-    
+
+    success = start_p6_ui_server(args.host, args.port)
+
     if success:
-        logger.info("✅ P6 UI Server started successfully")
+        logger.info("✅ P6 UI Server stopped")
     else:
         logger.error("❌ Failed to start P6 UI Server")
         sys.exit(1)